@@ -1,27 +1,72 @@
+from __future__ import annotations
+
 import asyncio
+import concurrent.futures
+import contextlib
+import contextvars
+import hashlib
+import importlib
+import itertools
 import json
 import os
-from typing import List, Dict, Any, Optional, Tuple
-from datetime import date
-from langchain.schema import Document
+import re
+import sys
+import time
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple, AsyncIterator, Iterable, Iterator
+from datetime import datetime
+from langchain_core.documents import Document
 from dataclasses import dataclass
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain_chroma import Chroma
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from pydantic import BaseModel, Field
+from caching import CachedEmbeddings, SemanticResponseCache, embed_queries
+from intent import Intent, LocalIntentClassifier
+from structured_output import (JsonArrayStreamParser, ParseResult, StructuredOutputStats, parse_items, repair_prompt,
+                               response_schema, schema_instructions, validate_item)
+from retrieval import ContextPacker, HybridRetriever, RecordFilter, days_since_epoch, search_by_vectors
+from conversation_store import ConversationStore, MemoryConversationStore, SQLiteConversationStore, recent_history
+from resume import ANALYSIS_PROMPT, ATS_PROMPT, SUPPORTED_EXTENSIONS, ResumeExtractionError, ResumeTextExtractor, parse_ats_scores
+from ingestion import (PREPROCESSOR_VERSION, Deduplicator, IncompleteLoadError, IngestionStats, PreprocessReport,
+                       is_scraped_page, iter_json_records, preprocess_scraped_pages)
+from enrichment import CardStore, RecordCard, apply_cards, cards_fingerprint
+from matching import SKILLS_PATH, JobMatch, JobMatcher, SkillExtractor
+from observability import Metrics
+from llm_gateway import DeadlineExceeded, LLMGateway, LLMOverloadedError, Priority, deadline
+from snapshots import SnapshotManager
 import warnings
-from flask import Flask, request, jsonify, session, make_response
+from flask import Flask, Response, request, jsonify, session, make_response, g
 # Import CORS
 from flask_cors import CORS
 import nest_asyncio
-from werkzeug.utils import secure_filename
-import os
-import PyPDF2
-import tempfile
+import queue
+import threading
+import uuid
 import traceback # For detailed error logging
 from dotenv import load_dotenv
 load_dotenv() 
 
+if TYPE_CHECKING:  # Imported on first use at runtime, see lazy_import
+    from langchain_chroma import Chroma
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+# --- Heavy Dependencies (Imported on First Use) ---
+# Together these take most of the import time of this module. A worker that only
+# answers "/" or /api/health never loads them; the Chatbot build (or the first
+# request that needs a model or a vector store) does. Benchmarks swap in fakes by
+# assigning the module attribute of the same name.
+LAZY_IMPORTS = {
+    "ChatGoogleGenerativeAI": "langchain_google_genai",
+    "GoogleGenerativeAIEmbeddings": "langchain_google_genai",
+    "Chroma": "langchain_chroma",
+    "RecursiveCharacterTextSplitter": "langchain.text_splitter",
+    "NumpyVectorStore": "vector_store",
+}
+
+def lazy_import(name: str) -> Any:
+    """The class `name` from LAZY_IMPORTS, importing its module the first time."""
+    value = globals().get(name)
+    if value is None:
+        value = globals()[name] = getattr(importlib.import_module(LAZY_IMPORTS[name]), name)
+    return value
+
 nest_asyncio.apply()
 
 # --- Suppress Warnings ---
@@ -31,6 +76,76 @@ warnings.filterwarnings("ignore", category=DeprecationWarning)
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 JOB_FILES_PATH = "linkedin_jobs.json" # Example using relative path
 COMMUNITY_FILES_PATH = "scraped_data.json" # Example using relative path
+# "incremental": embed only new/changed records on startup or reload.
+# "create_if_empty": legacy behaviour, build once and never refresh.
+# "snapshot": serve the published snapshot (see snapshots.py) and hot-reload when a new one is published.
+VECTOR_DB_SYNC_MODE = os.getenv("VECTOR_DB_SYNC_MODE", "incremental")
+VECTOR_DB_KEEP_SNAPSHOTS = int(os.getenv("VECTOR_DB_KEEP_SNAPSHOTS", "3"))  # Published snapshots kept for rollback
+SNAPSHOT_POLL_SECONDS = float(os.getenv("SNAPSHOT_POLL_SECONDS", "10"))     # How often workers look for a new snapshot
+# "structured": typed title/company/location/date/link metadata and only the meaningful text embedded.
+# "raw": the whole record as a JSON string.
+INGESTION_MODE = os.getenv("INGESTION_MODE", "structured")
+# Drop re-posted jobs (same title/company/location/description, or MinHash similarity >= the threshold) before embedding
+INGESTION_DEDUP = os.getenv("INGESTION_DEDUP", "1") == "1"
+INGESTION_NEAR_DUPLICATE_THRESHOLD = float(os.getenv("INGESTION_NEAR_DUPLICATE_THRESHOLD", "0.85"))
+# "hybrid": BM25 + vector search with rank fusion and metadata filters; "vector": Chroma's default retriever.
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "3"))
+RESUME_MAX_BYTES = int(os.getenv("RESUME_MAX_BYTES", str(5 * 1024 * 1024)))
+RESUME_MAX_PAGES = int(os.getenv("RESUME_MAX_PAGES", "20"))
+RESUME_REVIEW_CACHE = os.getenv("RESUME_REVIEW_CACHE", "1") == "1"       # Reuse reviews of identical files
+RESUME_MATCH_TOP_N = int(os.getenv("RESUME_MATCH_TOP_N", "10"))                   # Jobs returned by /api/resume_match
+RESUME_MATCH_SKILL_WEIGHT = float(os.getenv("RESUME_MATCH_SKILL_WEIGHT", "0.3"))  # Weight of skill overlap vs. vector similarity
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))  # Retrieved records per prompt
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "300"))   # Chat history per prompt
+EMBEDDING_MODEL = "models/embedding-001"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))  # 0 disables the cache
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.95"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "900"))
+INTENT_EXAMPLES_PATH = "data/intent_examples.jsonl"
+INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.8"))  # Below this, ask Gemini
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))  # 0 disables the cache
+VECTOR_DB_ROOT = os.getenv("VECTOR_DB_ROOT", "db")
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")  # "chroma" or "numpy" (memory-mapped exact search, see vector_store.py)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")  # Enables /api/admin/reload when set
+# When a worker builds its Chatbot: "eager" before it accepts connections, "background" in a
+# warm-up thread while it already answers (chat requests wait for the build), "lazy" on first use
+STARTUP_MODE = os.getenv("STARTUP_MODE", "background")
+# Store name -> (directory under VECTOR_DB_ROOT, data files)
+VECTOR_STORES = {"jobs": ("job_chatbot_gemini", JOB_FILES_PATH), "events": ("community_chatbot_gemini", COMMUNITY_FILES_PATH)}
+CONVERSATION_STORE = os.getenv("CONVERSATION_STORE", "memory")  # "memory" (per process) or "sqlite" (shared by workers)
+CONVERSATION_DB_PATH = os.getenv("CONVERSATION_DB_PATH", os.path.join(VECTOR_DB_ROOT, "conversations.sqlite3"))
+CONVERSATION_WINDOW = int(os.getenv("CONVERSATION_WINDOW", "10"))  # History lines kept verbatim; older ones are summarized
+CONVERSATION_TTL_SECONDS = float(os.getenv("CONVERSATION_TTL_SECONDS", str(7 * 24 * 3600)))
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"  # Stage timings and /api/metrics
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"      # Always add a Server-Timing header (else only on X-Server-Timing: 1)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))  # Gemini calls in flight per process
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "64"))             # Callers waiting for a slot before 503s
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))   # Seconds a caller may wait for a slot
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))  # Duplicate a call still running past this latency percentile
+LLM_HEDGE_MAX_RATE = float(os.getenv("LLM_HEDGE_MAX_RATE", "0.05"))    # Share of calls that may be hedged; 0 disables hedging
+CHAT_DEADLINE_SECONDS = float(os.getenv("CHAT_DEADLINE_SECONDS", "20"))  # Per-message budget before a degraded answer; 0 disables
+# Search both stores while the intent is classified: "off", "auto" (only when Gemini has to classify) or "always"
+SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "auto")
+LLM_JSON_MODE = os.getenv("LLM_JSON_MODE", "1") == "1"  # Constrain the job/event agents' Gemini output to their JSON schema
+RECORD_CARDS = os.getenv("RECORD_CARDS", "1") == "1"  # Send precomputed record cards instead of raw chunks (see enrichment.py)
+RECORD_CARDS_PATH = os.getenv("RECORD_CARDS_PATH")  # Defaults to <VECTOR_DB_ROOT>/record_cards.sqlite3
+BATCH_MAX_MESSAGES = int(os.getenv("BATCH_MAX_MESSAGES", "500"))  # Per /api/chat/batch request
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))      # Answers in flight per batch request
+
+# Per-stage timings, sizes and error counts, exported at /api/metrics
+metrics = Metrics(enabled=METRICS_ENABLED)
+
+# Parse outcomes of the JSON-answering agents (see structured_output.py)
+structured_output_stats = StructuredOutputStats()
+
+# Every Gemini chat call in the process goes through this, across Chatbot reloads
+llm_gateway = LLMGateway(max_concurrency=LLM_MAX_CONCURRENCY, max_queue=LLM_MAX_QUEUE,
+                         queue_timeout=LLM_QUEUE_TIMEOUT, hedge_percentile=LLM_HEDGE_PERCENTILE,
+                         hedge_max_rate=LLM_HEDGE_MAX_RATE)
+
+# Records retrieved while answering the current message, by store: the degraded answer when its budget runs out
+_retrieved_documents: contextvars.ContextVar = contextvars.ContextVar("retrieved_documents", default=None)
 
 # --- Pydantic Models (JobOpportunity, CommunityEvent) ---
 class JobOpportunity(BaseModel):
@@ -50,127 +165,398 @@ class CommunityEvent(BaseModel):
 
 # --- Agent Classes (IntentClassifierAgent, JobSearchAgent, CommunityEventSearchAgent) ---
 class IntentClassifierAgent:
-    """Agent to classify user intent using Gemini."""
-    def __init__(self, model: ChatGoogleGenerativeAI):
+    """Agent to classify user intent: a local model first, Gemini only when the local model is unsure."""
+    def __init__(self, model: ChatGoogleGenerativeAI, local_classifier: Optional[LocalIntentClassifier] = None,
+                 confidence_threshold: float = INTENT_CONFIDENCE_THRESHOLD):
         self.model = model
+        self.local_classifier = local_classifier
+        self.confidence_threshold = confidence_threshold
+        self.local_decisions = 0
+        self.llm_fallbacks = 0
+        self._counts_lock = threading.Lock()  # Counters are bumped from several requests at once
 
-    async def run(self, query: str) -> str:
-        response = await self.model.ainvoke(f"""You are an expert at understanding the intent behind user queries related to resources for women. Your task is to analyze the given query and classify it into one of the following categories: 1. Job Opportunities, 2. Mentorship Programs, 3. Community Events. If the user asks for any resources, guidance, or preparation materials, classify it as 'Mentorship Programs'. Based on the user's query, output only the category that best matches their intent: {query}""")
-        return response.content.strip()
+    def _count(self, local: int = 0, llm: int = 0):
+        with self._counts_lock:
+            self.local_decisions += local
+            self.llm_fallbacks += llm
 
+    async def run(self, query: str) -> Intent:
+        return self.decide_locally(query) or await self.classify_with_llm(query)
 
-class JobSearchAgent:
-    """Agent to find and summarize job opportunities using Gemini."""
-    def __init__(self, model: ChatGoogleGenerativeAI):
-        self.model = model
+    def decide_locally(self, query: str) -> Optional[Intent]:
+        """The local model's intent if it is confident enough, else None."""
+        if self.local_classifier is None:
+            return None
+        with metrics.span("intent_local"):
+            intent, confidence = self.local_classifier.predict(query)
+        if confidence < self.confidence_threshold:
+            return None
+        self._count(local=1)
+        metrics.inc("intent_decisions_total", source="local", intent=intent.value)
+        return intent
 
-    async def run(self, query: str, context: str) -> List[JobOpportunity]:
-        response = await self.model.ainvoke(f"""Based on the following job listings:\n\n{context}\n\nIdentify and summarize any specific job opportunities mentioned. Pay close attention to the location and requirements specified for each job. Output the result as a JSON array of JobOpportunity objects with the following keys: "title", "organization", "details", "url", and "location".""")
-        content = response.content.strip()
-        print("CONTENT:", content)  # Debugging line to check the content
+    async def classify_with_llm(self, query: str) -> Intent:
+        self._count(llm=1)
         try:
-            # Try to load directly first
-            return [JobOpportunity(**item) for item in json.loads(content)]
-        except json.JSONDecodeError:
-            # If direct loading fails, try to extract JSON from a code block
-            import re
-            json_match = re.search(r"```json\n(.*?)\n```", content, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1).strip()
-                try:
-                    return [JobOpportunity(**item) for item in json.loads(json_str)]
-                except json.JSONDecodeError as e:
-                    print(f"JSONDecodeError (extracted): {e}, Content: {json_str}")
-                    return []
-                except Exception as e:
-                    print(f"Error parsing JobOpportunity (extracted): {e}, Content: {json_str}")
-                    return []
-            else:
-                print(f"Could not find JSON in response: {content}")
-                return []
-        except Exception as e:
-            print(f"Error parsing JobOpportunity (initial): {e}, Content: {content}")
-            return []
+            with metrics.span("intent_llm"):
+                intent = await self._classify_with_llm(query)
+        except DeadlineExceeded:
+            if self.local_classifier is None:
+                raise
+            # Out of time: the local model's best guess beats no answer at all
+            intent, _ = self.local_classifier.predict(query)
+            metrics.inc("intent_decisions_total", source="deadline", intent=intent.value)
+            return intent
+        metrics.inc("intent_decisions_total", source="llm", intent=intent.value)
+        return intent
 
+    async def run_batch(self, queries: List[str], priority: Priority = Priority.CHAT) -> List[Intent]:
+        """Intents for several queries: the local model for each, then one Gemini call for all it was unsure of."""
+        intents = [self.decide_locally(query) for query in queries]
+        unsure = [i for i, intent in enumerate(intents) if intent is None]
+        if not unsure:
+            return intents
+        self._count(llm=len(unsure))
+        listing = "\n".join(f"{number}: {' '.join(queries[i].split())}" for number, i in enumerate(unsure, start=1))
+        with metrics.span("intent_llm_batch"):
+            response = await self.model.ainvoke(f"""You are an expert at understanding the intent behind user queries related to resources for women. Classify each numbered query below into one of the following categories: 1. Job Opportunities, 2. Mentorship Programs, 3. Community Events. If the user asks for any resources, guidance, or preparation materials, classify it as 'Mentorship Programs'. Output one line per query, as the query's number, a colon and only the category.\nQueries:\n{listing}""", priority=priority)
+        labels = dict(re.findall(r"^\s*(\d+)\s*[:.)]\s*(.+?)\s*$", response.content, re.M))
+        for number, i in enumerate(unsure, start=1):
+            label = labels.get(str(number))
+            # A line the model dropped or garbled gets a call of its own
+            intents[i] = Intent.from_label(label) if label else await self._classify_with_llm(queries[i], priority)
+            metrics.inc("intent_decisions_total", source="llm", intent=intents[i].value)
+        return intents
+
+    async def _classify_with_llm(self, query: str, priority: Priority = Priority.CHAT) -> Intent:
+        response = await self.model.ainvoke(f"""You are an expert at understanding the intent behind user queries related to resources for women. Your task is to analyze the given query and classify it into one of the following categories: 1. Job Opportunities, 2. Mentorship Programs, 3. Community Events. If the user asks for any resources, guidance, or preparation materials, classify it as 'Mentorship Programs'. Based on the user's query, output only the category that best matches their intent: {query}""", priority=priority)
+        return Intent.from_label(response.content.strip())
+
+
+class StructuredSearchAgent:
+    """Base for agents that answer with a JSON array of `item_cls` objects.
+
+    The prompt carries the JSON Schema of `item_cls` (and the model runs in
+    JSON mode constrained to that schema, see Chatbot.json_llms). Answers are parsed tolerantly; only
+    when nothing at all can be recovered is the model asked once to repair
+    its own output, which costs far less than regenerating from the context.
+    """
+    item_cls = BaseModel
 
-class CommunityEventSearchAgent:
-    """Agent to find and summarize community events using Gemini."""
     def __init__(self, model: ChatGoogleGenerativeAI):
         self.model = model
 
-    async def run(self, query: str, context: str) -> List[CommunityEvent]:
-        response = await self.model.ainvoke(f"""Based on the following community event listings:\n\n{context}\n\nIdentify and summarize any specific community events mentioned. Output the result as a JSON array of CommunityEvent objects having title, date, location, description, and url.""")
+    @staticmethod
+    def prompt(context: str) -> str:
+        raise NotImplementedError
+
+    async def _repair(self, content: str) -> ParseResult:
+        name = self.item_cls.__name__
+        with metrics.span("llm_repair", agent=name):
+            response = await self.model.ainvoke(repair_prompt(content, self.item_cls))
+        return parse_items(response.content, self.item_cls)
+
+    def _record(self, outcome: str, invalid_items: int = 0):
+        structured_output_stats.record(self.item_cls.__name__, outcome, invalid_items)
+        metrics.inc("structured_output_total", agent=self.item_cls.__name__, outcome=outcome)
+
+    async def run(self, query: str, context: str) -> List[BaseModel]:
+        name = self.item_cls.__name__
+        prompt = self.prompt(context)
+        with metrics.span("llm_generation", agent=name):
+            response = await self.model.ainvoke(prompt)
         content = response.content.strip()
+        metrics.observe_size("prompt_chars", len(prompt), agent=name)
+        metrics.observe_size("response_chars", len(content), agent=name)
+        with metrics.span("json_parse", agent=name):
+            result = parse_items(content, self.item_cls)
+        if result.outcome == "failed":
+            print(f"Could not parse {name} answer, asking for a repair: {content[:200]}")
+            repaired = await self._repair(content)
+            if repaired.items or repaired.outcome == "empty":
+                self._record("repaired", repaired.invalid_items)
+                return repaired.items
+        self._record(result.outcome, result.invalid_items)
+        return result.items
+
+    async def stream(self, query: str, context: str) -> AsyncIterator[BaseModel]:
+        """Yields each item as soon as its object is complete in the streamed answer."""
+        name = self.item_cls.__name__
+        prompt = self.prompt(context)
+        parser = JsonArrayStreamParser()
+        parts: List[str] = []
+        yielded = invalid = 0
+        metrics.observe_size("prompt_chars", len(prompt), agent=name)
+        with metrics.span("llm_stream", agent=name):
+            async for chunk in self.model.astream(prompt):
+                parts.append(chunk.content)
+                for obj in parser.feed(chunk.content):
+                    item = validate_item(self.item_cls, obj)
+                    if item is None:
+                        invalid += 1
+                        continue
+                    yielded += 1
+                    yield item
+        salvaged = 0
+        for obj in parser.close():
+            item = validate_item(self.item_cls, obj)
+            if item is not None:
+                salvaged += 1
+                yield item
+        if yielded or salvaged:
+            self._record("salvaged" if salvaged or parser.truncated or invalid else "parsed", invalid)
+        elif parser.finished and not invalid:
+            self._record("empty")
+        else:
+            repaired = await self._repair("".join(parts))
+            self._record("repaired" if repaired.items or repaired.outcome == "empty" else "failed",
+                         invalid + repaired.invalid_items)
+            for item in repaired.items:
+                yield item
+
+
+class JobSearchAgent(StructuredSearchAgent):
+    """Agent to find and summarize job opportunities using Gemini."""
+    item_cls = JobOpportunity
+
+    @staticmethod
+    def prompt(context: str) -> str:
+        return f"""Based on the following job listings:\n\n{context}\n\nIdentify and summarize any specific job opportunities mentioned. Pay close attention to the location and requirements specified for each job. {schema_instructions(JobOpportunity)}"""
 
-        try:
-            # Try to load directly first
-            return [CommunityEvent(**item) for item in json.loads(content)]
-        except json.JSONDecodeError:
-            # If direct loading fails, try to extract JSON from a code block
-            import re
-
-            json_match = re.search(r"```json\n(.*?)\n```", content, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1).strip()
-                try:
-                    return [CommunityEvent(**item) for item in json.loads(json_str)]
-                except json.JSONDecodeError as e:
-                    print(f"JSONDecodeError (extracted): {e}, Content: {json_str}")
-                    return []
-                except Exception as e:
-                    print(f"Error parsing CommunityEvent (extracted): {e}, Content: {json_str}")
-                    return []
-            else:
-                print(f"Could not find JSON in response: {content}")
-                return []
-        except Exception as e:
-            print(f"Error parsing CommunityEvent (initial): {e}, Content: {content}")
-            return []
+
+class CommunityEventSearchAgent(StructuredSearchAgent):
+    """Agent to find and summarize community events using Gemini."""
+    item_cls = CommunityEvent
+
+    @staticmethod
+    def prompt(context: str) -> str:
+        return f"""Based on the following community event listings:\n\n{context}\n\nIdentify and summarize any specific community events mentioned. {schema_instructions(CommunityEvent)}"""
 
 
 # --- DataLoader and VectorDatabase Classes ---
+def record_key(item: Any) -> str:
+    """Stable identity of a job/event record: its link or url, else a hash of its content."""
+    if isinstance(item, dict):
+        for key in ("link", "url"):
+            if item.get(key):
+                return str(item[key])
+    return content_hash(item)
+
+def content_hash(item: Any) -> str:
+    """Hash of a record's full content, used to detect changed records between syncs."""
+    return hashlib.sha256(json.dumps(item, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def _posted_day(value: Any) -> Optional[int]:
+    try:
+        return days_since_epoch(datetime.strptime(str(value)[:10], "%Y-%m-%d").date())
+    except ValueError:
+        return None
+
 class DataLoader:
     """Component to load documents from various sources."""
-    def __init__(self, job_files: List[str], community_files: List[str]):
+    JOB_FIELDS = ("title", "company", "location", "description")
+
+    def __init__(self, job_files: List[str], community_files: List[str], mode: str = INGESTION_MODE,
+                 dedup: bool = INGESTION_DEDUP):
         self.job_files = job_files
         self.community_files = community_files
+        self.mode = mode
+        self.dedup = dedup
+        self.preprocess_reports: Dict[str, PreprocessReport] = {}
+        self.ingestion_stats: Dict[str, IngestionStats] = {}
 
-    def load_documents_from_json(self, file_paths: List[str]) -> List[Document]:
+    def _record_document(self, item: Any, source: str) -> Document:
+        metadata = {"source": source, "record_id": record_key(item)}
+        if self.mode == "structured" and isinstance(item, dict) and all(field in item for field in self.JOB_FIELDS):
+            return self._structured_job_document(item, metadata)
+        metadata["content_hash"] = content_hash(item)
+        return Document(page_content=json.dumps(item), metadata=metadata)
+
+    @staticmethod
+    def _structured_job_document(item: Dict[str, Any], metadata: Dict[str, Any]) -> Document:
+        """A job posting as readable text plus typed metadata (Chroma metadata values can't be None)."""
+        title, company, location = (str(item.get(field) or "").strip() for field in ("title", "company", "location"))
+        metadata.update({
+            # The mode is part of the hash so switching modes re-embeds the records
+            "content_hash": content_hash(["structured", item]),
+            "title": title,
+            "company": company,
+            "location": location,
+            "date": str(item.get("date") or ""),
+            "link": str(item.get("link") or ""),
+        })
+        posted_day = _posted_day(item.get("date"))
+        if posted_day is not None:
+            metadata["posted_day"] = posted_day
+        description = " ".join(str(item.get("description") or "").split())
+        page_content = f"{title} at {company} ({location})\n{description}"
+        return Document(page_content=page_content, metadata=metadata)
+
+    def _scraped_page_documents(self, items: List[Dict[str, Any]], source: str) -> List[Document]:
+        """Boilerplate-stripped scraped pages, with the extracted event fields as metadata."""
+        pages, report = preprocess_scraped_pages(items)
+        self.preprocess_reports[source] = report
+        print(f"Preprocessed {source}: {report}")
         documents = []
-        for json_file in file_paths:
-            if os.path.exists(json_file):
-                try:
-                    with open(json_file, "r", encoding="utf-8") as f:
-                        json_data = json.load(f)
-                    if isinstance(json_data, list):
-                        for item in json_data:
-                            documents.append(Document(page_content=json.dumps(item), metadata={"source": json_file}))
-                    elif isinstance(json_data, dict):
-                        documents.append(Document(page_content=json.dumps(json_data), metadata={"source": json_file}))
-                    print(f"Loaded {len(json_data) if isinstance(json_data, list) else 1} items from {json_file}")
-                except Exception as e:
-                    print(f"Error loading JSON {json_file}: {e}")
+        for item, page in pages:
+            documents.append(Document(page_content=page.to_text(), metadata={
+                "source": source,
+                "record_id": record_key(item),
+                "content_hash": content_hash(["scraped", PREPROCESSOR_VERSION, item]),
+                "title": page.title,
+                "date": page.date,
+                "location": page.venue,
+                "link": page.registration_link or page.url,
+            }))
         return documents
 
+    def iter_documents(self, file_paths: List[str]) -> Iterator[Document]:
+        """Streams one Document per record from JSON array/JSONL files, skipping duplicate job postings.
+
+        Duplicates are detected across all of `file_paths`; the first copy seen is kept.
+        A file that fails partway (e.g. a malformed record) doesn't stop the others, but
+        once every file has been read IncompleteLoadError is raised, so that consumers
+        such as VectorDatabase.sync_documents know records may be missing.
+        """
+        deduplicator = Deduplicator(threshold=INGESTION_NEAR_DUPLICATE_THRESHOLD) if self.dedup else None
+        failed: Dict[str, str] = {}
+        for json_file in file_paths:
+            if not os.path.exists(json_file):
+                continue
+            stats = self.ingestion_stats[json_file] = IngestionStats()
+            started = time.perf_counter()
+            try:
+                records = iter_json_records(json_file)
+                first = next(records, None)
+                if first is not None and self.mode == "structured" and is_scraped_page(first):
+                    # Boilerplate detection compares pages with each other, so scraped files are read whole (they're small)
+                    items = [first, *records]
+                    stats.records = len(items)
+                    if all(map(is_scraped_page, items)):
+                        documents = self._scraped_page_documents(items, json_file)
+                    else:
+                        documents = [self._record_document(item, json_file) for item in items]
+                    stats.documents = len(documents)
+                    yield from documents
+                elif first is not None:
+                    for record in itertools.chain([first], records):
+                        stats.records += 1
+                        is_job = isinstance(record, dict) and all(field in record for field in self.JOB_FIELDS)
+                        duplicate = deduplicator.check(record) if deduplicator and is_job else None
+                        if duplicate == "exact":
+                            stats.exact_duplicates += 1
+                        elif duplicate == "near":
+                            stats.near_duplicates += 1
+                        else:
+                            stats.documents += 1
+                            yield self._record_document(record, json_file)
+            except Exception as e:
+                print(f"Error loading JSON {json_file}: {e}")
+                stats.error = failed[json_file] = str(e)
+            stats.finish(started)
+            print(f"Loaded {json_file}: {stats}")
+        if failed:
+            raise IncompleteLoadError(failed)
+
+    @staticmethod
+    def collect(documents: Iterable[Document]) -> List[Document]:
+        """The documents of a stream as a list, keeping those read before an IncompleteLoadError."""
+        loaded = []
+        try:
+            for document in documents:
+                loaded.append(document)
+        except IncompleteLoadError as e:
+            print(f"{e}; keeping the {len(loaded)} documents read")
+        return loaded
+
+    def load_documents_from_json(self, file_paths: List[str]) -> List[Document]:
+        return self.collect(self.iter_documents(file_paths))
+
     def load_job_documents(self) -> List[Document]:
         return self.load_documents_from_json(self.job_files)
 
     def load_community_documents(self) -> List[Document]:
         return self.load_documents_from_json(self.community_files)
 
+@dataclass
+class SyncReport:
+    """What an incremental sync changed, counted in records (chunks in brackets)."""
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    skipped: int = 0
+    chunks_added: int = 0
+    chunks_removed: int = 0
+    seconds: float = 0.0
+    index_version: str = ""  # Fingerprint of the synced records (see VectorDatabase.index_version)
+    complete: bool = True  # False when the source failed partway; nothing is removed then
+
+    def __str__(self) -> str:
+        return (f"added={self.added} updated={self.updated} removed={self.removed} skipped={self.skipped} "
+                f"(chunks +{self.chunks_added}/-{self.chunks_removed}) in {self.seconds:.2f}s"
+                + ("" if self.complete else " (incomplete read: no records removed)"))
+
 class VectorDatabase:
     """Component to manage the vector database."""
-    def __init__(self, embeddings, persist_directory="db/chroma_db_gemini"):
+    WRITE_BATCH_SIZE = 1000  # Stays well under Chroma's max batch size
+    READ_PAGE_SIZE = 5000
+    SYNC_BATCH_RECORDS = 500  # Records compared, split and embedded per step of a streamed sync
+
+    def __init__(self, embeddings, persist_directory="db/chroma_db_gemini", backend: str = VECTOR_BACKEND,
+                 snapshot: Optional[str] = None):
         self.embeddings = embeddings
-        self.persist_directory = persist_directory
+        self.backend = backend
+        self.snapshot = snapshot
+        if snapshot:
+            self.persist_directory = self.snapshot_manager(persist_directory, backend).path(snapshot)
+        else:
+            self.persist_directory = self._store_directory(persist_directory, backend)
         # os.makedirs(self.persist_directory, exist_ok=True)
         self.db = self._load_or_create_db()
+        self.last_sync: Optional[SyncReport] = None
+
+    @staticmethod
+    def _store_directory(persist_directory: str, backend: str) -> str:
+        # The two backends use different on-disk formats, so they never share a directory
+        return persist_directory if backend == "chroma" else f"{persist_directory}_{backend}"
+
+    @classmethod
+    def snapshot_manager(cls, persist_directory: str, backend: str = VECTOR_BACKEND) -> SnapshotManager:
+        return SnapshotManager(cls._store_directory(persist_directory, backend) + "_snapshots")
+
+    @classmethod
+    def publish_snapshot(cls, embeddings, persist_directory: str, documents: Iterable[Document],
+                         backend: str = VECTOR_BACKEND, keep: int = VECTOR_DB_KEEP_SNAPSHOTS) -> Tuple[str, SyncReport]:
+        """Builds a new immutable snapshot from `documents` and publishes it; returns its name and the sync report.
+
+        The build starts from a copy of the current snapshot, so only new or changed records are embedded.
+        """
+        manager = cls.snapshot_manager(persist_directory, backend)
+        os.makedirs(manager.root, exist_ok=True)
+        build = manager.begin(copy_from=manager.current())
+        builder = cls(embeddings, persist_directory, backend=backend, snapshot=build)
+        report = builder.sync_documents(documents)
+        builder.db = None
+        name = manager.publish(build, report.index_version)
+        removed = manager.prune(keep)
+        print(f"Published snapshot {name} of {persist_directory}: {report}"
+              + (f" (pruned {', '.join(removed)})" if removed else ""))
+        return name, report
+
+    def _new_store(self):
+        if self.backend == "numpy":
+            return lazy_import("NumpyVectorStore")(persist_directory=self.persist_directory, embedding_function=self.embeddings)
+        return lazy_import("Chroma")(embedding_function=self.embeddings, persist_directory=self.persist_directory)
 
     def _load_or_create_db(self):
+        if self.backend == "numpy":
+            db = self._new_store()
+            print(f"Vector database loaded successfully with {db.count()} documents")
+            return db
         if os.path.exists(self.persist_directory) and os.path.isdir(self.persist_directory) and len(os.listdir(self.persist_directory)) > 0:
             try:
                 print("Loading existing vector database...")
-                db = Chroma(
+                db = lazy_import("Chroma")(
                     persist_directory=self.persist_directory,
                     embedding_function=self.embeddings
                 )
@@ -181,141 +567,827 @@ class VectorDatabase:
                 print("Will create a new vector database")
                 return None
         else:
-            return Chroma(
+            return lazy_import("Chroma")(
                 embedding_function=self.embeddings,
                 persist_directory=self.persist_directory
             )
 
+    def count(self) -> int:
+        if self.db is None:
+            return 0
+        return self.db.count() if self.backend == "numpy" else self.db._collection.count()
+
+    @staticmethod
+    def index_version(documents: List[Document]) -> str:
+        """Fingerprint of the records an index was built from; changes whenever any record does."""
+        return VectorDatabase._fingerprint(document.metadata.get("content_hash", "") for document in documents)
+
+    @staticmethod
+    def _fingerprint(record_hashes: Iterable[str]) -> str:
+        digest = hashlib.sha256()
+        for record_hash in sorted(record_hashes):
+            digest.update(record_hash.encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    @staticmethod
+    def _split_documents(documents: List[Document]) -> Tuple[List[Document], List[str]]:
+        """Splits records into chunks with deterministic ids derived from record id and content hash."""
+        text_splitter = lazy_import("RecursiveCharacterTextSplitter")(chunk_size=1000, chunk_overlap=100, add_start_index=True)
+        chunks, ids = [], []
+        for document in documents:
+            record_id = document.metadata.get("record_id") or content_hash(document.page_content)
+            id_prefix = hashlib.sha1(record_id.encode("utf-8")).hexdigest()[:16]
+            hash_prefix = (document.metadata.get("content_hash") or "")[:12]
+            for i, chunk in enumerate(text_splitter.split_documents([document])):
+                chunks.append(chunk)
+                ids.append(f"{id_prefix}-{hash_prefix}-{i}")
+        return chunks, ids
+
+    def _write_session(self):
+        """NumpyVectorStore.write_session when the store has one; Chroma persists each write itself."""
+        write_session = getattr(self.db, "write_session", None)
+        return write_session() if write_session else contextlib.nullcontext()
+
+    def _add_chunks(self, chunks: List[Document], ids: List[str]):
+        for start in range(0, len(chunks), self.WRITE_BATCH_SIZE):
+            end = start + self.WRITE_BATCH_SIZE
+            self.db.add_documents(chunks[start:end], ids=ids[start:end])
+
+    def _indexed_records(self) -> Dict[Optional[str], Tuple[Optional[str], List[str]]]:
+        """Maps record_id -> (content_hash, chunk ids) for everything in the collection.
+
+        Chunks written before records carried a record_id are grouped under None.
+        """
+        records: Dict[Optional[str], Tuple[Optional[str], List[str]]] = {}
+        offset = 0
+        while True:
+            page = self.db.get(include=["metadatas"], limit=self.READ_PAGE_SIZE, offset=offset)
+            ids = page.get("ids") or []
+            for chunk_id, metadata in zip(ids, page.get("metadatas") or []):
+                metadata = metadata or {}
+                record_id = metadata.get("record_id")
+                _, chunk_ids = records.setdefault(record_id, (metadata.get("content_hash"), []))
+                chunk_ids.append(chunk_id)
+            if len(ids) < self.READ_PAGE_SIZE:
+                return records
+            offset += len(ids)
+
     def create_db_from_documents(self, documents: List[Document]):
         if not documents:
             raise ValueError("No documents provided to create the vector database")
         print("Creating new vector database...")
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-        split_documents = text_splitter.split_documents(documents)
-        self.db = Chroma.from_documents(
-            split_documents,
-            self.embeddings,
-            persist_directory=self.persist_directory
-        )
+        split_documents, ids = self._split_documents(documents)
+        if self.backend == "numpy":
+            self.db = self._new_store()
+            with self._write_session():
+                self._add_chunks(split_documents, ids)
+        else:
+            self.db = lazy_import("Chroma").from_documents(
+                split_documents,
+                self.embeddings,
+                ids=ids,
+                persist_directory=self.persist_directory
+            )
         # self.db.persist() <--- REMOVE THIS LINE
         print("New vector database created successfully")
 
+    def _delete_chunks(self, chunk_ids: List[str]):
+        for batch_start in range(0, len(chunk_ids), self.WRITE_BATCH_SIZE):
+            self.db.delete(ids=chunk_ids[batch_start:batch_start + self.WRITE_BATCH_SIZE])
+
+    def _sync_batch(self, batch: List[Document], indexed: Dict[Optional[str], Tuple[Optional[str], List[str]]],
+                    report: SyncReport):
+        to_embed, stale_ids = [], []
+        for document in batch:
+            current = indexed.get(document.metadata["record_id"])
+            if current is None:
+                report.added += 1
+                to_embed.append(document)
+            elif current[0] != document.metadata["content_hash"]:
+                report.updated += 1
+                stale_ids.extend(current[1])
+                to_embed.append(document)
+            else:
+                report.skipped += 1
+        self._delete_chunks(stale_ids)
+        report.chunks_removed += len(stale_ids)
+        if to_embed:
+            chunks, ids = self._split_documents(to_embed)
+            self._add_chunks(chunks, ids)
+            report.chunks_added += len(chunks)
+
+    def sync_documents(self, documents: Iterable[Document]) -> SyncReport:
+        """Brings the collection in line with `documents`, embedding only new or changed records.
+
+        Records are matched on the record_id/content_hash metadata set by DataLoader;
+        records no longer present are deleted. `documents` may be a generator: it is
+        consumed SYNC_BATCH_RECORDS at a time, and only the ids and hashes of the
+        records seen so far are kept. The first of several records with the same id wins.
+        If the generator raises IncompleteLoadError, the records read are still synced
+        but none are deleted, since the unread ones can't be told apart from removed ones.
+        """
+        start = time.perf_counter()
+        report = SyncReport()
+        if self.db is None:
+            self.db = self._new_store()
+
+        with self._write_session():  # On the numpy backend: one saved generation, one writer at a time
+            indexed = self._indexed_records()
+            seen: Dict[str, str] = {}  # record_id -> content_hash
+            batch: List[Document] = []
+            try:
+                for document in documents:
+                    record_id = document.metadata["record_id"]
+                    if record_id in seen:
+                        continue
+                    seen[record_id] = document.metadata["content_hash"]
+                    batch.append(document)
+                    if len(batch) >= self.SYNC_BATCH_RECORDS:
+                        self._sync_batch(batch, indexed, report)
+                        batch = []
+            except IncompleteLoadError as e:
+                print(f"{e}; skipping the removal of unseen records")
+                report.complete = False
+            if batch:
+                self._sync_batch(batch, indexed, report)
+
+            if report.complete:
+                stale_ids = []
+                for record_id, (_, chunk_ids) in indexed.items():
+                    if record_id not in seen:
+                        if record_id is not None:
+                            report.removed += 1
+                        stale_ids.extend(chunk_ids)
+                self._delete_chunks(stale_ids)
+                report.chunks_removed += len(stale_ids)
+                report.index_version = self._fingerprint(seen.values())
+            else:
+                # The unseen records stay indexed, so they're part of what the collection now holds
+                kept = (content_hash for record_id, (content_hash, _) in indexed.items()
+                        if record_id is not None and record_id not in seen and content_hash)
+                report.index_version = self._fingerprint(itertools.chain(seen.values(), kept))
+        report.seconds = time.perf_counter() - start
+        self.last_sync = report
+        return report
+
     def get_retriever(self, search_kwargs: Dict[str, Any] = None):
         if self.db:
             return self.db.as_retriever()
         return None
 
-# --- Chatbot Class (Stateless History Managed by Flask Session) ---
+def build_embeddings(google_api_key: str, db_root: str = VECTOR_DB_ROOT):
+    """Gemini embeddings behind the persistent embedding cache (when enabled)."""
+    embeddings = lazy_import("GoogleGenerativeAIEmbeddings")(model=EMBEDDING_MODEL, google_api_key=google_api_key)
+    if EMBEDDING_CACHE_MAX_ENTRIES > 0:
+        os.makedirs(db_root, exist_ok=True)
+        embeddings = CachedEmbeddings(
+            embeddings,
+            model_name=EMBEDDING_MODEL,
+            cache_path=os.path.join(db_root, "embedding_cache.sqlite3"),
+            max_entries=EMBEDDING_CACHE_MAX_ENTRIES
+        )
+    return embeddings
+
+# --- Chatbot Class (Stateless; History Managed by the Conversation Store) ---
 class Chatbot:
     """
-    A conversational chatbot where chat history is managed by Flask session.
-    Loads resources once per instance.
+    A conversational chatbot; callers pass in the chat history kept by the conversation store.
+    Loads resources once per instance; one instance is shared by every request
+    in a worker process (see get_chatbot_instance), so it must stay read-only
+    after construction, apart from the usage counters (card_stats, speculation_stats),
+    which are only updated under stats_lock.
     """
-    def __init__(self, google_api_key: str, job_files: List[str], community_files: List[str]):
+    def __init__(self, google_api_key: str, job_files: List[str], community_files: List[str], db_root: str = VECTOR_DB_ROOT,
+                 response_cache: Optional[SemanticResponseCache] = None, gateway: Optional[LLMGateway] = None,
+                 speculation: str = SPECULATIVE_RETRIEVAL):
         self.google_api_key = google_api_key
-        self.llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", google_api_key=self.google_api_key)
-        self.embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_api_key=self.google_api_key)
-        self.job_db = self._setup_vector_db(job_files, "db/job_chatbot_gemini")
-        self.community_db = self._setup_vector_db(community_files, "db/community_chatbot_gemini")
+        self.speculation = speculation
+        self.stats_lock = threading.Lock()
+        self.speculation_stats = {"runs": 0, "saved_seconds": 0.0, "wasted_retrievals": 0, "wasted_seconds": 0.0}
+        cards_path = RECORD_CARDS_PATH or os.path.join(db_root, "record_cards.sqlite3")
+        self.record_cards = self._load_record_cards(cards_path) if RECORD_CARDS else {}
+        self.card_stats = {"cards": len(self.record_cards), "queries": 0, "records_carded": 0, "records_raw": 0,
+                           "raw_tokens": 0, "card_tokens": 0}
+        # Concurrency limit, priorities and coalescing of identical prompts (see llm_gateway.py)
+        self.llm = (gateway or llm_gateway).wrap(
+            lazy_import("ChatGoogleGenerativeAI")(model="gemini-2.0-flash", google_api_key=self.google_api_key),
+            name="gemini-2.0-flash"
+        )
+        # Same model constrained to emit a JSON array of the agent's item schema (Gemini response_schema),
+        # one per schema, for the agents that answer with JobOpportunity/CommunityEvent arrays
+        self.json_llms = {
+            item_cls: (gateway or llm_gateway).wrap(
+                lazy_import("ChatGoogleGenerativeAI")(model="gemini-2.0-flash", google_api_key=self.google_api_key,
+                                       response_mime_type="application/json",
+                                       response_schema=response_schema(item_cls)),
+                name=f"gemini-2.0-flash-json-{item_cls.__name__}"
+            ) if LLM_JSON_MODE else self.llm
+            for item_cls in (JobOpportunity, CommunityEvent)
+        }
+        self.embeddings = build_embeddings(self.google_api_key, db_root)
+        self.sync_reports: Dict[str, SyncReport] = {}
+        self.ingestion_stats: Dict[str, IngestionStats] = {}
+        self.index_versions: Dict[str, str] = {}
+        self.snapshots: Dict[str, Tuple[SnapshotManager, str]] = {}  # persist_directory -> (manager, snapshot served)
+        self.response_cache = response_cache
+        self.context_packer = ContextPacker(token_budget=CONTEXT_TOKEN_BUDGET, history_token_budget=HISTORY_TOKEN_BUDGET)
+        self.intent_classifier = IntentClassifierAgent(model=self.llm, local_classifier=self._load_intent_classifier())
+        self.job_db = self._setup_vector_db(job_files, os.path.join(db_root, VECTOR_STORES["jobs"][0]))
+        self.community_db = self._setup_vector_db(community_files, os.path.join(db_root, VECTOR_STORES["events"][0]))
+        self.hybrid_retrievers: Dict[Chroma, HybridRetriever] = {}
+        if RETRIEVAL_MODE == "hybrid":
+            for db in (self.job_db, self.community_db):
+                if db is not None:
+                    self.hybrid_retrievers[db] = HybridRetriever(db, k=RETRIEVAL_TOP_K)
+        self.skills = self._load_skills()
+        self.job_matcher = self._build_job_matcher()
+        # New cards change the context an answer was generated from, so they invalidate cached answers too
+        cards_version = f"+cards{cards_fingerprint(self.record_cards)}" if self.record_cards else ""
+        self.intent_index_versions = {
+            Intent.JOB_OPPORTUNITIES: self.index_versions.get(os.path.join(db_root, VECTOR_STORES["jobs"][0]), "") + cards_version,
+            Intent.COMMUNITY_EVENTS: self.index_versions.get(os.path.join(db_root, VECTOR_STORES["events"][0]), "") + cards_version,
+        }
+        self.store_versions = {store: self.index_versions.get(os.path.join(db_root, directory), "")
+                               for store, (directory, _) in VECTOR_STORES.items()}
+
+    def snapshot_changed(self) -> bool:
+        """True once a different snapshot has been published (or rolled back to) for any store this instance serves."""
+        return any(manager.current() not in (None, name) for manager, name in self.snapshots.values())
+
+    @staticmethod
+    def _load_skills() -> SkillExtractor:
+        try:
+            return SkillExtractor.from_file(SKILLS_PATH)
+        except (OSError, ValueError) as e:
+            print(f"Skill vocabulary unavailable, resume matches will rank on similarity alone: {e}")
+            return SkillExtractor([])
+
+    def _build_job_matcher(self) -> Optional[JobMatcher]:
+        """Pooled per-job vectors of the job store, kept in memory for /api/resume_match."""
+        if self.job_db is None:
+            return None
+        start = time.perf_counter()
+        with metrics.span("job_matcher_build"):
+            matcher = JobMatcher(self.job_db, self.skills, skill_weight=RESUME_MATCH_SKILL_WEIGHT)
+        print(f"Job matcher ready: {len(matcher)} jobs from {matcher.chunks} chunks "
+              f"in {time.perf_counter() - start:.2f}s")
+        return matcher
+
+    @staticmethod
+    def _load_intent_classifier() -> Optional[LocalIntentClassifier]:
+        try:
+            return LocalIntentClassifier.from_jsonl(INTENT_EXAMPLES_PATH)
+        except (OSError, ValueError) as e:
+            print(f"Local intent classifier unavailable, every message will be classified by Gemini: {e}")
+            return None
+
+    @staticmethod
+    def _load_record_cards(path: str) -> Dict[str, Tuple[str, RecordCard]]:
+        """Cards written by `python -m enrichment`; records without one are sent to the model raw."""
+        if not os.path.exists(path):
+            return {}
+        try:
+            cards = CardStore(path).load()
+        except Exception as e:
+            print(f"Record cards unavailable, raw chunks will be used: {e}")
+            return {}
+        print(f"Loaded {len(cards)} record cards from {path}")
+        return cards
+
+    def _use_record_cards(self, results: List[Document], store: str) -> List[Document]:
+        results, usage = apply_cards(results, self.record_cards)
+        with self.stats_lock:
+            stats = self.card_stats
+            stats["queries"] += 1
+            stats["records_carded"] += usage.records_carded
+            stats["records_raw"] += usage.records_raw
+            stats["raw_tokens"] += usage.raw_tokens
+            stats["card_tokens"] += usage.card_tokens
+        metrics.observe_size("card_tokens_saved", usage.tokens_saved, store=store)
+        return results
 
     def _setup_vector_db(self, file_paths: List[str], persist_directory: str) -> Optional[Chroma]:
+        if VECTOR_DB_SYNC_MODE == "snapshot":
+            return self._open_snapshot(file_paths, persist_directory)
         data_loader = DataLoader(job_files=[], community_files=[])  # Initialize with empty lists
-        documents = data_loader.load_documents_from_json(file_paths)
-        if not documents:
+        # Records stream from the files through deduplication into the sync, a batch at a time
+        documents = data_loader.iter_documents(file_paths)
+        try:
+            first = next(documents, None)
+        except IncompleteLoadError as e:
+            print(e)
+            first = None
+        if first is None:
+            self.ingestion_stats.update(data_loader.ingestion_stats)
             print(f"No documents loaded for {persist_directory}")
             return None
+        documents = itertools.chain([first], documents)
 
         vector_db = VectorDatabase(self.embeddings, persist_directory=persist_directory)
-        if vector_db.db is None or vector_db.db._collection.count() == 0:
-            vector_db.create_db_from_documents(documents)
+        if VECTOR_DB_SYNC_MODE == "incremental":
+            report = vector_db.sync_documents(documents)
+            self.index_versions[persist_directory] = report.index_version
+            self.sync_reports[persist_directory] = report
+            print(f"Vector database sync for {persist_directory}: {report}")
+        else:
+            documents = DataLoader.collect(documents)
+            self.index_versions[persist_directory] = VectorDatabase.index_version(documents)
+            if vector_db.db is None or vector_db.count() == 0:
+                vector_db.create_db_from_documents(documents)
+        self.ingestion_stats.update(data_loader.ingestion_stats)
+        return vector_db.db
+
+    def _open_snapshot(self, file_paths: List[str], persist_directory: str) -> Optional[Chroma]:
+        """Opens the published snapshot, building and publishing the first one if there is none yet."""
+        manager = VectorDatabase.snapshot_manager(persist_directory)
+        name = manager.current()
+        if name is None:
+            with manager.build_lock():
+                name = manager.current()  # Another worker may have published while we waited
+                if name is None:
+                    data_loader = DataLoader(job_files=[], community_files=[])
+                    documents = data_loader.iter_documents(file_paths)
+                    try:
+                        first = next(documents, None)
+                    except IncompleteLoadError as e:
+                        print(e)
+                        first = None
+                    self.ingestion_stats.update(data_loader.ingestion_stats)
+                    if first is None:
+                        print(f"No documents loaded for {persist_directory}")
+                        return None
+                    name, report = VectorDatabase.publish_snapshot(
+                        self.embeddings, persist_directory, itertools.chain([first], documents))
+                    self.sync_reports[persist_directory] = report
+                    self.ingestion_stats.update(data_loader.ingestion_stats)
+        vector_db = VectorDatabase(self.embeddings, persist_directory=persist_directory, snapshot=name)
+        self.index_versions[persist_directory] = name
+        self.snapshots[persist_directory] = (manager, name)
+        print(f"Serving snapshot {name} of {persist_directory}")
         return vector_db.db
 
-    async def _retrieve_relevant_documents(self, db: Chroma, query: str) -> str:
+    async def _retrieve_relevant_documents(self, db: Chroma, query: str, record_filter: Optional[RecordFilter] = None) -> str:
         if db:
-            retriever = db.as_retriever()
-            results = await retriever.aget_relevant_documents(query)
-            return "\n".join([doc.page_content for doc in results])
+            store = "jobs" if db is self.job_db else "events"
+            with metrics.span("retrieval", store=store):
+                hybrid = self.hybrid_retrievers.get(db)
+                if hybrid is not None:
+                    results = await hybrid.aretrieve(query, record_filter)
+                else:
+                    retriever = db.as_retriever()
+                    results = await retriever.aget_relevant_documents(query)
+            retrieved = _retrieved_documents.get()
+            if retrieved is not None:
+                retrieved[store] = results
+            return self._pack_context(results, store)
         return ""
 
+    def _pack_context(self, results: List[Document], store: str) -> str:
+        if self.record_cards:
+            results = self._use_record_cards(results, store)
+        with metrics.span("context_packing", store=store):
+            packed = self.context_packer.pack(results)
+        metrics.observe_size("context_chars", len(packed.text), store=store)
+        print(f"Context packed: {packed.chunks_in} chunks -> {packed.records_used} records, "
+              f"{packed.tokens} tokens (saved {packed.tokens_saved})")
+        return packed.text
+
+    def _retrieve_batch(self, db: Chroma, queries: List[str], vectors: List[List[float]],
+                        record_filter: Optional[RecordFilter] = None) -> List[str]:
+        """Packed context for each query, from one multi-query search of the store with precomputed embeddings."""
+        if db is None or not queries:
+            return ["" for _ in queries]
+        store = "jobs" if db is self.job_db else "events"
+        with metrics.span("retrieval_batch", store=store):
+            hybrid = self.hybrid_retrievers.get(db)
+            if hybrid is not None:
+                results = hybrid.retrieve_batch(queries, vectors, record_filter)
+            else:
+                results = search_by_vectors(db, vectors, k=4)  # As db.as_retriever() in _retrieve_relevant_documents
+        return [self._pack_context(hits, store) for hits in results]
+
     async def handle_jobs_query(self, query: str) -> List[JobOpportunity]:
         context = await self._retrieve_relevant_documents(self.job_db, query)
-        job_search_agent = JobSearchAgent(model=self.llm)
+        job_search_agent = JobSearchAgent(model=self.json_llms[JobOpportunity])
         return await job_search_agent.run(query, context)
 
     async def handle_community_events_query(self, query: str) -> List[CommunityEvent]:
         context = await self._retrieve_relevant_documents(self.community_db, query)
-        community_event_search_agent = CommunityEventSearchAgent(model=self.llm)
+        community_event_search_agent = CommunityEventSearchAgent(model=self.json_llms[CommunityEvent])
         return await community_event_search_agent.run(query, context)
 
     async def handle_mentorship_query(self, query: str) -> str:
         response = await self.llm.ainvoke(f"""You are a helpful mentor for women. Provide a specific, concise and actionable answer in 600 characters to the following query: {query}""")
         return response.content.strip()
 
-    async def process_message(self, user_input: str, chat_history: List[str]) -> Tuple[str, List[str]]:
-        """Processes the user message and returns the bot's response and updated history."""
+    @staticmethod
+    def _format_jobs(jobs: List[JobOpportunity]) -> Tuple[str, bool]:
+        if jobs:
+            return "Here are some job opportunities I found:\n" + "\n".join([
+                f"- {job.title} at {job.organization}: {job.details or 'No details provided'} "
+                f"({job.url or 'No URL provided'}, Location: {job.location or 'Not specified'})"
+                for job in jobs
+            ]), True
+        return "I couldn't find any matching job opportunities at the moment.", False
+
+    @staticmethod
+    def _format_events(events: List[CommunityEvent]) -> Tuple[str, bool]:
+        if events:
+            return "Here are some upcoming community events:\n" + "\n".join([
+                f"- {event.title} on {event.date} at {event.location or 'Not specified'}: "
+                f"{event.description or 'No description provided'} ({event.url or 'No URL provided'})"
+                for event in events
+            ]), True
+        return "No community events found at this time.", False
+
+    async def match_resume(self, resume_text: str, top_n: int = RESUME_MATCH_TOP_N,
+                           record_filter: Optional[RecordFilter] = None) -> Tuple[List[JobMatch], List[str]]:
+        """Best-matching jobs for a resume and the skills found in it, from embeddings alone (no Gemini call).
+
+        The resume is split like the indexed records, its chunks embedded in one request and mean-pooled.
+        """
+        if self.job_matcher is None:
+            return [], []
+        text_splitter = lazy_import("RecursiveCharacterTextSplitter")(chunk_size=1000, chunk_overlap=100)
+        chunks = [chunk for chunk in text_splitter.split_text(resume_text) if chunk.strip()]
+        with metrics.span("resume_embedding"):
+            vectors = await asyncio.to_thread(embed_queries, self.embeddings, chunks)
+        resume_skills = self.skills.extract(resume_text)
+        with metrics.span("resume_match"):
+            matches = self.job_matcher.match(vectors, resume_skills, k=top_n, record_filter=record_filter)
+        return matches, sorted(resume_skills)
+
+    @staticmethod
+    def _degraded_response(intent: Optional[Intent], documents: List[Document]) -> str:
+        """The retrieved records as a plain list, for when the message's budget ran out before the model answered."""
+        lines, seen = [], set()
+        for document in documents:
+            metadata = document.metadata
+            key = metadata.get("record_id") or document.page_content
+            if key in seen:
+                continue
+            seen.add(key)
+            title = metadata.get("title") or document.page_content.strip().split("\n", 1)[0][:120]
+            if metadata.get("company"):
+                title += f" at {metadata['company']}"
+            if intent is Intent.COMMUNITY_EVENTS and metadata.get("date"):
+                title += f" on {metadata['date']}"
+            if metadata.get("location"):
+                title += f" ({metadata['location']})"
+            lines.append(f"- {title}: {metadata.get('link') or 'No URL provided'}")
+        if not lines:
+            return "Sorry, this is taking longer than usual. Please try again in a moment."
+        heading = "upcoming community events" if intent is Intent.COMMUNITY_EVENTS else "job opportunities"
+        return f"I'm answering slower than usual, so here are the {heading} that best match your message, unsummarized:\n" + "\n".join(lines)
+
+    @staticmethod
+    def _mentorship_prompt(context: str, user_input: str) -> str:
+        return (f"Previous Chat History:\n{context}\nYou are a helpful mentor for women. "
+                f"Provide a specific, concise, and actionable answer to the following query: {user_input}")
+
+    async def _answer_jobs(self, user_input: str, context: str, record_filter: Optional[RecordFilter] = None,
+                           relevant_context: Optional[str] = None, priority: Priority = Priority.CHAT) -> Tuple[str, bool]:
+        if relevant_context is None:
+            relevant_context = await self._retrieve_relevant_documents(self.job_db, user_input, record_filter)
+        job_search_agent = JobSearchAgent(model=self.json_llms[JobOpportunity].with_priority(priority))
+        jobs = await job_search_agent.run(user_input, f"{relevant_context}\nPrevious Chat History:\n{context}")
+        return self._format_jobs(jobs)
+
+    async def _answer_events(self, user_input: str, context: str, record_filter: Optional[RecordFilter] = None,
+                             relevant_context: Optional[str] = None, priority: Priority = Priority.CHAT) -> Tuple[str, bool]:
+        if relevant_context is None:
+            relevant_context = await self._retrieve_relevant_documents(self.community_db, user_input, record_filter)
+        event_agent = CommunityEventSearchAgent(model=self.json_llms[CommunityEvent].with_priority(priority))
+        events = await event_agent.run(user_input, f"{relevant_context}\nPrevious Chat History:\n{context}")
+        return self._format_events(events)
+
+    async def _response_cache_key(self, intent: Intent, user_input: str,
+                                  query_embedding: Optional[List[float]] = None) -> Optional[Tuple[List[float], str]]:
+        """(query embedding, index version) for response cache lookups, or None when caching is off."""
+        if self.response_cache is None:
+            return None
+        if query_embedding is None:
+            query_embedding = await self.embeddings.aembed_query(user_input)
+        return query_embedding, self.intent_index_versions.get(intent, "")
+
+    @staticmethod
+    def _cache_namespace(intent: Intent, record_filter: Optional[RecordFilter]) -> str:
+        return f"{intent.value}|{record_filter}" if record_filter else intent.value
+
+    async def _answer_with_cache(self, intent: Intent, user_input: str, context: str,
+                                 record_filter: Optional[RecordFilter] = None, relevant_context: Optional[str] = None,
+                                 query_embedding: Optional[List[float]] = None, priority: Priority = Priority.CHAT) -> str:
+        """Answers a job/event query, reusing the answer to a semantically equivalent earlier query.
+
+        `relevant_context` is the store's retrieved context when it was already fetched speculatively,
+        `query_embedding` the query's embedding when it was already computed (batches).
+        """
+        answer = self._answer_jobs if intent is Intent.JOB_OPPORTUNITIES else self._answer_events
+        start = time.perf_counter()
+        cache_key = await self._response_cache_key(intent, user_input, query_embedding)
+        if cache_key is None:
+            response, _ = await answer(user_input, context, record_filter, relevant_context, priority)
+            return response
+
+        namespace = self._cache_namespace(intent, record_filter)
+        response = self.response_cache.lookup(namespace, *cache_key)
+        hit = response is not None
+        metrics.inc("response_cache_total", intent=intent.value, result="hit" if hit else "miss")
+        if not hit:
+            response, found = await answer(user_input, context, record_filter, relevant_context, priority)
+            if found:  # Empty results may be a transient parse failure; don't pin them
+                self.response_cache.store(namespace, *cache_key, response)
+        self.response_cache.record_response_time(hit, time.perf_counter() - start)
+        return response
+
+    async def _classify(self, user_input: str, record_filter: Optional[RecordFilter] = None) -> Tuple[Intent, Optional[str]]:
+        """Classifies the message, searching both stores at the same time in speculative mode.
+
+        Returns the intent and, if it was fetched speculatively, the retrieved context for
+        that intent's store. Retrievals the intent doesn't need are cancelled (a Chroma
+        query already running in its executor thread finishes and is discarded).
+        """
+        if self.speculation == "off":
+            return await self.intent_classifier.run(user_input), None
+        if self.speculation == "auto":
+            # A confident local decision takes about a millisecond: nothing to overlap with
+            intent = self.intent_classifier.decide_locally(user_input)
+            if intent is not None:
+                return intent, None
+            classify = self.intent_classifier.classify_with_llm(user_input)
+        else:
+            classify = self.intent_classifier.run(user_input)
+
+        stores = {Intent.JOB_OPPORTUNITIES: self.job_db, Intent.COMMUNITY_EVENTS: self.community_db}
+        durations: Dict[Intent, float] = {}
+
+        async def retrieve(store_intent: Intent, db: Chroma) -> str:
+            start = time.perf_counter()
+            try:
+                return await self._retrieve_relevant_documents(db, user_input, record_filter)
+            finally:
+                durations[store_intent] = time.perf_counter() - start
+
+        tasks = {store_intent: asyncio.ensure_future(retrieve(store_intent, db)) for store_intent, db in stores.items() if db}
+        classify_start = time.perf_counter()
+        try:
+            intent = await classify
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        classify_seconds = time.perf_counter() - classify_start
+
+        discarded = [task for store_intent, task in tasks.items() if store_intent is not intent]
+        for task in discarded:
+            task.cancel()
+        selected = tasks.get(intent)
+        try:
+            relevant_context = await selected if selected is not None else None
+        finally:
+            await asyncio.gather(*discarded, return_exceptions=True)
+
+        # Sequentially this would have taken classify + retrieve; overlapped it took the longer of the two
+        saved = min(classify_seconds, durations.get(intent, 0.0))
+        wasted = sum(seconds for store_intent, seconds in durations.items() if store_intent is not intent)
+        with self.stats_lock:
+            stats = self.speculation_stats
+            stats["runs"] += 1
+            stats["saved_seconds"] += saved
+            stats["wasted_retrievals"] += len(discarded)
+            stats["wasted_seconds"] += wasted
+        metrics.observe("speculation_saved_seconds", saved)
+        metrics.observe("speculation_wasted_seconds", wasted)
+        metrics.inc("speculative_retrievals_total", len(tasks) - len(discarded), result="used")
+        metrics.inc("speculative_retrievals_total", len(discarded), result="discarded")
+        return intent, relevant_context
+
+    async def process_message(self, user_input: str, chat_history: List[str],
+                              record_filter: Optional[RecordFilter] = None,
+                              budget_seconds: Optional[float] = None) -> Tuple[str, List[str]]:
+        """Processes the user message and returns the bot's response and updated history.
+
+        `record_filter` restricts job/event retrieval to records matching its metadata filters.
+        Gemini calls must finish within `budget_seconds` (default CHAT_DEADLINE_SECONDS); past it
+        the answer degrades to the retrieved records, listed without summarization.
+        """
         updated_history = list(chat_history)
         updated_history.append(f"User: {user_input}")
+        start = time.perf_counter()
+        intent = None
+        retrieved: Dict[str, List[Document]] = {}
+        token = _retrieved_documents.set(retrieved)
 
-        # Detect intent
-        intent_classifier = IntentClassifierAgent(model=self.llm)
-        intent = await intent_classifier.run(user_input)
-        print(f"Intent Detected: {intent}")
-
-        # Build context from recent chat history
-        context = "\n".join(updated_history[-5:]) if updated_history else ""
-
-        # Handle different types of user intent
-        if "job" in intent.lower():
-            relevant_context = await self._retrieve_relevant_documents(self.job_db, user_input)
-            job_search_agent = JobSearchAgent(model=self.llm)
-            jobs = await job_search_agent.run(user_input, f"{relevant_context}\nPrevious Chat History:\n{context}")
-
-            if jobs:
-                response = "Here are some job opportunities I found:\n" + "\n".join([
-                    f"- {job.title} at {job.organization}: {job.details or 'No details provided'} "
-                    f"({job.url or 'No URL provided'}, Location: {job.location or 'Not specified'})"
-                    for job in jobs
-                ])
-            else:
-                response = "I couldn't find any matching job opportunities at the moment."
-
-        elif "community" in intent.lower() or "event" in intent.lower():
-            relevant_context = await self._retrieve_relevant_documents(self.community_db, user_input)
-            event_agent = CommunityEventSearchAgent(model=self.llm)
-            events = await event_agent.run(user_input, f"{relevant_context}\nPrevious Chat History:\n{context}")
-
-            if events:
-                response = "Here are some upcoming community events:\n" + "\n".join([
-                    f"- {event.title} on {event.date} at {event.location or 'Not specified'}: "
-                    f"{event.description or 'No description provided'} ({event.url or 'No URL provided'})"
-                    for event in events
-                ])
-            else:
-                response = "No community events found at this time."
+        try:
+            with deadline(CHAT_DEADLINE_SECONDS if budget_seconds is None else budget_seconds):
+                # Detect intent (and, in speculative mode, search the stores meanwhile)
+                intent, relevant_context = await self._classify(user_input, record_filter)
+                print(f"Intent Detected: {intent.value}")
 
-        elif "mentorship" in intent.lower():
-            response_obj = await self.llm.ainvoke(
-                f"Previous Chat History:\n{context}\nYou are a helpful mentor for women. "
-                f"Provide a specific, concise, and actionable answer to the following query: {user_input}"
-            )
-            response = response_obj.content.strip()  # Extract the content string
+                # Build context from recent chat history, within the history token budget
+                context = self.context_packer.pack_history(recent_history(updated_history))
 
-        else:
-            response = "Sorry, I'm not sure how to help with that."
+                # Handle different types of user intent
+                if intent in (Intent.JOB_OPPORTUNITIES, Intent.COMMUNITY_EVENTS):
+                    response = await self._answer_with_cache(intent, user_input, context, record_filter, relevant_context)
+
+                elif intent is Intent.MENTORSHIP_PROGRAMS:
+                    prompt = self._mentorship_prompt(context, user_input)
+                    with metrics.span("llm_generation", agent="Mentorship"):
+                        response_obj = await self.llm.ainvoke(prompt)
+                    response = response_obj.content.strip()  # Extract the content string
+                    metrics.observe_size("prompt_chars", len(prompt), agent="Mentorship")
+                    metrics.observe_size("response_chars", len(response), agent="Mentorship")
 
+                else:
+                    response = "Sorry, I'm not sure how to help with that."
+        except DeadlineExceeded:
+            store = "events" if intent is Intent.COMMUNITY_EVENTS else "jobs"
+            documents = retrieved.get(store, []) if intent in (Intent.JOB_OPPORTUNITIES, Intent.COMMUNITY_EVENTS) else []
+            response = self._degraded_response(intent, documents)
+            print(f"Budget exhausted ({intent.value if intent else 'unclassified'}), "
+                  f"answering with {len(documents)} raw records")
+            metrics.inc("chat_degraded_total", intent=intent.value if intent else "unknown",
+                        records="yes" if documents else "no")
+        except Exception:
+            metrics.inc("chat_errors_total", intent=intent.value if intent else "unknown")
+            raise
+        finally:
+            _retrieved_documents.reset(token)
+
+        metrics.observe("chat_seconds", time.perf_counter() - start, intent=intent.value if intent else "unknown")
         updated_history.append(f"Bot: {response}")
         return response, updated_history
 
+    async def process_batch(self, messages: List[str], record_filter: Optional[RecordFilter] = None,
+                            concurrency: int = BATCH_CONCURRENCY) -> AsyncIterator[Dict[str, Any]]:
+        """Answers independent, history-less messages, yielding one result dict per message in input order.
+
+        Intents are classified together (one Gemini call for every message the local model
+        is unsure of), the job/event queries are embedded in one call and each store is
+        searched once for all of them; then at most `concurrency` answers are generated at
+        a time, at batch priority. A failed message yields {"index", "error"} and the rest go on.
+        """
+        start = time.perf_counter()
+        intents = await self.intent_classifier.run_batch(messages, priority=Priority.BATCH)
+        searched = [i for i, intent in enumerate(intents) if intent in (Intent.JOB_OPPORTUNITIES, Intent.COMMUNITY_EVENTS)]
+        vectors: Dict[int, List[float]] = {}
+        contexts: Dict[int, str] = {}
+        if searched:
+            with metrics.span("embedding_batch"):
+                embedded = await asyncio.to_thread(embed_queries, self.embeddings, [messages[i] for i in searched])
+            vectors = dict(zip(searched, embedded))
+            for intent, db in ((Intent.JOB_OPPORTUNITIES, self.job_db), (Intent.COMMUNITY_EVENTS, self.community_db)):
+                indices = [i for i in searched if intents[i] is intent]
+                packed = await asyncio.to_thread(self._retrieve_batch, db, [messages[i] for i in indices],
+                                                 [vectors[i] for i in indices], record_filter)
+                contexts.update(zip(indices, packed))
+
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        mentor = self.llm.with_priority(Priority.BATCH)
+
+        async def answer(i: int) -> str:
+            async with semaphore:
+                intent = intents[i]
+                history = self.context_packer.pack_history([f"User: {messages[i]}"])  # As process_message, minus the past
+                if intent in (Intent.JOB_OPPORTUNITIES, Intent.COMMUNITY_EVENTS):
+                    return await self._answer_with_cache(intent, messages[i], history, record_filter, contexts[i],
+                                                         vectors[i], Priority.BATCH)
+                if intent is Intent.MENTORSHIP_PROGRAMS:
+                    with metrics.span("llm_generation", agent="Mentorship"):
+                        response = await mentor.ainvoke(self._mentorship_prompt(history, messages[i]))
+                    return response.content.strip()
+                return "Sorry, I'm not sure how to help with that."
+
+        tasks = [asyncio.ensure_future(answer(i)) for i in range(len(messages))]
+        try:
+            for i, task in enumerate(tasks):
+                result: Dict[str, Any] = {"index": i, "intent": intents[i].value}
+                try:
+                    result["response"] = await task
+                except LLMOverloadedError as e:
+                    result.update(error=str(e), retry_after=e.retry_after)
+                except Exception as e:
+                    print(f"Error answering batch message {i}: {e}")
+                    metrics.inc("chat_errors_total", intent=intents[i].value)
+                    result["error"] = "An internal server error occurred processing this message."
+                yield result
+        finally:
+            for task in tasks:  # The consumer went away: stop the answers nobody will read
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            metrics.observe("chat_batch_seconds", time.perf_counter() - start)
+
+    async def stream_message(self, user_input: str, chat_history: List[str],
+                             record_filter: Optional[RecordFilter] = None,
+                             budget_seconds: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Streaming variant of process_message, under the same deadline.
+
+        Yields {"event", "data"} dicts: "intent" first, then "item" per parsed job/event
+        or "token" per mentorship text chunk, and finally "done" with the full response
+        (the same text process_message returns). When the budget runs out, "done" carries
+        the degraded answer instead, with "degraded": true.
+        """
+        updated_history = list(chat_history)
+        updated_history.append(f"User: {user_input}")
+
+        intent: Optional[Intent] = None
+        retrieved: Dict[str, List[Document]] = {}
+        token = _retrieved_documents.set(retrieved)
+        try:
+            with deadline(CHAT_DEADLINE_SECONDS if budget_seconds is None else budget_seconds):
+                intent, relevant_context = await self._classify(user_input, record_filter)
+                yield {"event": "intent", "data": {"intent": intent.value}}
+                context = self.context_packer.pack_history(recent_history(updated_history))
+
+                if intent in (Intent.JOB_OPPORTUNITIES, Intent.COMMUNITY_EVENTS):
+                    start = time.perf_counter()
+                    cache_key = await self._response_cache_key(intent, user_input)
+                    namespace = self._cache_namespace(intent, record_filter)
+                    response = self.response_cache.lookup(namespace, *cache_key) if cache_key else None
+                    if cache_key:
+                        metrics.inc("response_cache_total", intent=intent.value,
+                                    result="miss" if response is None else "hit")
+                    if response is None:
+                        if intent is Intent.JOB_OPPORTUNITIES:
+                            db, agent, format_items = (self.job_db,
+                                                       JobSearchAgent(model=self.json_llms[JobOpportunity]),
+                                                       self._format_jobs)
+                        else:
+                            db, agent, format_items = (self.community_db,
+                                                       CommunityEventSearchAgent(model=self.json_llms[CommunityEvent]),
+                                                       self._format_events)
+                        if relevant_context is None:
+                            relevant_context = await self._retrieve_relevant_documents(db, user_input, record_filter)
+                        items = []
+                        async for item in agent.stream(user_input,
+                                                       f"{relevant_context}\nPrevious Chat History:\n{context}"):
+                            items.append(item)
+                            yield {"event": "item", "data": item.model_dump()}
+                        response, found = format_items(items)
+                        if cache_key and found:
+                            self.response_cache.store(namespace, *cache_key, response)
+                            self.response_cache.record_response_time(False, time.perf_counter() - start)
+                    elif cache_key:
+                        self.response_cache.record_response_time(True, time.perf_counter() - start)
+
+                elif intent is Intent.MENTORSHIP_PROGRAMS:
+                    parts = []
+                    with metrics.span("llm_stream", agent="Mentorship"):
+                        async for chunk in self.llm.astream(self._mentorship_prompt(context, user_input)):
+                            parts.append(chunk.content)
+                            yield {"event": "token", "data": {"text": chunk.content}}
+                    response = "".join(parts).strip()
+
+                else:
+                    response = "Sorry, I'm not sure how to help with that."
+
+            yield {"event": "done", "data": {"response": response}}
+        except DeadlineExceeded:
+            store = "events" if intent is Intent.COMMUNITY_EVENTS else "jobs"
+            documents = retrieved.get(store, []) if intent in (Intent.JOB_OPPORTUNITIES, Intent.COMMUNITY_EVENTS) else []
+            response = self._degraded_response(intent, documents)
+            print(f"Budget exhausted while streaming ({intent.value if intent else 'unclassified'}), "
+                  f"answering with {len(documents)} raw records")
+            metrics.inc("chat_degraded_total", intent=intent.value if intent else "unknown",
+                        records="yes" if documents else "no")
+            yield {"event": "done", "data": {"response": response, "degraded": True}}
+        finally:
+            _retrieved_documents.reset(token)
+
 
 # --- Flask App Setup ---
 app = Flask(__name__)
 app.secret_key = 'manya'
 CORS(app, supports_credentials=True) # Allows cookies (needed for sessions) from any origin
 
-# --- Initialize Chatbot within the Request Context ---
-def get_chatbot_instance():
-    """Initializes the Chatbot instance."""
-    global GOOGLE_API_KEY, JOB_FILES_PATH, COMMUNITY_FILES_PATH
+# --- Chatbot Lifecycle (one instance per worker process) ---
+# Building a Chatbot creates the Gemini clients, re-reads the JSON data files and
+# opens both vector stores, so it is done once per process and then shared.
+# Requests only ever read the instance; a reload builds a new one off to the side
+# and swaps the reference, so in-flight requests finish on the instance they started with.
+_chatbot_instance: Optional[Chatbot] = None
+response_cache: Optional[SemanticResponseCache] = SemanticResponseCache(
+    similarity_threshold=RESPONSE_CACHE_SIMILARITY,
+    ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+    max_entries=RESPONSE_CACHE_MAX_ENTRIES
+) if RESPONSE_CACHE_MAX_ENTRIES > 0 else None
+_chatbot_lock = threading.Lock()   # Guards the first build
+
+def _build_conversation_store() -> ConversationStore:
+    if CONVERSATION_STORE == "sqlite":
+        os.makedirs(os.path.dirname(CONVERSATION_DB_PATH) or ".", exist_ok=True)
+        return SQLiteConversationStore(CONVERSATION_DB_PATH, window=CONVERSATION_WINDOW,
+                                       ttl_seconds=CONVERSATION_TTL_SECONDS)
+    return MemoryConversationStore(window=CONVERSATION_WINDOW, ttl_seconds=CONVERSATION_TTL_SECONDS)
+
+# Chat history lives here; the session cookie only carries the conversation id
+conversation_store = _build_conversation_store()
+_reload_lock = threading.Lock()    # Serializes explicit reloads
+
+def _build_chatbot() -> Optional[Chatbot]:
+    """Constructs a new Chatbot from the configured API key and data files."""
     if not GOOGLE_API_KEY or GOOGLE_API_KEY == "YOUR_FALLBACK_API_KEY_HERE":
         print("FATAL ERROR: GOOGLE_API_KEY environment variable not set or invalid.")
         return None
@@ -324,14 +1396,205 @@ def get_chatbot_instance():
     job_files_list = [f.strip() for f in JOB_FILES_PATH.split(',') if f.strip()]
     community_files_list = [f.strip() for f in COMMUNITY_FILES_PATH.split(',') if f.strip()]
 
-    chatbot = Chatbot(
-        google_api_key=GOOGLE_API_KEY,
-        job_files=job_files_list,
-        community_files=community_files_list
-    )
+    with metrics.span("chatbot_build"):
+        chatbot = Chatbot(
+            google_api_key=GOOGLE_API_KEY,
+            job_files=job_files_list,
+            community_files=community_files_list,
+            db_root=VECTOR_DB_ROOT,
+            response_cache=response_cache
+        )
     print("Chatbot Instance Initialized.")
     return chatbot
 
+def get_chatbot_instance() -> Optional[Chatbot]:
+    """Returns the process-wide Chatbot, building it on first use."""
+    global _chatbot_instance
+    chatbot = _chatbot_instance
+    if chatbot is not None:
+        return chatbot
+    with _chatbot_lock:
+        if _chatbot_instance is None:
+            _chatbot_instance = _build_chatbot()
+        return _chatbot_instance
+
+def reload_chatbot_instance() -> Optional[Chatbot]:
+    """Builds a fresh Chatbot and swaps it in. Keeps the current one if the build fails."""
+    global _chatbot_instance
+    with _reload_lock:
+        chatbot = _build_chatbot()
+        if chatbot is None:
+            return None
+        with _chatbot_lock:
+            previous, _chatbot_instance = _chatbot_instance, chatbot
+        if response_cache is not None and (previous is None or previous.index_versions != chatbot.index_versions):
+            response_cache.invalidate()
+        return chatbot
+
+_snapshot_poll_lock = threading.Lock()
+_next_snapshot_poll = 0.0
+_snapshot_reload_running = False
+
+def _reload_for_snapshot():
+    global _snapshot_reload_running
+    try:
+        chatbot = reload_chatbot_instance()
+        if chatbot is not None:
+            print(f"Hot-reloaded index snapshots: {chatbot.store_versions}")
+            metrics.inc("index_reloads_total", result="ok")
+        else:
+            metrics.inc("index_reloads_total", result="failed")
+    except Exception as e:
+        print(f"Error reloading Chatbot for a new snapshot, keeping the current one: {e}")
+        traceback.print_exc()
+        metrics.inc("index_reloads_total", result="failed")
+    finally:
+        _snapshot_reload_running = False
+
+def poll_snapshots():
+    """Starts a background reload when a new snapshot was published, at most every SNAPSHOT_POLL_SECONDS.
+
+    The new Chatbot is swapped in once built; requests already running finish on the one they started with.
+    """
+    global _next_snapshot_poll, _snapshot_reload_running
+    chatbot = _chatbot_instance
+    if VECTOR_DB_SYNC_MODE != "snapshot" or chatbot is None:
+        return
+    now = time.monotonic()
+    if now < _next_snapshot_poll or not _snapshot_poll_lock.acquire(blocking=False):
+        return
+    try:
+        _next_snapshot_poll = now + SNAPSHOT_POLL_SECONDS
+        if _snapshot_reload_running or not chatbot.snapshot_changed():
+            return
+        _snapshot_reload_running = True
+        threading.Thread(target=_reload_for_snapshot, name="snapshot-reload", daemon=True).start()
+    finally:
+        _snapshot_poll_lock.release()
+
+# --- Worker Event Loop ---
+# Flask runs every async view on a new event loop and closes it afterwards, but the
+# Gemini client binds its grpc.aio channel to the first loop that uses it: on any
+# later loop its calls fail with "Event loop is closed". So every coroutine that
+# may reach a chat model runs on this one long-lived loop, whichever view starts it.
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_loop_lock = threading.Lock()
+
+def worker_loop() -> asyncio.AbstractEventLoop:
+    """The process's long-lived event loop, running in a daemon thread (started on first use)."""
+    global _worker_loop
+    with _worker_loop_lock:
+        if _worker_loop is None or _worker_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="chatbot-event-loop", daemon=True).start()
+            _worker_loop = loop
+        return _worker_loop
+
+async def _run_in_context(context: contextvars.Context, coro):
+    # The task copies `context`, so the caller's request trace and deadline follow the coroutine
+    return await context.run(asyncio.ensure_future, coro)
+
+def submit_to_worker_loop(coro) -> concurrent.futures.Future:
+    """Schedules `coro` on the worker loop in the caller's contextvars; cancelling the future cancels it."""
+    return asyncio.run_coroutine_threadsafe(_run_in_context(contextvars.copy_context(), coro), worker_loop())
+
+async def on_worker_loop(coro):
+    """Awaits `coro` on the worker loop from any other loop (such as an async view's)."""
+    try:
+        if asyncio.get_running_loop() is _worker_loop:
+            return await coro
+    except RuntimeError:
+        pass
+    return await asyncio.wrap_future(submit_to_worker_loop(coro))
+
+_process_start = time.monotonic()
+_warmup: Dict[str, Any] = {"state": "not started", "seconds": None, "error": None}
+
+def warm_chatbot_instance() -> bool:
+    """Builds the Chatbot ahead of the first request (called from the gunicorn worker hook)."""
+    _warmup["state"] = "running"
+    start = time.monotonic()
+    try:
+        ready = get_chatbot_instance() is not None
+    except Exception as e:
+        print(f"Error warming Chatbot instance: {e}")
+        traceback.print_exc()
+        _warmup.update(state="failed", error=str(e))
+        return False
+    _warmup.update(state="done" if ready else "failed", seconds=round(time.monotonic() - start, 3),
+                   error=None if ready else "Chatbot could not be built (see the worker log)")
+    return ready
+
+def start_background_warmup() -> threading.Thread:
+    """Builds the Chatbot in a daemon thread, so the worker can answer (e.g. health checks) meanwhile."""
+    thread = threading.Thread(target=warm_chatbot_instance, name="chatbot-warmup", daemon=True)
+    thread.start()
+    return thread
+
+def readiness() -> Dict[str, Any]:
+    """Whether this worker can answer chat requests now, and how far its start-up has got."""
+    ready = _chatbot_instance is not None or (STARTUP_MODE == "lazy" and _warmup["state"] != "failed")
+    return {
+        "ready": ready,
+        "startup_mode": STARTUP_MODE,
+        "warmup": dict(_warmup),
+        "uptime_seconds": round(time.monotonic() - _process_start, 3),
+        "heavy_modules_loaded": sorted({module for module in LAZY_IMPORTS.values() if module in sys.modules}),
+    }
+
+# Shared by every request in the process, independent of Chatbot reloads
+resume_extractor = ResumeTextExtractor(
+    max_bytes=RESUME_MAX_BYTES,
+    max_pages=RESUME_MAX_PAGES
+)
+
+# --- Metrics ---
+def _metrics_gauges():
+    """Cache and index state, read from the live objects whenever /api/metrics is scraped."""
+    chatbot = _chatbot_instance
+    if response_cache is not None:
+        for key, value in response_cache.stats().items():
+            yield f"response_cache_{key}", {}, value
+    if chatbot is not None:
+        if isinstance(chatbot.embeddings, CachedEmbeddings):
+            for key, value in chatbot.embeddings.stats().items():
+                yield f"embedding_cache_{key}", {}, value
+        for store, version in chatbot.index_versions.items():
+            yield "index_info", {"store": store, "version": version}, 1
+        yield "record_cards", {}, chatbot.card_stats["cards"]
+        for source, stats in chatbot.ingestion_stats.items():
+            yield "ingestion_duplicates_dropped", {"source": source, "kind": "exact"}, stats.exact_duplicates
+            yield "ingestion_duplicates_dropped", {"source": source, "kind": "near"}, stats.near_duplicates
+    yield "conversations", {}, conversation_store.stats()["conversations"]
+    for key, value in llm_gateway.stats().items():
+        yield f"llm_gateway_{key}", {}, value
+    for schema, counts in structured_output_stats.stats().items():
+        yield "structured_output_failure_rate", {"agent": schema}, counts["failure_rate"]
+
+metrics.add_collector(_metrics_gauges)
+
+@app.before_request
+def _start_request_trace():
+    metrics.start_trace()
+    poll_snapshots()
+    g.chatbot = _chatbot_instance
+
+@app.after_request
+def _finish_request_trace(response: Response) -> Response:
+    trace = metrics.current_trace()
+    # The versions of the Chatbot the request started on, which is the one it was served by
+    chatbot = g.get("chatbot") or _chatbot_instance
+    if chatbot is not None:
+        response.headers['X-Index-Version'] = ",".join(f"{store}={version}" for store, version in chatbot.store_versions.items())
+    if trace is None:
+        return response
+    metrics.observe("http_request_seconds", time.perf_counter() - trace.start,
+                    endpoint=request.endpoint or "unknown", status=response.status_code)
+    if SERVER_TIMING or request.headers.get('X-Server-Timing') == '1':
+        # Streamed responses only include the stages finished before the first byte
+        response.headers['Server-Timing'] = trace.server_timing()
+    return response
+
 # --- API Endpoint ---
 @app.route('/api/chat', methods=['POST', 'OPTIONS']) # Keep OPTIONS
 async def chat_endpoint():
@@ -353,18 +1616,36 @@ async def chat_endpoint():
         if not user_message:
             return jsonify({"error": "Missing 'message' in request body"}), 400
 
-        # Retrieve chat history from session, initialize if empty
-        chat_history = session.get('chat_history', [])
+        try:
+            record_filter = RecordFilter.from_dict(data.get('filters'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        budget_ms = data.get('budget_ms')
+        if budget_ms is not None and (isinstance(budget_ms, bool) or not isinstance(budget_ms, (int, float)) or budget_ms <= 0):
+            return jsonify({"error": "'budget_ms' must be a positive number of milliseconds"}), 400
+
+        # Clients that ask for Server-Sent Events get the streaming variant
+        if request.accept_mimetypes.best == 'text/event-stream':
+            return _stream_chat_response(chatbot, user_message, record_filter,
+                                         budget_ms / 1000 if budget_ms is not None else None)
+
+        # Retrieve the conversation's recent history and rolling summary
+        conversation_id = _conversation_id()
+        chat_history = conversation_store.get(conversation_id).history()
 
         try:
             # Process message using the chatbot instance and current history
-            bot_response, updated_history = await chatbot.process_message(user_message, chat_history)
+            bot_response, _ = await on_worker_loop(chatbot.process_message(
+                user_message, chat_history, record_filter, budget_ms / 1000 if budget_ms is not None else None))
 
-            # Store the updated history back in the session
-            session['chat_history'] = updated_history
+            # Append just this turn, so concurrent requests don't overwrite each other's
+            conversation_store.append(conversation_id, f"User: {user_message}", f"Bot: {bot_response}")
 
             return jsonify({"response": bot_response})
 
+        except LLMOverloadedError as e:
+            return _overloaded_response(e)
         except Exception as e:
             print(f"Error in /chat endpoint processing POST request: {e}")
             traceback.print_exc()
@@ -372,6 +1653,151 @@ async def chat_endpoint():
     else:
         return jsonify({"error": "Method not allowed"}), 405
 
+@app.route('/api/chat/stream', methods=['POST', 'OPTIONS'])
+def chat_stream_endpoint():
+    """Streams the chat reply as Server-Sent Events (see Chatbot.stream_message for the event types)."""
+    if request.method == 'OPTIONS':
+        return _build_cors_preflight_response()
+    chatbot = get_chatbot_instance()
+    if not chatbot:
+        print("Error: Chatbot failed to initialize.")
+        return jsonify({"error": "Chatbot service is not available."}), 503
+    if not request.is_json:
+        return jsonify({"error": "Request must be JSON"}), 400
+    data = request.get_json()
+    user_message = data.get('message')
+    if not user_message:
+        return jsonify({"error": "Missing 'message' in request body"}), 400
+    try:
+        record_filter = RecordFilter.from_dict(data.get('filters'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    budget_ms = data.get('budget_ms')
+    if budget_ms is not None and (isinstance(budget_ms, bool) or not isinstance(budget_ms, (int, float)) or budget_ms <= 0):
+        return jsonify({"error": "'budget_ms' must be a positive number of milliseconds"}), 400
+    return _stream_chat_response(chatbot, user_message, record_filter,
+                                 budget_ms / 1000 if budget_ms is not None else None)
+
+@app.route('/api/chat/batch', methods=['POST', 'OPTIONS'])
+def chat_batch_endpoint():
+    """Answers a list of independent messages, streamed back as one JSON line per message, in order."""
+    if request.method == 'OPTIONS':
+        return _build_cors_preflight_response()
+    chatbot = get_chatbot_instance()
+    if not chatbot:
+        print("Error: Chatbot failed to initialize.")
+        return jsonify({"error": "Chatbot service is not available."}), 503
+    if not request.is_json:
+        return jsonify({"error": "Request must be JSON"}), 400
+    data = request.get_json()
+    messages = data.get('messages')
+    if not isinstance(messages, list) or not messages or not all(isinstance(m, str) and m.strip() for m in messages):
+        return jsonify({"error": "'messages' must be a non-empty list of non-empty strings"}), 400
+    if len(messages) > BATCH_MAX_MESSAGES:
+        return jsonify({"error": f"At most {BATCH_MAX_MESSAGES} messages per batch"}), 400
+    try:
+        record_filter = RecordFilter.from_dict(data.get('filters'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def generate():
+        try:
+            for result in _iterate_async(chatbot.process_batch(messages, record_filter, BATCH_CONCURRENCY)):
+                yield json.dumps(result) + "\n"
+        except Exception as e:
+            print(f"Error in /chat/batch endpoint: {e}")
+            traceback.print_exc()
+            yield json.dumps({"error": "An internal server error occurred processing the batch."}) + "\n"
+
+    return Response(generate(), mimetype='application/x-ndjson', headers={'X-Accel-Buffering': 'no'})
+
+# --- Conversation & Streaming Helpers ---
+def _conversation_id() -> str:
+    """The session's conversation id, moving any history left in an old-style cookie into the store."""
+    conversation_id = session.get('conversation_id')
+    if not conversation_id:
+        conversation_id = session['conversation_id'] = uuid.uuid4().hex
+    legacy_history = session.pop('chat_history', None)
+    session.pop('history_key', None)
+    if legacy_history:
+        conversation_store.append(conversation_id, *legacy_history)
+    return conversation_id
+
+async def _gather(*coros) -> List[Any]:
+    # asyncio.gather needs a running loop, so it is wrapped to be created on the worker loop
+    return await asyncio.gather(*coros)
+
+def _iterate_async(async_iterable: AsyncIterator[Any]) -> Iterator[Any]:
+    """Drives an async iterator on the worker event loop and yields its items synchronously.
+
+    Flask streams responses from plain generators; stopping early (client gone) stops the producer,
+    closing the async iterator so its cleanup (e.g. cancelling in-flight LLM calls) runs.
+    """
+    items: "queue.Queue" = queue.Queue(maxsize=64)
+    finished = object()
+    stop = threading.Event()
+
+    async def offer(item: Any) -> bool:
+        # Wait for room without blocking the loop (other answers are in flight on it), until the reader
+        # goes away: it sets `stop` when it does, and a full queue would otherwise hang the producer for good
+        while not stop.is_set():
+            try:
+                items.put_nowait(item)
+                return True
+            except queue.Full:
+                await asyncio.sleep(0.05)
+        return False
+
+    async def consume():
+        try:
+            async for item in async_iterable:
+                if not await offer(item):
+                    break
+        except Exception as e:
+            await offer(e)
+        finally:
+            if hasattr(async_iterable, "aclose"):
+                await async_iterable.aclose()
+            await offer(finished)
+
+    producer = submit_to_worker_loop(consume())
+    try:
+        while True:
+            item = items.get()
+            if item is finished:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        producer.cancel()  # Also interrupts an answer still being generated for the next item
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _stream_chat_response(chatbot: Chatbot, user_message: str, record_filter: Optional[RecordFilter] = None,
+                          budget_seconds: Optional[float] = None) -> Response:
+    conversation_id = _conversation_id()
+    chat_history = conversation_store.get(conversation_id).history()
+
+    def generate():
+        try:
+            for event in _iterate_async(chatbot.stream_message(user_message, chat_history, record_filter,
+                                                               budget_seconds)):
+                if event["event"] == "done":
+                    conversation_store.append(conversation_id, f"User: {user_message}", f"Bot: {event['data']['response']}")
+                yield _sse(event["event"], event["data"])
+        except LLMOverloadedError as e:
+            yield _sse("error", {"error": str(e), "retry_after": e.retry_after})
+        except Exception as e:
+            print(f"Error in /chat/stream endpoint: {e}")
+            traceback.print_exc()
+            yield _sse("error", {"error": "An internal server error occurred processing your message."})
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/resume_review', methods=['POST', 'OPTIONS'])
 async def resume_review_endpoint():
     """Handles resume review requests for PDF files."""
@@ -397,36 +1823,44 @@ async def resume_review_endpoint():
             return jsonify({"error": "Only PDF files are supported"}), 400
             
         try:
-            # Create a temporary file to save the uploaded PDF
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-                resume_file.save(temp_file.name)
-                temp_filename = temp_file.name
-                
-            # Extract text from PDF
-            resume_text = ""
-            with open(temp_filename, 'rb') as pdf_file:
-                pdf_reader = PyPDF2.PdfReader(pdf_file)
-                for page_num in range(len(pdf_reader.pages)):
-                    resume_text += pdf_reader.pages[page_num].extract_text()
-            
-            # Delete temporary file
-            os.unlink(temp_filename)
+            # Parse the upload in memory; identical files come back from the cache
+            resume_data = resume_extractor.read_upload(resume_file.stream)
+            with metrics.span("resume_extract"):
+                extracted = await asyncio.to_thread(resume_extractor.extract_pdf, resume_data)
+        except ResumeExtractionError as e:
+            return jsonify({"error": str(e)}), 400
+
+        try:
+            resume_text = extracted.text
             
             # If no text was extracted
             if not resume_text.strip():
                 return jsonify({"error": "Could not extract text from the PDF"}), 400
+
+            if RESUME_REVIEW_CACHE:
+                review = resume_extractor.cached_review(extracted.digest)
+                metrics.inc("resume_review_cache_total", result="miss" if review is None else "hit")
+                if review is not None:
+                    return jsonify({"response": review, "cached": True})
                 
             # Analyze the resume
-            response = await chatbot.llm.ainvoke(
-                "You are an expert resume reviewer for women in tech. "
-                "Please analyze the following resume and provide specific, actionable feedback "
-                "on content, format, skills presentation, and how to improve it. "
-                "Focus on helping the candidate highlight their strengths and address weaknesses. "
-                f"Here's the resume text:\n\n{resume_text}"
-            )
+            prompt = ("You are an expert resume reviewer for women in tech. "
+                      "Please analyze the following resume and provide specific, actionable feedback "
+                      "on content, format, skills presentation, and how to improve it. "
+                      "Focus on helping the candidate highlight their strengths and address weaknesses. "
+                      f"Here's the resume text:\n\n{resume_text}")
+            with metrics.span("llm_generation", agent="ResumeReview"):
+                response = await on_worker_loop(chatbot.llm.ainvoke(prompt, priority=Priority.RESUME))
+            review = response.content.strip()
+            metrics.observe_size("prompt_chars", len(prompt), agent="ResumeReview")
+            metrics.observe_size("response_chars", len(review), agent="ResumeReview")
+            if RESUME_REVIEW_CACHE:
+                resume_extractor.store_review(extracted.digest, review)
             
-            return jsonify({"response": response.content.strip()})
+            return jsonify({"response": review})
             
+        except LLMOverloadedError as e:
+            return _overloaded_response(e)
         except Exception as e:
             print(f"Error in /resume_review endpoint processing POST request: {e}")
             traceback.print_exc()
@@ -435,12 +1869,181 @@ async def resume_review_endpoint():
         return jsonify({"error": "Method not allowed"}), 405
 
 
+@app.route('/api/resume_report', methods=['POST', 'OPTIONS'])
+async def resume_report_endpoint():
+    """ATS scores and detailed analysis for a PDF/DOCX resume, from one upload and two concurrent LLM calls."""
+    if request.method == 'OPTIONS':
+        return _build_cors_preflight_response()
+    chatbot = get_chatbot_instance()
+    if not chatbot:
+        print("Error: Chatbot failed to initialize.")
+        return jsonify({"error": "Chatbot service is not available."}), 503
+
+    # Accept the field name of both the review endpoint and the old ATS service
+    resume_file = request.files.get('resume') or request.files.get('resume_file')
+    if resume_file is None:
+        return jsonify({"error": "No resume file provided"}), 400
+    if resume_file.filename == '':
+        return jsonify({"error": "No file selected"}), 400
+    extension = resume_file.filename.lower().rsplit('.', 1)[-1]
+    if extension not in SUPPORTED_EXTENSIONS:
+        return jsonify({"error": "Unsupported file format. Please upload a PDF or DOCX file."}), 400
+
+    try:
+        resume_data = resume_extractor.read_upload(resume_file.stream)
+        with metrics.span("resume_extract"):
+            extracted = await asyncio.to_thread(resume_extractor.extract, resume_data, extension)
+    except ResumeExtractionError as e:
+        return jsonify({"error": str(e)}), 400
+    if not extracted.text.strip():
+        return jsonify({"error": "Could not extract text from the resume file."}), 400
+
+    try:
+        with metrics.span("llm_generation", agent="ResumeReport"):
+            ats_response, analysis_response = await on_worker_loop(_gather(
+                chatbot.llm.ainvoke(ATS_PROMPT.format(resume_text=extracted.text), priority=Priority.RESUME),
+                chatbot.llm.ainvoke(ANALYSIS_PROMPT.format(resume_text=extracted.text), priority=Priority.RESUME)
+            ))
+        ats_report = ats_response.content.strip()
+        analysis_report = analysis_response.content.strip()
+        return jsonify({
+            "ats_report": ats_report,
+            "analysis_report": analysis_report,
+            "scores": parse_ats_scores(ats_report, analysis_report),
+        })
+    except LLMOverloadedError as e:
+        return _overloaded_response(e)
+    except Exception as e:
+        print(f"Error in /resume_report endpoint processing POST request: {e}")
+        traceback.print_exc()
+        return jsonify({"error": "An internal server error occurred processing your resume."}), 500
+
+
+@app.route('/api/resume_match', methods=['POST', 'OPTIONS'])
+async def resume_match_endpoint():
+    """Ranks the indexed jobs against a PDF/DOCX resume by embedding similarity and skill overlap."""
+    if request.method == 'OPTIONS':
+        return _build_cors_preflight_response()
+    chatbot = get_chatbot_instance()
+    if not chatbot:
+        print("Error: Chatbot failed to initialize.")
+        return jsonify({"error": "Chatbot service is not available."}), 503
+
+    resume_file = request.files.get('resume') or request.files.get('resume_file')
+    if resume_file is None:
+        return jsonify({"error": "No resume file provided"}), 400
+    if resume_file.filename == '':
+        return jsonify({"error": "No file selected"}), 400
+    extension = resume_file.filename.lower().rsplit('.', 1)[-1]
+    if extension not in SUPPORTED_EXTENSIONS:
+        return jsonify({"error": "Unsupported file format. Please upload a PDF or DOCX file."}), 400
+
+    # Multipart form fields: top_n, and filters as a JSON object like /api/chat's
+    try:
+        top_n = int(request.form.get('top_n', RESUME_MATCH_TOP_N))
+        if not 1 <= top_n <= 100:
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": "'top_n' must be an integer between 1 and 100"}), 400
+    try:
+        record_filter = RecordFilter.from_dict(json.loads(request.form.get('filters') or 'null'))
+    except ValueError as e:  # json.JSONDecodeError is a ValueError too
+        return jsonify({"error": f"Invalid filters: {e}"}), 400
+
+    try:
+        resume_data = resume_extractor.read_upload(resume_file.stream)
+        with metrics.span("resume_extract"):
+            extracted = await asyncio.to_thread(resume_extractor.extract, resume_data, extension)
+    except ResumeExtractionError as e:
+        return jsonify({"error": str(e)}), 400
+    if not extracted.text.strip():
+        return jsonify({"error": "Could not extract text from the resume file."}), 400
+
+    try:
+        matches, resume_skills = await on_worker_loop(chatbot.match_resume(extracted.text, top_n, record_filter))
+        return jsonify({
+            "matches": [match.to_dict() for match in matches],
+            "resume_skills": resume_skills,
+            "jobs_scored": len(chatbot.job_matcher) if chatbot.job_matcher else 0,
+        })
+    except Exception as e:
+        print(f"Error in /resume_match endpoint processing POST request: {e}")
+        traceback.print_exc()
+        return jsonify({"error": "An internal server error occurred processing your resume."}), 500
+
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats_endpoint():
+    """Hit rates and latencies of the response and embedding caches, for tuning thresholds."""
+    chatbot = _chatbot_instance
+    embeddings = chatbot.embeddings if chatbot else None
+    speculation = card_stats = None
+    if chatbot:
+        with chatbot.stats_lock:
+            speculation, card_stats = dict(chatbot.speculation_stats), dict(chatbot.card_stats)
+    return jsonify({
+        "response_cache": response_cache.stats() if response_cache else None,
+        "embedding_cache": embeddings.stats() if isinstance(embeddings, CachedEmbeddings) else None,
+        "index_versions": chatbot.index_versions if chatbot else {},
+        "speculation": speculation,
+        "record_cards": card_stats,
+        "ingestion": {source: vars(stats) for source, stats in chatbot.ingestion_stats.items()} if chatbot else {},
+        "conversations": conversation_store.stats(),
+        "llm_gateway": llm_gateway.stats(),
+        "structured_output": structured_output_stats.stats(),
+    })
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Stage latency histograms, sizes, cache and error counters in Prometheus text format."""
+    if not METRICS_ENABLED:
+        return jsonify({"error": "Metrics are disabled"}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/admin/reload', methods=['POST'])
+def reload_endpoint():
+    """Rebuilds the Chatbot (data files, vector stores, clients) without restarting the worker."""
+    if not ADMIN_TOKEN or request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return jsonify({"error": "Forbidden"}), 403
+    try:
+        chatbot = reload_chatbot_instance()
+    except Exception as e:
+        print(f"Error reloading Chatbot instance: {e}")
+        traceback.print_exc()
+        chatbot = None
+    if chatbot is None:
+        return jsonify({"error": "Reload failed; the previous Chatbot is still serving."}), 500
+    return jsonify({"status": "reloaded"})
+
+
+@app.route('/api/health', methods=['GET'])
+def health_endpoint():
+    """Liveness: the worker is up. The body reports readiness and start-up progress."""
+    return jsonify({"status": "ok", **readiness()})
+
+@app.route('/api/health/ready', methods=['GET'])
+def readiness_endpoint():
+    """Readiness for load balancers: 200 once chat requests won't wait for the Chatbot build, else 503."""
+    state = readiness()
+    return jsonify(state), 200 if state["ready"] else 503
+
 @app.route('/', methods=['GET'])
 def index():
     """Renders the index page."""
     return "Welcome to the Neuro Naari API!"
 
 # Helper function for CORS preflight response (needed for POST with JSON)
+def _overloaded_response(error: LLMOverloadedError):
+    """503 with Retry-After, sent instead of queueing more work behind a saturated Gemini quota."""
+    response = jsonify({"error": str(error), "retry_after": error.retry_after})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+@app.errorhandler(LLMOverloadedError)
+def _handle_overloaded(error: LLMOverloadedError):
+    return _overloaded_response(error)
+
 def _build_cors_preflight_response():
     response = make_response()
     response.headers.add("Access-Control-Allow-Origin", "*") # Or specific origin
@@ -451,4 +2054,7 @@ def _build_cors_preflight_response():
 
 # --- Run Flask App ---
 if __name__ == '__main__':
+    # The debug reloader runs this file twice; only the child process (WERKZEUG_RUN_MAIN) serves
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true" and STARTUP_MODE != "lazy":
+        start_background_warmup()
     app.run(debug=True,port=5000)
\ No newline at end of file
@@ -0,0 +1,4 @@
+"""Offline benchmarks for the Neuro Naari backend. Run from the repo root, e.g.
+
+    python -m benchmarks.bench_chatbot_lifecycle
+"""
@@ -0,0 +1,77 @@
+"""N sequential /api/chat calls vs. one /api/chat/batch call with the same messages.
+
+Uses the offline Chatbot with fake Gemini latencies. Every message is made
+unique, so neither path is helped by the embedding or response caches; the
+output counts the embedding requests and LLM calls each path made.
+
+    python -m benchmarks.bench_batch_chat --messages 100 --llm-latency 0.2 --embedding-latency 0.05
+"""
+import argparse
+import json
+import time
+
+from benchmarks.harness import load_corpus, offline_app
+
+
+def _calls(chatbot) -> dict:
+    embeddings = getattr(chatbot.embeddings, "underlying", chatbot.embeddings)
+    models = {id(model.model): model.model for model in (chatbot.llm, *chatbot.json_llms.values())}
+    return {"embedding_requests": embeddings.calls, "llm_calls": sum(model.calls for model in models.values())}
+
+
+def _delta(after: dict, before: dict) -> dict:
+    return {key: after[key] - before[key] for key in after}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=4, help="Batch answers in flight (BATCH_CONCURRENCY)")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    # Different numbers for the two runs, so the batch can't reuse what the sequential run cached
+    sequential_messages, messages = ([f"{corpus[i % len(corpus)]['message']} (request {offset + i})"
+                                      for i in range(args.messages)] for offset in (0, args.messages))
+
+    with offline_app(llm_latency=args.llm_latency, embedding_latency=args.embedding_latency) as app_module:
+        app_module.BATCH_CONCURRENCY = args.concurrency
+        chatbot = app_module.get_chatbot_instance()
+        client = app_module.app.test_client()
+
+        before = _calls(chatbot)
+        start = time.perf_counter()
+        for message in sequential_messages:
+            response = client.post("/api/chat", json={"message": message})
+            assert response.status_code == 200, response.get_data(as_text=True)
+        sequential_seconds = time.perf_counter() - start
+        sequential_calls = _delta(_calls(chatbot), before)
+
+        before = _calls(chatbot)
+        start = time.perf_counter()
+        response = client.post("/api/chat/batch", json={"messages": messages}, buffered=False)
+        first_result, results = None, []
+        for line in response.iter_encoded():
+            for row in line.decode("utf-8").splitlines():
+                if row.strip():
+                    first_result = first_result or time.perf_counter() - start
+                    results.append(json.loads(row))
+        batch_seconds = time.perf_counter() - start
+        batch_calls = _delta(_calls(chatbot), before)
+
+    assert [result["index"] for result in results] == list(range(len(messages))), "results out of order"
+    print(json.dumps({
+        "messages": len(messages),
+        "sequential": {"seconds": round(sequential_seconds, 2),
+                       "messages_per_second": round(len(messages) / sequential_seconds, 2), **sequential_calls},
+        "batch": {"seconds": round(batch_seconds, 2), "messages_per_second": round(len(messages) / batch_seconds, 2),
+                  "first_result_ms": round(first_result * 1000, 1), "errors": sum("error" in r for r in results),
+                  **batch_calls},
+        "speedup": round(sequential_seconds / batch_seconds, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Startup vs. steady-state latency of /api/chat with the per-process Chatbot.
+
+Compares the old behaviour (a new Chatbot per request) with the shared
+instance: the first request pays for the build, later ones should not.
+
+    python -m benchmarks.bench_chatbot_lifecycle --requests 20
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+import app as app_module  # noqa: E402
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings  # noqa: E402
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+def _post_chat(client, message: str) -> float:
+    start = time.perf_counter()
+    response = client.post("/api/chat", json={"message": message})
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--message", default="Are there any remote software jobs?")
+    args = parser.parse_args()
+
+    app_module.GOOGLE_API_KEY = os.environ["GOOGLE_API_KEY"]
+    app_module.ChatGoogleGenerativeAI = FakeChatModel
+    app_module.GoogleGenerativeAIEmbeddings = FakeEmbeddings
+
+    with tempfile.TemporaryDirectory() as db_root:
+        app_module.VECTOR_DB_ROOT = db_root
+        client = app_module.app.test_client()
+
+        # Old behaviour: every request builds its own Chatbot.
+        per_request_build = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            app_module._build_chatbot()
+            per_request_build.append(time.perf_counter() - start)
+
+        # New behaviour: first request builds, the rest reuse the instance.
+        app_module._chatbot_instance = None
+        cold = _post_chat(client, args.message)
+        steady = [_post_chat(client, args.message) for _ in range(args.requests)]
+
+    print(json.dumps({
+        "requests": args.requests,
+        "chatbot_build_ms": {"median": _ms(statistics.median(per_request_build)),
+                             "max": _ms(max(per_request_build))},
+        "first_request_ms": _ms(cold),
+        "steady_state_ms": {"median": _ms(statistics.median(steady)), "max": _ms(max(steady))},
+        "setup_cost_removed_per_request_ms": _ms(statistics.median(per_request_build)),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
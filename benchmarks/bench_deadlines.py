@@ -0,0 +1,124 @@
+"""Latency tails with and without hedged LLM calls and per-message deadlines.
+
+The fake Gemini model answers in --llm-latency seconds, except that a
+--tail-probability share of its calls stall for another --tail-latency.
+Three scenarios answer the same concurrent job/event/mentorship messages
+through Chatbot.process_message (response cache off), once per tail
+probability:
+
+- baseline: no hedging, no deadline;
+- hedged: calls running past the p95 of recent latencies get a duplicate;
+- hedged + deadline: also a --budget per message, past which the answer
+  degrades to the retrieved records.
+
+Each scenario first sends --warmup messages so the gateway has latency
+samples to take its percentile from. The default tail probabilities cover both
+regimes: at 5% the p95 hedges rescue the stalls; at 30% the p95 is itself a
+stall, nothing is hedged and the deadline degrades the stalled answers.
+
+    python -m benchmarks.bench_deadlines --messages 200 --tail-probability 0.05 0.3 --tail-latency 3 --budget 1
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.fakes import FakeChatModel
+from benchmarks.harness import load_corpus, offline_app, summarize
+from llm_gateway import LLMGateway
+
+
+def _degraded(app_module) -> float:
+    return sum(app_module.metrics._counters.get("chat_degraded_total", {}).values())
+
+
+async def _answer_all(chatbot, messages, concurrency: int, budget: float):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def answer(message: str):
+        async with semaphore:
+            start = time.perf_counter()
+            await chatbot.process_message(message, [], budget_seconds=budget)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(answer(message) for message in messages))
+    return latencies
+
+
+def run_scenario(args, name: str, tail_probability: float, hedge_max_rate: float, budget: float) -> dict:
+    corpus = load_corpus()
+    # Unique messages: no coalescing of identical prompts, no cache hits
+    warmup, messages = ([f"{corpus[i % len(corpus)]['message']} (request {offset + i})" for i in range(count)]
+                        for offset, count in ((0, args.warmup), (args.warmup, args.messages)))
+    models = []
+
+    def make_model(**kwargs):
+        model = FakeChatModel(latency=args.llm_latency, tail_probability=tail_probability,
+                              tail_latency=args.tail_latency, seed=args.seed + len(models), **kwargs)
+        models.append(model)
+        return model
+
+    with offline_app() as app_module:
+        app_module.ChatGoogleGenerativeAI = make_model
+        app_module.response_cache = None
+        gateway = LLMGateway(max_concurrency=args.max_concurrency, hedge_percentile=args.hedge_percentile,
+                             hedge_max_rate=hedge_max_rate)
+        app_module.llm_gateway = gateway  # Read when the Chatbot is built
+        chatbot = app_module.get_chatbot_instance()
+
+        asyncio.run(_answer_all(chatbot, warmup, args.concurrency, 0))
+        before = gateway.stats()
+        tails_before = sum(model.tail_calls for model in models)
+        degraded_before = _degraded(app_module)
+
+        start = time.perf_counter()
+        latencies = asyncio.run(_answer_all(chatbot, messages, args.concurrency, budget))
+        wall = time.perf_counter() - start
+        after = gateway.stats()
+        degraded = _degraded(app_module) - degraded_before
+
+    calls = after["calls"] - before["calls"]
+    hedged = after["hedged"] - before["hedged"]
+    return {
+        "scenario": name,
+        "tail_probability": tail_probability,
+        "latency": summarize(latencies, wall),
+        "llm_calls": calls,
+        "tail_stalls": sum(model.tail_calls for model in models) - tails_before,
+        "hedged": hedged,
+        "hedge_wins": after["hedge_wins"] - before["hedge_wins"],
+        "hedge_rate": round(hedged / calls, 3) if calls else 0.0,
+        "deadline_exceeded": after["deadline_exceeded"] - before["deadline_exceeded"],
+        "degraded_rate": round(degraded / len(messages), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--max-concurrency", type=int, default=8, help="Gateway slots (LLM_MAX_CONCURRENCY)")
+    parser.add_argument("--llm-latency", type=float, default=0.1)
+    parser.add_argument("--tail-probability", type=float, nargs="+", default=[0.05, 0.3])
+    parser.add_argument("--tail-latency", type=float, default=3.0)
+    parser.add_argument("--hedge-percentile", type=float, default=95.0)
+    parser.add_argument("--hedge-max-rate", type=float, default=0.1)
+    parser.add_argument("--budget", type=float, default=1.0, help="Seconds per message in the deadline scenario")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    results = []
+    for tail_probability in args.tail_probability:
+        results += [
+            run_scenario(args, "baseline", tail_probability, hedge_max_rate=0.0, budget=0),
+            run_scenario(args, "hedged", tail_probability, hedge_max_rate=args.hedge_max_rate, budget=0),
+            run_scenario(args, "hedged+deadline", tail_probability, hedge_max_rate=args.hedge_max_rate,
+                         budget=args.budget),
+        ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
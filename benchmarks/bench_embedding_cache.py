@@ -0,0 +1,62 @@
+"""Remote embedding calls with and without CachedEmbeddings.
+
+Replays two workloads against a counting fake embedder: rebuilding the job
+index from scratch twice (e.g. after deleting db/), and a query log in which
+popular queries repeat.
+
+    python -m benchmarks.bench_embedding_cache --queries 500
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+
+from app import JOB_FILES_PATH, DataLoader, VectorDatabase
+from benchmarks.fakes import FakeEmbeddings
+from caching import CachedEmbeddings
+
+QUERY_POOL = [
+    "tech jobs in Bangalore", "remote software engineer roles", "any women in tech meetups?",
+    "data analyst openings", "product manager jobs", "hr jobs near me", "events this weekend",
+    "machine learning engineer", "accounting jobs", "executive assistant remote",
+]
+
+
+def rebuild_twice(embeddings, workdir: str) -> None:
+    documents = DataLoader([], []).load_documents_from_json([JOB_FILES_PATH])
+    for attempt in range(2):
+        VectorDatabase(embeddings, persist_directory=os.path.join(workdir, f"db-{attempt}")).sync_documents(documents)
+
+
+def replay_queries(embeddings, count: int) -> None:
+    rng = random.Random(3)
+    for _ in range(count):
+        embeddings.embed_query(rng.choice(QUERY_POOL))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for label, cached in (("uncached", False), ("cached", True)):
+            raw = FakeEmbeddings()
+            embeddings = CachedEmbeddings(raw, "fake-embedding", os.path.join(workdir, "cache.sqlite3")) if cached else raw
+            rebuild_twice(embeddings, os.path.join(workdir, label))
+            rebuild_calls = raw.calls
+            replay_queries(embeddings, args.queries)
+            results[label] = {
+                "rebuild_remote_calls": rebuild_calls,
+                "query_replay_remote_calls": raw.calls - rebuild_calls,
+                "texts_embedded": raw.texts_embedded,
+            }
+            if cached:
+                results[label]["cache"] = embeddings.stats()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Sequential chat requests against a chat model backed by a real grpc.aio channel.
+
+The Gemini client opens its grpc.aio channel on the first event loop that uses
+it and keeps it, while Flask runs every async view on a new loop. This starts
+a local grpc.aio server and swaps in a fake chat model whose calls go through
+one lazily created grpc.aio channel, like the real transport, then sends
+--requests sequential /api/chat and /api/chat/stream requests. Every one must
+succeed; the script exits 1 otherwise.
+
+--per-request-loop awaits the chatbot on each view's own loop instead of the
+worker loop, which reproduces the "Event loop is closed" failure:
+
+    python -m benchmarks.bench_event_loop
+    python -m benchmarks.bench_event_loop --per-request-loop   # expected to fail
+"""
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import grpc
+
+from benchmarks.fakes import FakeChatModel
+from benchmarks.harness import offline_app
+
+METHOD = "/neuronaari.bench.Echo/Generate"
+MESSAGE = "How can I prepare for a leadership role?"  # Mentorship: always reaches the chat model
+
+
+def start_server() -> int:
+    """A grpc.aio echo server on its own loop thread; returns its port."""
+    started = threading.Event()
+    port = []
+
+    async def echo(request: bytes, context) -> bytes:
+        return request
+
+    async def serve():
+        server = grpc.aio.server()
+        handler = grpc.unary_unary_rpc_method_handler(echo)
+        server.add_generic_rpc_handlers([grpc.method_handlers_generic_handler(
+            "neuronaari.bench.Echo", {"Generate": handler})])
+        port.append(server.add_insecure_port("127.0.0.1:0"))
+        await server.start()
+        started.set()
+        await server.wait_for_termination()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    started.wait(10)
+    return port[0]
+
+
+class GrpcChatModel(FakeChatModel):
+    """FakeChatModel whose answers make a round trip through one grpc.aio channel, opened on first use."""
+
+    def __init__(self, target: str, **kwargs):
+        super().__init__(**kwargs)
+        self.target = target
+        self._call = None
+
+    async def _remote(self, content: str) -> str:
+        if self._call is None:
+            self._call = grpc.aio.insecure_channel(self.target).unary_unary(METHOD)
+        return (await self._call(content.encode("utf-8"), timeout=10)).decode("utf-8")
+
+    async def ainvoke(self, prompt, **kwargs):
+        self._enter()
+        try:
+            return SimpleNamespace(content=await self._remote(self._respond(str(prompt))))
+        finally:
+            self.in_flight -= 1
+
+    async def astream(self, prompt, **kwargs):
+        self._enter()
+        try:
+            content = await self._remote(self._respond(str(prompt)))
+            for start in range(0, len(content), self.chunk_chars):
+                yield SimpleNamespace(content=content[start:start + self.chunk_chars])
+        finally:
+            self.in_flight -= 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=3, help="Sequential requests per endpoint")
+    parser.add_argument("--per-request-loop", action="store_true",
+                        help="Await the chatbot on each view's loop (the old behaviour)")
+    args = parser.parse_args()
+
+    target = f"127.0.0.1:{start_server()}"
+    results = []
+    with offline_app() as app_module:
+        app_module.ChatGoogleGenerativeAI = lambda **kwargs: GrpcChatModel(target, **kwargs)
+        app_module.response_cache = None
+        if args.per_request_loop:
+            async def on_view_loop(coro):
+                return await coro
+            app_module.on_worker_loop = on_view_loop
+        client = app_module.app.test_client()
+        for endpoint in ("/api/chat", "/api/chat/stream"):
+            for number in range(args.requests):
+                start = time.perf_counter()
+                response = client.post(endpoint, json={"message": f"{MESSAGE} ({endpoint} {number})"})
+                body = response.get_data(as_text=True)
+                ok = response.status_code == 200 and "event: error" not in body
+                results.append({"endpoint": endpoint, "request": number + 1, "status": response.status_code,
+                                "ok": ok, "ms": round((time.perf_counter() - start) * 1000, 1)})
+
+    failures = [result for result in results if not result["ok"]]
+    print(json.dumps({"per_request_loop": args.per_request_loop, "results": results,
+                      "failures": len(failures)}, indent=2))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
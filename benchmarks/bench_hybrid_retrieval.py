@@ -0,0 +1,75 @@
+"""Recall and latency of hybrid (BM25 + vector) retrieval vs. Chroma's default retriever.
+
+Each job in linkedin_jobs.json yields two queries: its title + company, and a
+phrase taken from its description. A query counts as recalled when a chunk of
+its source job is among the retrieved chunks.
+
+    python -m benchmarks.bench_hybrid_retrieval
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+
+from app import JOB_FILES_PATH, DataLoader, VectorDatabase
+from benchmarks.fakes import FakeEmbeddings
+from retrieval import HybridRetriever
+
+
+def build_queries(jobs):
+    queries = []
+    for job in jobs:
+        queries.append((f"{job['title']} {job['company']}", job["link"]))
+        words = job["description"].split()
+        if len(words) > 40:
+            queries.append((" ".join(words[20:32]), job["link"]))
+    return queries
+
+
+async def evaluate(retrieve, queries):
+    latencies, recalled, chunks = [], 0, 0
+    for query, link in queries:
+        start = time.perf_counter()
+        results = await retrieve(query)
+        latencies.append(time.perf_counter() - start)
+        chunks += len(results)
+        recalled += any(doc.metadata.get("record_id") == link for doc in results)
+    return {
+        "recall": round(recalled / len(queries), 3),
+        "chunks_per_query": round(chunks / len(queries), 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+    }
+
+
+async def main_async(args):
+    with open(JOB_FILES_PATH, "r", encoding="utf-8") as f:
+        jobs = json.load(f)
+    queries = build_queries(jobs)
+    embeddings = FakeEmbeddings()
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        raw_db = VectorDatabase(embeddings, persist_directory=f"{workdir}/raw")
+        raw_db.sync_documents(DataLoader([], [], mode="raw").load_documents_from_json([JOB_FILES_PATH]))
+        structured_db = VectorDatabase(embeddings, persist_directory=f"{workdir}/structured")
+        structured_db.sync_documents(DataLoader([], [], mode="structured").load_documents_from_json([JOB_FILES_PATH]))
+
+        default_retriever = raw_db.db.as_retriever()
+        hybrid = HybridRetriever(structured_db.db, k=args.k)
+        results["raw + as_retriever()"] = await evaluate(default_retriever.ainvoke, queries)
+        results[f"structured + hybrid (k={args.k})"] = await evaluate(hybrid.aretrieve, queries)
+        results["chunks_indexed"] = {"raw": raw_db.count(), "structured": structured_db.count()}
+    results["queries"] = len(queries)
+    print(json.dumps(results, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--k", type=int, default=3)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Full build vs. incremental re-sync of a synthetic job corpus.
+
+Builds a Chroma collection from N jobs, then changes a fraction of them
+(edits, removals and new postings) and syncs again.
+
+    python -m benchmarks.bench_incremental_sync --jobs 10000 --churn 0.01
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+
+from app import DataLoader, VectorDatabase
+from benchmarks.fakes import FakeEmbeddings
+
+
+def synthetic_jobs(count: int, seed: int = 7, prefix: str = ""):
+    rng = random.Random(seed)
+    titles = ["Software Engineer", "Data Analyst", "Product Manager", "HR Generalist", "UX Designer"]
+    cities = ["Bengaluru", "Pune", "Remote", "Hyderabad", "Delhi"]
+    return [{
+        "title": rng.choice(titles),
+        "company": f"Company {i % 500}",
+        "location": rng.choice(cities),
+        "description": " ".join(rng.choice(titles + cities) for _ in range(60)),
+        "date": "2025-04-19",
+        "link": f"https://example.com/jobs/{prefix}{i}",
+    } for i in range(count)]
+
+
+def churn(jobs, fraction: float, seed: int = 11):
+    rng = random.Random(seed)
+    jobs = [dict(job) for job in jobs]
+    changes = max(1, int(len(jobs) * fraction))
+    for job in rng.sample(jobs, changes // 3 or 1):
+        job["description"] += " Updated posting."
+    removed = set(id(job) for job in rng.sample(jobs, changes // 3 or 1))
+    jobs = [job for job in jobs if id(job) not in removed]
+    # Fresh postings, not copies of existing ones: the loader's deduplication would drop those
+    jobs.extend(synthetic_jobs(changes - 2 * (changes // 3), seed=seed, prefix="new-"))
+    return jobs
+
+
+def load(jobs, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(jobs, f)
+    return DataLoader([], []).load_documents_from_json([path])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=10000)
+    parser.add_argument("--churn", type=float, default=0.01)
+    args = parser.parse_args()
+
+    embeddings = FakeEmbeddings()
+    jobs = synthetic_jobs(args.jobs)
+    with tempfile.TemporaryDirectory() as workdir:
+        vector_db = VectorDatabase(embeddings, persist_directory=f"{workdir}/db")
+        full = vector_db.sync_documents(load(jobs, f"{workdir}/jobs.json"))
+        full_texts = embeddings.texts_embedded
+
+        start = time.perf_counter()
+        documents = load(churn(jobs, args.churn), f"{workdir}/jobs.json")
+        load_seconds = time.perf_counter() - start
+        incremental = vector_db.sync_documents(documents)
+
+    print(json.dumps({
+        "jobs": args.jobs,
+        "full_build": {"seconds": round(full.seconds, 2), "chunks_embedded": full_texts, "report": str(full)},
+        "incremental": {"seconds": round(incremental.seconds, 2), "load_seconds": round(load_seconds, 2),
+                        "chunks_embedded": embeddings.texts_embedded - full_texts, "report": str(incremental)},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
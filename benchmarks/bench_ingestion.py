@@ -0,0 +1,114 @@
+"""Loading a large job feed: json.load + a Document per item vs. the streaming, de-duplicating loader.
+
+Writes a synthetic feed built from sentences of the real postings: distinct
+jobs, exact re-posts under a new link and near duplicates (a few words
+changed). Each loader runs in its own process so peak memory is its own.
+
+    python -m benchmarks.bench_ingestion --jobs 100000 --format jsonl
+"""
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+
+def write_feed(path: str, jobs: int, exact_share: float, near_share: float, seed: int, jsonl: bool) -> dict:
+    rng = random.Random(seed)
+    with open("linkedin_jobs.json", "r", encoding="utf-8") as f:
+        base = json.load(f)
+    sentences = [sentence.strip() for job in base
+                 for sentence in re.split(r"(?<=[.!?])\s+", job.get("description") or "") if 5 <= len(sentence.split()) <= 40]
+    counts = {"distinct": 0, "exact": 0, "near": 0}
+    written = []  # Recent distinct postings to copy from
+    with open(path, "w", encoding="utf-8") as f:
+        if not jsonl:
+            f.write("[")
+        for i in range(jobs):
+            roll = rng.random()
+            if written and roll < exact_share:
+                job, kind = dict(rng.choice(written)), "exact"
+            elif written and roll < exact_share + near_share:
+                job, kind = dict(rng.choice(written)), "near"
+                words = job["description"].split()
+                for _ in range(max(1, len(words) // 60)):
+                    words[rng.randrange(len(words))] = rng.choice(("great", "exciting", "new", "global"))
+                job["description"] = " ".join(words)
+            else:
+                template = rng.choice(base)
+                job = {"title": f"{template['title']} {rng.choice(('I', 'II', 'III', 'Senior', 'Lead'))}",
+                       "company": f"{template['company']} {i % 997}", "location": template["location"],
+                       "date": template.get("date"), "description": " ".join(rng.sample(sentences, 8))}
+                kind = "distinct"
+                written.append(job)
+                written = written[-500:]
+            job["link"] = f"https://example.com/jobs/{i}"
+            counts[kind] += 1
+            if jsonl:
+                f.write(json.dumps(job) + "\n")
+            else:
+                f.write(("," if i else "") + json.dumps(job))
+        if not jsonl:
+            f.write("]")
+    return counts
+
+
+def _child(mode: str, path: str):
+    import app as app_module
+    from ingestion import peak_memory_mb
+
+    baseline = peak_memory_mb()  # The app's imports alone
+    start = time.perf_counter()
+    if mode == "legacy":
+        # What load_documents_from_json did before: the whole file, then every item
+        with open(path, "r", encoding="utf-8") as f:
+            items = json.load(f)
+        loader = app_module.DataLoader([], [], dedup=False)
+        documents = [loader._record_document(item, path) for item in items]
+        result = {"documents": len(documents)}
+    else:
+        loader = app_module.DataLoader([], [], dedup=mode == "streaming")
+        documents = sum(1 for _ in loader.iter_documents([path]))
+        stats = loader.ingestion_stats[path]
+        result = {"documents": documents, "exact_duplicates": stats.exact_duplicates,
+                  "near_duplicates": stats.near_duplicates}
+    elapsed = time.perf_counter() - start
+    result.update(seconds=round(elapsed, 2), baseline_memory_mb=baseline, peak_memory_mb=peak_memory_mb())
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=100_000)
+    parser.add_argument("--format", choices=("json", "jsonl"), default="json")
+    parser.add_argument("--exact-share", type=float, default=0.15)
+    parser.add_argument("--near-share", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=5)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, f"feed.{args.format}")
+        generated = write_feed(path, args.jobs, args.exact_share, args.near_share, args.seed, args.format == "jsonl")
+        results = {}
+        modes = ("streaming_no_dedup", "streaming") if args.format == "jsonl" else ("legacy", "streaming_no_dedup", "streaming")
+        for mode in modes:
+            completed = subprocess.run([sys.executable, "-m", "benchmarks.bench_ingestion", "--child", mode, path],
+                                       capture_output=True, text=True, check=True)
+            results[mode] = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(json.dumps({"jobs": args.jobs, "file_mb": round(os.path.getsize(path) / 2**20, 1),
+                          "generated": generated, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
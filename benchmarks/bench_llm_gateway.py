@@ -0,0 +1,93 @@
+"""Burst of concurrent chat/resume calls with and without the LLM gateway, against a fake Gemini.
+
+Each simulated request runs on its own thread and event loop, as Flask async
+views do. Reports upstream calls, peak upstream concurrency, coalesced and
+shed calls, and latency per priority.
+
+    python -m benchmarks.bench_llm_gateway --users 200 --max-concurrency 8 --max-queue 64
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+
+from benchmarks.fakes import FakeChatModel
+from benchmarks.harness import load_corpus, summarize
+from llm_gateway import LLMGateway, LLMOverloadedError, Priority
+
+
+def run_burst(model, call, prompts, priorities):
+    latencies = defaultdict(list)
+    shed = defaultdict(int)
+    lock = threading.Lock()
+
+    def request(prompt, priority):
+        async def go():
+            start = time.perf_counter()
+            try:
+                await call(prompt, priority)
+            except LLMOverloadedError:
+                with lock:
+                    shed[priority.name] += 1
+                return
+            with lock:
+                latencies[priority.name].append(time.perf_counter() - start)
+        asyncio.run(go())
+
+    threads = [threading.Thread(target=request, args=pair) for pair in zip(prompts, priorities)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    return {
+        "upstream_calls": model.calls,
+        "peak_upstream_concurrency": model.max_in_flight,
+        "wall_s": round(wall, 3),
+        "shed": dict(shed),
+        "latency": {name: summarize(values) for name, values in latencies.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200, help="Concurrent requests in the burst")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake LLM latency (s)")
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--trending-share", type=float, default=0.3, help="Share of requests with the same prompt")
+    parser.add_argument("--resume-share", type=float, default=0.2, help="Share of low-priority resume calls")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    messages = [row["message"] for row in load_corpus()]
+    prompts, priorities = [], []
+    for i in range(args.users):
+        if rng.random() < args.resume_share:
+            prompts.append(f"Review this resume #{i}")
+            priorities.append(Priority.RESUME)
+        else:
+            trending = rng.random() < args.trending_share
+            prompts.append(messages[0] if trending else f"{rng.choice(messages)} (user {i})")
+            priorities.append(Priority.CHAT)
+
+    direct_model = FakeChatModel(latency=args.latency)
+    direct = run_burst(direct_model, lambda prompt, priority: direct_model.ainvoke(prompt), prompts, priorities)
+
+    gated_model = FakeChatModel(latency=args.latency)
+    gateway = LLMGateway(max_concurrency=args.max_concurrency, max_queue=args.max_queue)
+    gated = gateway.wrap(gated_model, name="fake")
+    result = run_burst(gated_model, lambda prompt, priority: gated.ainvoke(prompt, priority=priority),
+                       prompts, priorities)
+    result["coalesced"] = gateway.coalesced
+
+    print(json.dumps({"users": args.users, "direct": direct, "gateway": result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
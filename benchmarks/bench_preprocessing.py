@@ -0,0 +1,29 @@
+"""Size of the community index with and without scraped-page preprocessing.
+
+    python -m benchmarks.bench_preprocessing
+"""
+import json
+
+from app import COMMUNITY_FILES_PATH, DataLoader, VectorDatabase
+
+
+def measure(mode: str):
+    loader = DataLoader([], [], mode=mode)
+    documents = loader.load_documents_from_json([COMMUNITY_FILES_PATH])
+    chunks, _ = VectorDatabase._split_documents(documents)
+    chars = sum(len(chunk.page_content) for chunk in chunks)
+    return {"documents": len(documents), "chunks": len(chunks), "chunk_chars": chars, "approx_tokens": chars // 4}
+
+
+def main():
+    raw, structured = measure("raw"), measure("structured")
+    print(json.dumps({
+        "raw": raw,
+        "preprocessed": structured,
+        "chunks_saved": raw["chunks"] - structured["chunks"],
+        "size_reduction": round(1 - structured["chunk_chars"] / raw["chunk_chars"], 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Prompt context with precomputed record cards vs. raw retrieved chunks, per query.
+
+Runs the enrichment job against a fake Gemini in two passes (the first
+stopped after --first-pass records, to show that the second resumes instead
+of starting over), then builds the Chatbot and retrieves context for every
+job/event query in the corpus with and without the cards.
+
+    python -m benchmarks.bench_record_cards --batch-size 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+
+from benchmarks.fakes import FakeChatModel
+from benchmarks.harness import load_corpus, offline_app
+from enrichment import CardEnricher, CardStore
+from retrieval import estimate_tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--first-pass", type=int, default=16, help="Records enriched before the simulated interruption")
+    args = parser.parse_args()
+
+    with offline_app() as app_module:
+        documents = app_module.DataLoader([], []).load_documents_from_json(
+            [app_module.JOB_FILES_PATH, app_module.COMMUNITY_FILES_PATH])
+        store = CardStore(os.path.join(app_module.VECTOR_DB_ROOT, "record_cards.sqlite3"))
+        model = FakeChatModel()
+        enricher = CardEnricher(model, store, batch_size=args.batch_size, concurrency=args.concurrency)
+        first = asyncio.run(enricher.enrich(documents, limit=args.first_pass))
+        calls_after_first = model.calls
+        resumed = asyncio.run(enricher.enrich(documents))
+
+        chatbot = app_module.get_chatbot_instance()
+        queries = [(row["intent"], row["message"]) for row in load_corpus()
+                   if row["intent"] in ("Job Opportunities", "Community Events")]
+        cards = chatbot.record_cards
+        tokens = {"raw": [], "cards": []}
+        for mode in ("raw", "cards"):
+            chatbot.record_cards = cards if mode == "cards" else {}
+            for intent, message in queries:
+                db = chatbot.job_db if intent == "Job Opportunities" else chatbot.community_db
+                context = asyncio.run(chatbot._retrieve_relevant_documents(db, message))
+                tokens[mode].append(estimate_tokens(context))
+        chatbot.record_cards = cards
+
+    raw_mean, card_mean = statistics.mean(tokens["raw"]), statistics.mean(tokens["cards"])
+    print(json.dumps({
+        "records": len(documents),
+        "first_pass": {"enriched": first.enriched, "llm_calls": calls_after_first},
+        "resumed_pass": {"skipped": resumed.skipped, "enriched": resumed.enriched, "failed": resumed.failed,
+                         "llm_calls": model.calls - calls_after_first},
+        "cards": store.count(),
+        "queries": len(queries),
+        "context_tokens_per_query": {"raw": round(raw_mean, 1), "cards": round(card_mean, 1),
+                                     "reduction": round(1 - card_mean / raw_mean, 3) if raw_mean else 0.0},
+        "card_stats": chatbot.card_stats,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Resume PDF extraction: temp file + serial concatenation vs. ResumeTextExtractor.
+
+Also times the pages split across a process pool (each worker parsing the file
+itself), the approach ResumeTextExtractor dropped for being slower.
+
+    python -m benchmarks.bench_resume_extraction --pages 2 10 20 --repeat 5
+"""
+import argparse
+import functools
+import io
+import json
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+import PyPDF2
+
+from benchmarks.pdfgen import make_pdf
+from resume import ResumeTextExtractor
+
+
+def legacy_extract(data: bytes) -> str:
+    """What /api/resume_review did before: spill to a temp file, then `+=` page by page."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
+        temp_file.write(data)
+        temp_filename = temp_file.name
+    text = ""
+    with open(temp_filename, "rb") as pdf_file:
+        reader = PyPDF2.PdfReader(pdf_file)
+        for page_number in range(len(reader.pages)):
+            text += reader.pages[page_number].extract_text()
+    os.unlink(temp_filename)
+    return text
+
+
+def _extract_pages(data: bytes, start: int, stop: int) -> List[str]:
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    return [reader.pages[number].extract_text() or "" for number in range(start, stop)]
+
+
+def pooled_extract(pool: ProcessPoolExecutor, workers: int, data: bytes) -> str:
+    """Page count in this process, then one contiguous page range per worker."""
+    page_count = len(PyPDF2.PdfReader(io.BytesIO(data)).pages)
+    step = -(-page_count // workers)
+    futures = [pool.submit(_extract_pages, data, start, min(start + step, page_count))
+               for start in range(0, page_count, step)]
+    return "\n".join(text for future in futures for text in future.result())
+
+
+def _throughput(ms: float):
+    return round(1000 / ms, 1) if ms else None
+
+
+def _median_ms(fn, data: bytes, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(data)
+        timings.append(time.perf_counter() - start)
+    return round(statistics.median(timings) * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[2, 10, 20])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=2, help="Processes of the process-pool variant")
+    args = parser.parse_args()
+
+    results = {}
+    with ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        for pages in args.pages:
+            data = make_pdf(pages)
+            uncached = ResumeTextExtractor(cache_size=0, max_pages=max(args.pages))
+            cached = ResumeTextExtractor(max_pages=max(args.pages))
+            cached.extract_pdf(data)
+            pooled = functools.partial(pooled_extract, pool, args.workers)
+            pooled(data)  # Start the pool's processes outside the timings
+            legacy_ms = _median_ms(legacy_extract, data, args.repeat)
+            in_memory_ms = _median_ms(uncached.extract_pdf, data, args.repeat)
+            pooled_ms = _median_ms(pooled, data, args.repeat)
+            results[f"{pages} pages"] = {
+                "bytes": len(data),
+                "legacy_ms": legacy_ms,
+                "in_memory_ms": in_memory_ms,
+                "process_pool_ms": pooled_ms,
+                "cache_hit_ms": _median_ms(cached.extract_pdf, data, args.repeat),
+                "legacy_throughput_per_s": _throughput(legacy_ms),
+                "in_memory_throughput_per_s": _throughput(in_memory_ms),
+                "process_pool_throughput_per_s": _throughput(pooled_ms),
+            }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Resume-to-job matching over a job store of --jobs synthetic postings.
+
+Fills a throwaway store (numpy or Chroma) with fake-embedded postings of
+--chunks-per-job chunks each, then measures:
+
+- the one-off JobMatcher build (pool every job's chunk vectors, find skills);
+- a match against the in-memory matrix, per resume;
+- the same match when the job vectors are read back from the store on every
+  request, i.e. without the in-memory cache.
+
+    python -m benchmarks.bench_resume_match --jobs 5000 --backend numpy
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+
+from benchmarks.fakes import FakeEmbeddings
+from benchmarks.harness import summarize
+from matching import JobMatcher, SkillExtractor
+
+ROLES = ["Software Engineer", "Data Analyst", "Accountant", "HR Coordinator", "Marketing Officer",
+         "Radiographer", "Warehouse Operator", "Executive Assistant", "Product Manager", "EHS Manager"]
+FILLER = ("We are looking for a motivated person to join our growing team and help us deliver great results "
+          "for our customers while learning every day in a supportive environment.").split()
+
+
+def _postings(skills: SkillExtractor, count: int, chunks_per_job: int, rng: random.Random):
+    for number in range(count):
+        role = rng.choice(ROLES)
+        record_id = f"job-{number}"
+        metadata = {"record_id": record_id, "title": f"{role} {number}", "company": f"Company {number % 97}",
+                    "location": rng.choice(["Remote", "Bangalore", "London", "Jakarta", "Rome"]), "link": ""}
+        for chunk in range(chunks_per_job):
+            listed = rng.sample(skills.names, 4)
+            words = rng.sample(FILLER, 12)
+            yield f"{role} at Company {number % 97}. Requirements: {', '.join(listed)}. {' '.join(words)}", metadata
+
+
+def _store(backend: str, directory: str, embeddings: FakeEmbeddings, texts, metadatas):
+    if backend == "numpy":
+        from vector_store import NumpyVectorStore
+
+        db = NumpyVectorStore(persist_directory=directory, embedding_function=embeddings)
+    else:
+        from langchain_chroma import Chroma
+
+        db = Chroma(persist_directory=directory, embedding_function=embeddings)
+    for start in range(0, len(texts), 5000):  # Chroma caps the rows of one add
+        db.add_texts(texts[start:start + 5000], metadatas=metadatas[start:start + 5000])
+    return db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--chunks-per-job", type=int, default=3)
+    parser.add_argument("--resumes", type=int, default=50)
+    parser.add_argument("--uncached-resumes", type=int, default=5, help="Matches that reload the store each time")
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--backend", choices=("chroma", "numpy"), default="numpy")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    skills = SkillExtractor.from_file()
+    embeddings = FakeEmbeddings()
+    texts, metadatas = map(list, zip(*_postings(skills, args.jobs, args.chunks_per_job, rng)))
+    resumes = []
+    for _ in range(args.resumes):
+        text = f"{rng.choice(ROLES)} with experience in {', '.join(rng.sample(skills.names, 8))}. " * 4
+        resumes.append((embeddings.embed_documents([text[:1000], text[1000:] or text]), skills.extract(text)))
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = _store(args.backend, directory, embeddings, texts, metadatas)
+        start = time.perf_counter()
+        matcher = JobMatcher(db, skills)
+        build_seconds = time.perf_counter() - start
+
+        cached = []
+        for vectors, resume_skills in resumes:
+            start = time.perf_counter()
+            matches = matcher.match(vectors, resume_skills, k=args.top_n)
+            cached.append(time.perf_counter() - start)
+        assert len(matches) == min(args.top_n, args.jobs)
+
+        uncached = []
+        for vectors, resume_skills in resumes[:args.uncached_resumes]:
+            start = time.perf_counter()
+            JobMatcher(db, skills).match(vectors, resume_skills, k=args.top_n)
+            uncached.append(time.perf_counter() - start)
+
+    print(json.dumps({
+        "backend": args.backend,
+        "jobs": len(matcher),
+        "chunks": matcher.chunks,
+        "build_ms": round(build_seconds * 1000, 1),
+        "match_cached": summarize(cached),
+        "match_reloading_store": summarize(uncached),
+        "llm_calls": 0,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Publishing and rolling back an index snapshot under load: errors, reload lag and request latency.
+
+Serves /api/chat from a few client threads in snapshot mode, publishes a
+snapshot built from a changed job feed, waits until every response carries
+its version (X-Index-Version), then rolls back and waits again. No request
+may fail while the worker swaps its Chatbot.
+
+    python -m benchmarks.bench_snapshot_reload --clients 4 --backend numpy
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+os.environ["VECTOR_DB_SYNC_MODE"] = "snapshot"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--backend", choices=("chroma", "numpy"), default="numpy")
+    parser.add_argument("--poll-seconds", type=float, default=0.2)
+    parser.add_argument("--changed-jobs", type=int, default=10, help="Job records edited in the new feed")
+    args = parser.parse_args()
+    os.environ["VECTOR_BACKEND"] = args.backend
+
+    from benchmarks.harness import load_corpus, offline_app, summarize
+
+    with offline_app() as app_module:
+        app_module.SNAPSHOT_POLL_SECONDS = args.poll_seconds
+        start = time.perf_counter()
+        chatbot = app_module.get_chatbot_instance()
+        first_build = time.perf_counter() - start
+        initial = chatbot.store_versions["jobs"]
+        persist_directory = os.path.join(app_module.VECTOR_DB_ROOT, app_module.VECTOR_STORES["jobs"][0])
+        manager = app_module.VectorDatabase.snapshot_manager(persist_directory, args.backend)
+
+        messages = [row["message"] for row in load_corpus() if row["intent"] == "Job Opportunities"]
+        client = app_module.app.test_client()
+        latencies, errors, seen = [], [], []  # seen: (time, jobs version) per response
+        stop = threading.Event()
+
+        def run_client(offset: int):
+            i = offset
+            while not stop.is_set():
+                request_start = time.perf_counter()
+                response = client.post("/api/chat", json={"message": messages[i % len(messages)]})
+                latencies.append(time.perf_counter() - request_start)
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+                versions = dict(part.split("=", 1) for part in response.headers.get("X-Index-Version", "").split(",") if part)
+                seen.append((time.perf_counter(), versions.get("jobs")))
+                i += 1
+
+        def wait_for(version: str, since: float) -> float:
+            # Until a whole poll interval's worth of responses carries `version`
+            deadline = time.perf_counter() + 60
+            while time.perf_counter() < deadline:
+                recent = [v for t, v in list(seen) if t > time.perf_counter() - args.poll_seconds]
+                if recent and all(v == version for v in recent) and seen[-1][0] > since:
+                    return time.perf_counter() - since
+                time.sleep(args.poll_seconds / 4)
+            raise TimeoutError(f"Workers never served {version}")
+
+        threads = [threading.Thread(target=run_client, args=(n,)) for n in range(args.clients)]
+        for thread in threads:
+            thread.start()
+        try:
+            documents = app_module.DataLoader([], []).load_documents_from_json([app_module.JOB_FILES_PATH])
+            edited = {document.metadata["record_id"] for document in documents[:args.changed_jobs]}
+            for document in documents:
+                if document.metadata["record_id"] in edited:
+                    document.page_content += "\nUpdated: now hiring remotely."
+                    document.metadata["content_hash"] += "-v2"
+            start = time.perf_counter()
+            published, report = app_module.VectorDatabase.publish_snapshot(
+                chatbot.embeddings, persist_directory, documents, backend=args.backend)
+            publish_seconds = time.perf_counter() - start
+            reload_lag = wait_for(published, start + publish_seconds)
+
+            start = time.perf_counter()
+            rolled_back = manager.rollback()
+            rollback_lag = wait_for(rolled_back, start)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    print(json.dumps({
+        "backend": args.backend,
+        "first_build_ms": round(first_build * 1000, 1),
+        "publish": {"snapshot": published, "sync": str(report), "build_ms": round(publish_seconds * 1000, 1),
+                    "serving_after_ms": round(reload_lag * 1000, 1)},
+        "rollback": {"snapshot": rolled_back, "back_to_initial": rolled_back == initial,
+                     "serving_after_ms": round(rollback_lag * 1000, 1)},
+        "requests": summarize(latencies),
+        "errors": len(errors),
+        "versions_served": sorted({v for _, v in seen if v}),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
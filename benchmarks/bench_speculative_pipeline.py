@@ -0,0 +1,53 @@
+"""process_message latency with speculative retrieval off, auto and always, against fake Gemini clients.
+
+With --llm-classifier the local intent model is bypassed, so every message
+pays for a Gemini classification call that speculation can overlap with
+retrieval.
+
+    python -m benchmarks.bench_speculative_pipeline --llm-latency 0.3 --embedding-latency 0.1 --llm-classifier
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.harness import load_corpus, offline_app, summarize
+
+MODES = ("off", "auto", "always")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--embedding-latency", type=float, default=0.1)
+    parser.add_argument("--llm-classifier", action="store_true", help="Always classify with the (fake) LLM")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    with offline_app(llm_latency=args.llm_latency, embedding_latency=args.embedding_latency) as app_module:
+        chatbot = app_module._build_chatbot()
+        chatbot.response_cache = None
+        if args.llm_classifier:
+            chatbot.intent_classifier.local_classifier = None
+
+        async def run_mode(mode: str):
+            chatbot.speculation = mode
+            chatbot.speculation_stats.update(runs=0, saved_seconds=0.0, wasted_retrievals=0, wasted_seconds=0.0)
+            latencies = []
+            for row in corpus:
+                # A per-mode suffix keeps the embedding cache from favouring later modes
+                start = time.perf_counter()
+                await chatbot.process_message(f"{row['message']} ({mode} run)", [])
+                latencies.append(time.perf_counter() - start)
+            stats = dict(chatbot.speculation_stats)
+            stats["saved_seconds"] = round(stats["saved_seconds"], 3)
+            stats["wasted_seconds"] = round(stats["wasted_seconds"], 3)
+            return {"latency": summarize(latencies), "speculation": stats}
+
+        results = {mode: asyncio.run(run_mode(mode)) for mode in MODES}
+
+    print(json.dumps({"messages": len(corpus), "llm_classifier": args.llm_classifier, "modes": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Worker start-up: import time of app.py, per-module import profile and time to first response.
+
+Import time comes from `python -X importtime -c "import app"` (median of
+--runs fresh interpreters). Then, for each STARTUP_MODE, a fresh process
+imports the app, runs the gunicorn post_worker_init hook with the offline
+(fake Gemini) Chatbot and measures when "/" first answers, when
+/api/health/ready turns 200 and when the first /api/chat returns.
+
+--check exits non-zero when the import exceeds --max-import-ms or pulls in
+a module app.py is meant to load lazily, so CI can keep start-up fast:
+
+    python -m benchmarks.bench_startup --check --output startup_profile.json
+"""
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+
+MODES = ("eager", "background", "lazy")
+
+
+def import_profile() -> dict:
+    """-X importtime of `import app`: total and cumulative time per top-level package, in ms."""
+    env = dict(os.environ, GOOGLE_API_KEY=os.environ.get("GOOGLE_API_KEY", "offline-benchmark"))
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"],
+                               capture_output=True, text=True, env=env, check=True)
+    packages = defaultdict(float)
+    total = 0.0
+    pending = []  # Direct imports seen since the last top-level entry; importtime lists children first
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split(":", 1)[1].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        module = name.strip()
+        if depth == 1:
+            pending.append((module.split(".")[0], int(cumulative) / 1000))
+        elif depth == 0:
+            if module == "app":
+                total = int(cumulative) / 1000
+                for package, ms in pending:
+                    packages[package] += ms
+            pending = []
+    return {"import_ms": round(total, 1),
+            "packages_ms": {name: round(ms, 1) for name, ms in sorted(packages.items(), key=lambda kv: -kv[1])}}
+
+
+def _child(mode: str):
+    start = time.perf_counter()
+    os.environ["STARTUP_MODE"] = mode
+    import app as app_module
+    imported = time.perf_counter() - start
+    lazy_loaded_at_import = app_module.readiness()["heavy_modules_loaded"]
+
+    fakes_start = time.perf_counter()
+    from benchmarks.harness import offline_app
+    start += time.perf_counter() - fakes_start  # The fakes' own imports are not part of a real worker's start-up
+
+    with offline_app() as app_module:
+        spec = importlib.util.spec_from_file_location("gunicorn_conf", "gunicorn.conf.py")
+        gunicorn_conf = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(gunicorn_conf)
+        log = SimpleNamespace(info=lambda *args: None, warning=lambda *args: None)
+        gunicorn_conf.post_worker_init(SimpleNamespace(pid=os.getpid(), log=log))
+        hook_done = time.perf_counter() - start
+
+        client = app_module.app.test_client()
+        assert client.get("/").status_code == 200
+        first_response = time.perf_counter() - start
+        while client.get("/api/health/ready").status_code != 200:
+            time.sleep(0.005)
+        ready = time.perf_counter() - start
+        response = client.post("/api/chat", json={"message": "Are there any remote software jobs?"})
+        assert response.status_code == 200, response.get_data(as_text=True)
+        first_chat = time.perf_counter() - start
+
+    print(json.dumps({
+        "import_ms": round(imported * 1000, 1),
+        "lazy_modules_loaded_at_import": lazy_loaded_at_import,
+        "hook_returned_ms": round(hook_done * 1000, 1),
+        "first_response_ms": round(first_response * 1000, 1),
+        "ready_ms": round(ready * 1000, 1),
+        "first_chat_ms": round(first_chat * 1000, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters for the import profile")
+    parser.add_argument("--top", type=int, default=15, help="Packages listed in the profile")
+    parser.add_argument("--check", action="store_true", help="Exit 1 when a start-up budget is exceeded")
+    parser.add_argument("--max-import-ms", type=float, default=1000.0)
+    parser.add_argument("--output", help="Also write the result to this JSON file")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child)
+        return
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    median_profile = profiles[len(profiles) // 2]
+    packages = {name: round(statistics.median(p["packages_ms"].get(name, 0.0) for p in profiles), 1)
+                for name in median_profile["packages_ms"]}
+    import_ms = statistics.median(p["import_ms"] for p in profiles)
+
+    modes = {}
+    for mode in MODES:
+        completed = subprocess.run([sys.executable, "-m", "benchmarks.bench_startup", "--child", mode],
+                                   capture_output=True, text=True, check=True)
+        modes[mode] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    failures = []
+    if import_ms > args.max_import_ms:
+        failures.append(f"import app took {import_ms:.0f} ms (budget {args.max_import_ms:.0f} ms)")
+    for mode, result in modes.items():
+        if result["lazy_modules_loaded_at_import"]:
+            failures.append(f"{mode}: import app loaded {', '.join(result['lazy_modules_loaded_at_import'])}")
+
+    result = {
+        "import_ms": import_ms,
+        "import_profile_ms": dict(sorted(packages.items(), key=lambda kv: -kv[1])[:args.top]),
+        "modes": modes,
+        "failures": failures,
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    if args.check and failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
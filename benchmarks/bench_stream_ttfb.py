@@ -0,0 +1,86 @@
+"""Time to the first answer content of /api/chat vs. /api/chat/stream with a fake streaming LLM.
+
+For the stream, first content is the first "item" or "token" event, i.e. the
+first model output (or "done", for an answer without either); the "intent"
+event, sent before the model is called, is timed separately. For /api/chat it
+is the first byte of the JSON body, which only arrives once the answer is done.
+
+    python -m benchmarks.bench_stream_ttfb --latency 0.3 --token-delay 0.05
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+import app as app_module  # noqa: E402
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings  # noqa: E402
+
+MESSAGES = {
+    "jobs": "Are there any remote software engineer jobs?",
+    "events": "Any women in tech meetups coming up?",
+    "mentorship": "How do I prepare for a technical interview?",
+}
+
+
+CONTENT_EVENTS = (b"event: item", b"event: token", b"event: done")
+
+
+def _measure(client, path: str, message: str):
+    """(first content, intent event or None, total) in seconds."""
+    start = time.perf_counter()
+    response = client.post(path, json={"message": message}, buffered=False)
+    streamed = response.mimetype == "text/event-stream"
+    first_content = intent = None
+    received = b""
+    for chunk in response.response:
+        if not chunk:
+            continue
+        if not streamed:
+            first_content = first_content or time.perf_counter() - start
+            continue
+        received += chunk if isinstance(chunk, bytes) else chunk.encode("utf-8")
+        if intent is None and b"event: intent" in received:
+            intent = time.perf_counter() - start
+        if first_content is None and any(event in received for event in CONTENT_EVENTS):
+            first_content = time.perf_counter() - start
+    total = time.perf_counter() - start
+    response.close()
+    return first_content or total, intent, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.3, help="fake time to first token (s)")
+    parser.add_argument("--token-delay", type=float, default=0.05, help="fake delay between chunks (s)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app_module.GOOGLE_API_KEY = os.environ["GOOGLE_API_KEY"]
+    app_module.ChatGoogleGenerativeAI = lambda **kwargs: FakeChatModel(
+        latency=args.latency, token_delay=args.token_delay, **kwargs)
+    app_module.GoogleGenerativeAIEmbeddings = FakeEmbeddings
+    app_module.response_cache = None  # Measure generation, not cache hits
+
+    results = {}
+    with tempfile.TemporaryDirectory() as db_root:
+        app_module.VECTOR_DB_ROOT = db_root
+        app_module._chatbot_instance = None
+        client = app_module.app.test_client()
+        for intent, message in MESSAGES.items():
+            for path in ("/api/chat", "/api/chat/stream"):
+                runs = [_measure(client, path, message) for _ in range(args.repeat)]
+                intent_times = [r[1] for r in runs if r[1] is not None]
+                results[f"{intent} {path}"] = {
+                    "first_content_ms": round(statistics.median(r[0] for r in runs) * 1000, 1),
+                    "intent_event_ms": round(statistics.median(intent_times) * 1000, 1) if intent_times else None,
+                    "total_ms": round(statistics.median(r[2] for r in runs) * 1000, 1),
+                }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
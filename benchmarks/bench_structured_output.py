@@ -0,0 +1,115 @@
+"""Items recovered from imperfect LLM answers: the old json.loads + ```json regex path vs. parse_items.
+
+Builds answers in the shapes Gemini actually produces (clean, prose around
+the array, fenced, trailing commas, truncated mid-object, bare objects,
+no JSON at all) from the real job records and counts what each parser keeps.
+
+It also checks the response schemas sent to Gemini: every required field of
+JobOpportunity, CommunityEvent and RecordCard must be among the schema's
+properties, or constrained decoding can never produce a valid item. --check
+exits 1 when one isn't.
+
+    python -m benchmarks.bench_structured_output --answers 500 --check
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import time
+
+from app import CommunityEvent, JobOpportunity
+from enrichment import RecordCard
+from structured_output import parse_items, response_schema, schema_instructions
+
+SHAPES = ("clean", "prose", "fenced", "trailing_comma", "truncated", "bare_objects", "no_json")
+
+
+def legacy_parse(content: str):
+    """What JobSearchAgent.run did before: all-or-nothing."""
+    try:
+        return [JobOpportunity(**item) for item in json.loads(content)]
+    except json.JSONDecodeError:
+        match = re.search(r"```json\n(.*?)\n```", content, re.DOTALL)
+        if match:
+            try:
+                return [JobOpportunity(**item) for item in json.loads(match.group(1).strip())]
+            except Exception:
+                return []
+        return []
+    except Exception:
+        return []
+
+
+def make_answer(rng: random.Random, jobs, shape: str) -> str:
+    items = [{"title": job.get("title") or "Untitled", "organization": job.get("company"),
+              "details": (job.get("description") or "")[:200], "url": job.get("link"),
+              "location": job.get("location")} for job in rng.sample(jobs, 3)]
+    body = json.dumps(items, indent=2)
+    if shape == "prose":
+        return f"Sure! Here are the matching jobs:\n{body}\nLet me know if you need more."
+    if shape == "fenced":
+        return f"```json\n{body}\n```"
+    if shape == "trailing_comma":
+        return body.replace('"\n  }', '",\n  }')
+    if shape == "truncated":
+        return body[:int(len(body) * 0.8)]
+    if shape == "bare_objects":
+        return "\n".join(json.dumps(item) for item in items)
+    if shape == "no_json":
+        return "I found a few relevant roles, including " + ", ".join(item["title"] for item in items) + "."
+    return body
+
+
+def schema_problems() -> dict:
+    """Required fields missing from the properties of each item schema, as sent and as prompted."""
+    problems = {}
+    for item_cls in (JobOpportunity, CommunityEvent, RecordCard):
+        items = response_schema(item_cls)["items"]
+        missing = sorted(set(items.get("required", [])) - set(items.get("properties", {})))
+        prompted = json.loads(schema_instructions(item_cls).split("JSON Schema: ", 1)[1].rsplit(". Respond", 1)[0])
+        if prompted["items"] != items:
+            missing.append("(prompt schema differs)")
+        problems[item_cls.__name__] = missing
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--answers", type=int, default=500)
+    parser.add_argument("--jobs-file", default="linkedin_jobs.json")
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--check", action="store_true", help="Exit 1 when a response schema is inconsistent")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with open(args.jobs_file, "r", encoding="utf-8") as f:
+        jobs = json.load(f)
+    answers = [(shape, make_answer(rng, jobs, shape)) for shape in (rng.choice(SHAPES) for _ in range(args.answers))]
+
+    results = {}
+    for name, parse in (("legacy", legacy_parse), ("tolerant", lambda text: parse_items(text, JobOpportunity).items)):
+        per_shape = {shape: {"answers": 0, "items": 0, "wasted": 0} for shape in SHAPES}
+        start = time.perf_counter()
+        for shape, text in answers:
+            items = parse(text)
+            per_shape[shape]["answers"] += 1
+            per_shape[shape]["items"] += len(items)
+            per_shape[shape]["wasted"] += not items
+        elapsed = time.perf_counter() - start
+        wasted = sum(counts["wasted"] for counts in per_shape.values())
+        results[name] = {
+            "items_recovered": sum(counts["items"] for counts in per_shape.values()),
+            "wasted_generations": wasted,
+            "failure_rate": round(wasted / len(answers), 3),
+            "us_per_answer": round(elapsed / len(answers) * 1e6, 1),
+            "per_shape": per_shape,
+        }
+    problems = schema_problems()
+    print(json.dumps({"answers": len(answers), "results": results, "schema_problems": problems}, indent=2))
+    if args.check and any(problems.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Chroma vs. the memory-mapped NumPy backend: load time, memory per worker and query latency.
+
+Both stores are built once from the real data files with fake embeddings;
+each measurement then runs in a fresh process, as a gunicorn worker would.
+Memory is read from /proc/self/status: RssAnon is private to the worker,
+RssFile is page cache that every worker mapping the same files shares.
+
+    python -m benchmarks.bench_vector_backend --queries 200
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+BACKENDS = ("chroma", "numpy")
+
+
+def _memory_kb() -> dict:
+    fields = {}
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "RssAnon", "RssFile"):
+                    fields[key] = int(value.split()[0])
+    except OSError:
+        pass
+    return fields
+
+
+def _child(backend: str, persist_directory: str, queries: int):
+    import app as app_module
+    from benchmarks.fakes import FakeEmbeddings
+    from benchmarks.harness import load_corpus, summarize
+
+    embeddings = FakeEmbeddings()
+    before = _memory_kb()
+    start = time.perf_counter()
+    vector_db = app_module.VectorDatabase(embeddings, persist_directory=persist_directory, backend=backend)
+    store = vector_db.db
+    store.similarity_search("warm up", k=4)
+    load_seconds = time.perf_counter() - start
+    loaded = _memory_kb()
+
+    messages = [row["message"] for row in load_corpus()]
+    latencies = []
+    for i in range(queries):
+        start = time.perf_counter()
+        store.similarity_search(messages[i % len(messages)], k=20)
+        latencies.append(time.perf_counter() - start)
+    result = {
+        "chunks": vector_db.count(),
+        "load_ms": round(load_seconds * 1000, 2),
+        "memory_delta_kb": {key: loaded.get(key, 0) - before.get(key, 0) for key in loaded},
+        "query": summarize(latencies),
+    }
+    if backend == "numpy":
+        batch = [messages[i % len(messages)] for i in range(queries)]
+        start = time.perf_counter()
+        store.similarity_search_batch(batch, k=20)
+        result["batch_query_ms_per_query"] = round((time.perf_counter() - start) / len(batch) * 1000, 3)
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--jobs-file", default="linkedin_jobs.json")
+    parser.add_argument("--child", nargs=2, metavar=("BACKEND", "DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child[0], args.child[1], args.queries)
+        return
+
+    import app as app_module
+    from benchmarks.fakes import FakeEmbeddings
+
+    documents = app_module.DataLoader([], []).load_documents_from_json([args.jobs_file])
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        for backend in BACKENDS:
+            persist_directory = os.path.join(root, "jobs")
+            start = time.perf_counter()
+            vector_db = app_module.VectorDatabase(FakeEmbeddings(), persist_directory=persist_directory, backend=backend)
+            vector_db.sync_documents(documents)
+            build_seconds = time.perf_counter() - start
+            disk_bytes = sum(os.path.getsize(os.path.join(folder, name))
+                             for folder, _, names in os.walk(vector_db.persist_directory) for name in names)
+            del vector_db
+
+            completed = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_vector_backend", "--queries", str(args.queries),
+                 "--child", backend, persist_directory],
+                capture_output=True, text=True, check=True
+            )
+            results[backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+            results[backend]["build_ms"] = round(build_seconds * 1000, 2)
+            results[backend]["disk_kb"] = disk_bytes // 1024
+
+    print(json.dumps({"records": len(documents), "backends": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Offline evaluation of the local intent classifier.
+
+Reports accuracy on the held-out set, how many messages are decided locally
+(i.e. skip the Gemini call) at each confidence threshold, and the accuracy of
+those local decisions.
+
+    python -m benchmarks.eval_intent --thresholds 0.7 0.8 0.9
+"""
+import argparse
+import json
+import time
+
+from intent import Intent, LocalIntentClassifier
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--train", default="data/intent_examples.jsonl")
+    parser.add_argument("--eval", default="data/intent_eval.jsonl")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.7, 0.8, 0.9])
+    args = parser.parse_args()
+
+    classifier = LocalIntentClassifier.from_jsonl(args.train)
+    with open(args.eval, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+
+    start = time.perf_counter()
+    predictions = [(classifier.predict(row["text"]), Intent(row["intent"])) for row in rows]
+    per_message_us = (time.perf_counter() - start) / len(rows) * 1e6
+
+    by_threshold = {}
+    for threshold in args.thresholds:
+        local = [(predicted, expected) for (predicted, confidence), expected in predictions if confidence >= threshold]
+        by_threshold[str(threshold)] = {
+            "llm_calls_avoided": round(len(local) / len(rows), 3),
+            "local_accuracy": round(sum(p is e for p, e in local) / len(local), 3) if local else None,
+        }
+
+    print(json.dumps({
+        "examples": len(rows),
+        "accuracy": round(sum(p is e for (p, _), e in predictions) / len(rows), 3),
+        "classify_us_per_message": round(per_message_us, 1),
+        "thresholds": by_threshold,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Deterministic local stand-ins for the Gemini chat model and embeddings.
+
+They let the benchmarks exercise the real Chatbot code paths (vector stores,
+agents, Flask endpoints) without an API key or network access.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from types import SimpleNamespace
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_DIM = 768  # Same width as models/embedding-001
+
+
+class FakeEmbeddings(Embeddings):
+    """Hashed bag-of-words embeddings: similar texts get similar vectors."""
+
+    def __init__(self, model: str = "fake-embedding", latency: float = 0.0, dim: int = EMBEDDING_DIM, **kwargs):
+        self.model = model
+        self.latency = latency
+        self.dim = dim
+        self.calls = 0
+        self.texts_embedded = 0
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for token in re.findall(r"\w+", text.lower()):
+            bucket = int.from_bytes(hashlib.md5(token.encode("utf-8")).digest()[:4], "little")
+            vector[bucket % self.dim] += 1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str], task_type: Optional[str] = None) -> List[List[float]]:
+        # task_type mirrors Gemini's signature (queries can be batched too); bag-of-words ignores it
+        self.calls += 1
+        self.texts_embedded += len(texts)
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class FakeChatModel:
+    """Answers the app's prompts with canned, well-formed output."""
+
+    def __init__(self, model: str = "fake-chat", latency: float = 0.0, token_delay: float = 0.0,
+                 chunk_chars: int = 16, tokens_per_second: float = 0.0, tail_probability: float = 0.0,
+                 tail_latency: float = 0.0, seed: Optional[int] = None, **kwargs):
+        self.model = model
+        self.latency = latency          # Time to first token
+        self.tail_probability = tail_probability  # Share of calls that stall for an extra tail_latency
+        self.tail_latency = tail_latency
+        self.random = random.Random(seed)
+        self.tail_calls = 0
+        self.token_delay = token_delay  # Time between streamed chunks
+        self.chunk_chars = chunk_chars
+        if tokens_per_second:           # ~4 characters per token, as the context packer assumes
+            self.token_delay = (chunk_chars / 4) / tokens_per_second
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0  # Highest number of overlapping calls seen (async calls only)
+
+    def _respond(self, prompt: str) -> str:
+        lowered = prompt.lower()
+        if "classify each numbered query" in lowered:
+            queries = re.findall(r"^(\d+): (.*)$", prompt.rsplit("Queries:", 1)[-1], re.M)
+            return "\n".join(f"{number}: {self._respond(f'classify it into one of the following categories: {query}')}"
+                             for number, query in queries)
+        if "classify it into one of the following categories" in lowered:
+            query = prompt.rsplit(":", 1)[-1].lower()
+            if any(word in query for word in ("event", "meetup", "conference", "workshop")):
+                return "Community Events"
+            if any(word in query for word in ("job", "hiring", "vacanc", "role", "opening")):
+                return "Job Opportunities"
+            return "Mentorship Programs"
+        if "recordcard" in lowered:
+            # One card per "Record N:" block: its first line as title, the next 25 words as summary
+            cards = []
+            for number, block in re.findall(r"Record (\d+):\n(.*?)(?=\n\nRecord \d+:\n|\Z)", prompt, re.S):
+                words = block.split()
+                cards.append({"record": int(number), "title": " ".join(words[:8]) or "Untitled",
+                              "summary": " ".join(words[8:33]), "key_requirements": words[33:36]})
+            return json.dumps(cards)
+        if "jobopportunity" in lowered:
+            return json.dumps([
+                {"title": "Software Engineer", "organization": "Example Corp",
+                 "details": "Build things.", "url": "https://example.com/jobs/1", "location": "Remote"}
+            ])
+        if "communityevent" in lowered:
+            return json.dumps([
+                {"title": "Women in Tech Meetup", "date": "Mar 7", "location": "Online",
+                 "description": "Talks and networking.", "url": "https://example.com/events/1"}
+            ])
+        return "Focus on one concrete goal this week and ask a mentor to review your progress."
+
+    def _generation_seconds(self, content: str) -> float:
+        chunks = max(1, -(-len(content) // self.chunk_chars))
+        tail = 0.0
+        if self.tail_probability and self.random.random() < self.tail_probability:
+            self.tail_calls += 1
+            tail = self.tail_latency
+        return self.latency + tail + self.token_delay * (chunks - 1)
+
+    def _enter(self):
+        # Plain int updates: callers may run on several event loops in different threads
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    async def ainvoke(self, prompt, **kwargs):
+        self._enter()
+        try:
+            content = self._respond(str(prompt))
+            delay = self._generation_seconds(content)
+            if delay:
+                await asyncio.sleep(delay)
+            return SimpleNamespace(content=content)
+        finally:
+            self.in_flight -= 1
+
+    async def astream(self, prompt, **kwargs):
+        self._enter()
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            content = self._respond(str(prompt))
+            for start in range(0, len(content), self.chunk_chars):
+                if start and self.token_delay:
+                    await asyncio.sleep(self.token_delay)
+                yield SimpleNamespace(content=content[start:start + self.chunk_chars])
+        finally:
+            self.in_flight -= 1
+
+    def invoke(self, prompt, **kwargs):
+        self.calls += 1
+        content = self._respond(str(prompt))
+        delay = self._generation_seconds(content)
+        if delay:
+            time.sleep(delay)
+        return SimpleNamespace(content=content)
@@ -0,0 +1,77 @@
+"""Shared plumbing for the benchmark scenarios: offline app setup and latency summaries."""
+import contextlib
+import json
+import math
+import os
+import subprocess
+import tempfile
+from typing import Dict, Iterator, List, Optional
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "corpus.jsonl")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of `values` (pct in 0-100)."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies: List[float], wall_seconds: Optional[float] = None) -> Dict[str, float]:
+    """p50/p95/p99/max in milliseconds, plus requests per second when the wall time is given."""
+    if not latencies:
+        return {"count": 0}
+    summary = {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+    }
+    if wall_seconds:
+        summary["throughput_rps"] = round(len(latencies) / wall_seconds, 2)
+    return summary
+
+
+def load_corpus(path: str = CORPUS_PATH) -> List[Dict[str, str]]:
+    """Request corpus: one {"intent", "message"} object per line."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextlib.contextmanager
+def offline_app(llm_latency: float = 0.0, tokens_per_second: float = 0.0,
+                embedding_latency: float = 0.0, db_root: Optional[str] = None) -> Iterator:
+    """Imports app.py with the Gemini clients replaced by fakes and a throwaway vector store root.
+
+    Yields the app module with no Chatbot built yet.
+    """
+    import app as app_module
+
+    app_module.GOOGLE_API_KEY = os.environ["GOOGLE_API_KEY"]
+    app_module.ChatGoogleGenerativeAI = lambda **kwargs: FakeChatModel(
+        latency=llm_latency, tokens_per_second=tokens_per_second, **kwargs)
+    app_module.GoogleGenerativeAIEmbeddings = lambda **kwargs: FakeEmbeddings(latency=embedding_latency, **kwargs)
+    with contextlib.ExitStack() as stack:
+        if db_root is None:
+            db_root = stack.enter_context(tempfile.TemporaryDirectory())
+        previous_root = app_module.VECTOR_DB_ROOT
+        app_module.VECTOR_DB_ROOT = db_root
+        app_module._chatbot_instance = None
+        try:
+            yield app_module
+        finally:
+            app_module._chatbot_instance = None
+            app_module.VECTOR_DB_ROOT = previous_root
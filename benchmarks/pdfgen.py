@@ -0,0 +1,38 @@
+"""Minimal synthetic PDF writer for the resume benchmarks (no third-party dependencies)."""
+
+
+def make_pdf(pages: int, lines_per_page: int = 45, seed_text: str = "Experienced software engineer") -> bytes:
+    """A valid PDF with `pages` pages of Helvetica text lines."""
+    font_id = 3
+    page_ids = []
+    next_id = 4
+    page_objects = []
+    for page in range(pages):
+        lines = [f"{seed_text} - page {page + 1} line {line + 1}: Python, SQL, leadership, mentoring."
+                 for line in range(lines_per_page)]
+        stream = "BT /F1 10 Tf 12 TL 40 800 Td " + " ".join(f"({line}) '" for line in lines) + " ET"
+        content_id, page_id = next_id, next_id + 1
+        next_id += 2
+        page_ids.append(page_id)
+        page_objects.append((content_id, f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream"))
+        page_objects.append((page_id, f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                                      f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>"))
+
+    body = {
+        1: "<< /Type /Catalog /Pages 2 0 R >>",
+        2: f"<< /Type /Pages /Kids [{' '.join(f'{pid} 0 R' for pid in page_ids)}] /Count {pages} >>",
+        3: "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    body.update(dict(page_objects))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for object_id in sorted(body):
+        offsets[object_id] = len(out)
+        out += f"{object_id} 0 obj\n{body[object_id]}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(body) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for object_id in sorted(body):
+        out += f"{offsets[object_id]:010d} 00000 n \n".encode("latin-1")
+    out += f"trailer\n<< /Size {len(body) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return bytes(out)
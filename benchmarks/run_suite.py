@@ -0,0 +1,227 @@
+"""Offline benchmark suite: cold start, index build, per-intent latency and a concurrent load test.
+
+Everything runs against the real app.py code paths with the fake Gemini
+clients from benchmarks.fakes, so no API key or network is needed. Results
+are printed (or written with --output) as JSON; pass --compare with an
+earlier result file to see the change per metric.
+
+    python -m benchmarks.run_suite --llm-latency 0.2 --tokens-per-second 80 --output bench.json
+    python -m benchmarks.run_suite --scenarios load --concurrency 16 --compare bench.json
+"""
+import argparse
+import asyncio
+import http.cookiejar
+import json
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from benchmarks.harness import git_commit, load_corpus, offline_app, summarize
+
+SCENARIOS = ("cold_start", "index_build", "query", "load")
+COMPARED_METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+
+
+def _child_cold_start(args) -> Dict[str, float]:
+    """Runs inside a fresh interpreter: import, build and answer one request."""
+    start = time.perf_counter()
+    with offline_app(args.llm_latency, args.tokens_per_second, args.embedding_latency, db_root=args.db_root) as app_module:
+        imported = time.perf_counter()
+        client = app_module.app.test_client()
+        response = client.post("/api/chat", json={"message": "Are there any remote software jobs?"})
+        assert response.status_code == 200, response.get_data(as_text=True)
+        answered = time.perf_counter()
+    return {"import_s": imported - start, "first_response_s": answered - imported, "total_s": answered - start}
+
+
+def run_cold_start(args) -> Dict[str, Any]:
+    """New processes against one index directory: the first builds the index, the rest reuse it."""
+    runs = []
+    with tempfile.TemporaryDirectory() as db_root:
+        for _ in range(args.cold_starts):
+            completed = subprocess.run(
+                [sys.executable, "-m", "benchmarks.run_suite", "--child-cold-start", "--db-root", db_root,
+                 "--llm-latency", str(args.llm_latency), "--tokens-per-second", str(args.tokens_per_second),
+                 "--embedding-latency", str(args.embedding_latency)],
+                capture_output=True, text=True, check=True
+            )
+            runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    warm_index = runs[1:] or runs
+    return {
+        "empty_index_total_ms": round(runs[0]["total_s"] * 1000, 2),
+        "existing_index": {
+            "import": summarize([run["import_s"] for run in warm_index]),
+            "first_response": summarize([run["first_response_s"] for run in warm_index]),
+            "total": summarize([run["total_s"] for run in warm_index]),
+        },
+    }
+
+
+def _embedding_stats(chatbot) -> Optional[Dict[str, float]]:
+    """Embedding cache counters of one build; every Chatbot wraps its own CachedEmbeddings."""
+    return chatbot.embeddings.stats() if hasattr(chatbot.embeddings, "stats") else None
+
+
+def run_index_build(args) -> Dict[str, Any]:
+    """Full build into an empty directory, then the incremental re-sync a restart performs."""
+    with offline_app(args.llm_latency, args.tokens_per_second, args.embedding_latency) as app_module:
+        start = time.perf_counter()
+        chatbot = app_module._build_chatbot()
+        full = time.perf_counter() - start
+        full_reports = {name: vars(report) for name, report in chatbot.sync_reports.items()}
+        full_embeddings = _embedding_stats(chatbot)
+
+        start = time.perf_counter()
+        chatbot = app_module._build_chatbot()
+        resync = time.perf_counter() - start
+        return {
+            "full_build_ms": round(full * 1000, 2),
+            "resync_ms": round(resync * 1000, 2),
+            "full_build_reports": full_reports,
+            "embedding_calls": {"full_build": full_embeddings, "resync": _embedding_stats(chatbot)},
+        }
+
+
+def run_query(args, corpus: List[Dict[str, str]]) -> Dict[str, Any]:
+    """process_message latency per intent, with the response cache off so every query is answered."""
+    by_intent = defaultdict(list)
+    for row in corpus:
+        by_intent[row["intent"]].append(row["message"])
+
+    with offline_app(args.llm_latency, args.tokens_per_second, args.embedding_latency) as app_module:
+        chatbot = app_module._build_chatbot()
+        chatbot.response_cache = None
+
+        async def measure() -> Dict[str, Any]:
+            results = {}
+            for intent, messages in by_intent.items():
+                latencies = []
+                for i in range(args.queries_per_intent):
+                    start = time.perf_counter()
+                    await chatbot.process_message(messages[i % len(messages)], [])
+                    latencies.append(time.perf_counter() - start)
+                results[intent] = summarize(latencies)
+            return results
+
+        return asyncio.run(measure())
+
+
+def run_load(args, corpus: List[Dict[str, str]]) -> Dict[str, Any]:
+    """Concurrent virtual users replaying the corpus against the app over HTTP."""
+    from werkzeug.serving import make_server
+
+    with offline_app(args.llm_latency, args.tokens_per_second, args.embedding_latency) as app_module:
+        app_module.get_chatbot_instance()  # Build before the clock starts, as the gunicorn hook does
+        server = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/api/chat"
+
+        latencies: List[float] = []
+        errors = 0
+        lock = threading.Lock()
+        per_user, extra = divmod(args.requests, args.concurrency)  # The first `extra` users send one more
+
+        def user(user_index: int):
+            nonlocal errors
+            opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+            first = user_index * per_user + min(user_index, extra)
+            for i in range(per_user + (user_index < extra)):
+                row = corpus[(first + i) % len(corpus)]
+                request = urllib.request.Request(url, data=json.dumps({"message": row["message"]}).encode("utf-8"),
+                                                 headers={"Content-Type": "application/json"})
+                start = time.perf_counter()
+                try:
+                    with opener.open(request, timeout=120) as response:
+                        response.read()
+                    with lock:
+                        latencies.append(time.perf_counter() - start)
+                except Exception:
+                    with lock:
+                        errors += 1
+
+        threads = [threading.Thread(target=user, args=(i,)) for i in range(args.concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+        server.shutdown()
+
+    result = summarize(latencies, wall)
+    result.update({"concurrency": args.concurrency, "errors": errors})
+    return result
+
+
+def compare(current: Any, baseline: Any, path: str = "") -> Dict[str, str]:
+    """Flattened "scenario.metric": "old -> new (+x%)" for the latency/throughput metrics in both results."""
+    changes = {}
+    if isinstance(current, dict) and isinstance(baseline, dict):
+        for key, value in current.items():
+            if key in baseline:
+                changes.update(compare(value, baseline[key], f"{path}.{key}" if path else key))
+    elif path.rsplit(".", 1)[-1] in COMPARED_METRICS and isinstance(current, (int, float)) and baseline:
+        changes[path] = f"{baseline} -> {current} ({(current - baseline) / baseline * 100:+.1f}%)"
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated subset of {SCENARIOS}")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Fake LLM time to first token (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Fake LLM generation rate (0 = instant)")
+    parser.add_argument("--embedding-latency", type=float, default=0.0, help="Fake embedding call latency (s)")
+    parser.add_argument("--cold-starts", type=int, default=3)
+    parser.add_argument("--queries-per-intent", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=200, help="Total requests in the load test")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--output", help="Write the JSON result here as well as printing it")
+    parser.add_argument("--compare", help="Earlier result file to diff against")
+    parser.add_argument("--child-cold-start", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--db-root", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_cold_start:
+        print(json.dumps(_child_cold_start(args)))
+        return
+
+    selected = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(selected) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    corpus = load_corpus()
+    results: Dict[str, Any] = {}
+    for name in selected:
+        print(f"Running {name}...", file=sys.stderr)
+        if name == "cold_start":
+            results[name] = run_cold_start(args)
+        elif name == "index_build":
+            results[name] = run_index_build(args)
+        elif name == "query":
+            results[name] = run_query(args, corpus)
+        else:
+            results[name] = run_load(args, corpus)
+
+    report = {
+        "commit": git_commit(),
+        "config": {key: value for key, value in vars(args).items()
+                   if key not in ("output", "compare", "child_cold_start", "db_root")},
+        "scenarios": results,
+    }
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            report["comparison"] = compare(results, json.load(f).get("scenarios", {}))
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
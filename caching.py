@@ -0,0 +1,310 @@
+"""Caching layers in front of the Gemini models used by app.py."""
+import array
+import asyncio
+import hashlib
+import inspect
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:  # Importing it pulls in langsmith (~0.5 s), which app start-up doesn't need yet
+    from langchain_core.embeddings import Embeddings
+
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace so trivially different copies of a text share a cache entry."""
+    return " ".join(text.split())
+
+
+def embed_queries(embeddings: "Embeddings", texts: List[str]) -> List[List[float]]:
+    """Query (not document) embeddings for several texts, in one request when the model allows it.
+
+    Gemini embeds queries and documents differently; its embed_documents takes a
+    task_type, so a batch of queries is one call instead of one call per query.
+    """
+    if isinstance(embeddings, CachedEmbeddings):
+        return embeddings.embed_queries(texts)
+    if "task_type" in inspect.signature(embeddings.embed_documents).parameters:
+        return embeddings.embed_documents(texts, task_type="RETRIEVAL_QUERY")
+    return [embeddings.embed_query(text) for text in texts]
+
+
+class CachedEmbeddings:
+    """Embeddings wrapper with a persistent, size-bounded SQLite cache.
+
+    It implements LangChain's Embeddings interface (sync and async methods)
+    without subclassing it, so importing this module stays cheap.
+
+    Entries are keyed by model name, embedding kind (document/query, which
+    Gemini embeds differently) and a hash of the normalized text. Cache misses
+    from one embed_documents call are de-duplicated and sent to the wrapped
+    model in batches. Once the cache holds more than `max_entries` vectors,
+    the least recently used are evicted down to 1% below the limit, so the
+    row count (tracked incrementally, re-counted only then) isn't re-scanned
+    on every insert. The SQLite file is opened in WAL mode so several worker
+    processes can share it.
+    """
+
+    def __init__(self, underlying: "Embeddings", model_name: str, cache_path: str,
+                 max_entries: int = 200_000, batch_size: int = 100):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+        self.remote_calls = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        (self._rows,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()  # Upper bound after this
+
+    def _key(self, kind: str, text: str) -> str:
+        payload = f"{self.model_name}\x00{kind}\x00{normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _encode(vector: List[float]) -> bytes:
+        return array.array("f", vector).tobytes()
+
+    @staticmethod
+    def _decode(blob: bytes) -> List[float]:
+        vector = array.array("f")
+        vector.frombytes(blob)
+        return vector.tolist()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                found.update((key, self._decode(blob)) for key, blob in rows)
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                       [(now, key) for key in found])
+                self._conn.commit()
+        return found
+
+    def _store(self, entries: Dict[str, List[float]]):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, self._encode(vector), now) for key, vector in entries.items()]
+            )
+            self._rows += len(entries)  # Misses, so almost always new keys; the recount below corrects it
+            if self._rows > self.max_entries:
+                # Other processes sharing the file insert too, so count exactly before evicting
+                (self._rows,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+                overflow = self._rows - self.max_entries
+                if overflow > 0:
+                    overflow += self.max_entries // 100  # Headroom, so the next recount is ~1% of inserts away
+                    self._conn.execute(
+                        "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                        (overflow,)
+                    )
+                    self._rows -= overflow
+                    self.evictions += overflow
+            self._conn.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed_cached("document", texts, self.underlying.embed_documents)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Query embeddings for several texts; the misses go to the wrapped model in batches, not one by one."""
+        return self._embed_cached("query", texts, lambda batch: embed_queries(self.underlying, batch))
+
+    def _embed_cached(self, kind: str, texts: List[str],
+                      embed_batch: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        keys = [self._key(kind, text) for text in texts]
+        cached = self._lookup(keys)
+
+        missing: Dict[str, str] = {}
+        misses = 0
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                misses += 1
+                missing.setdefault(key, text)
+        with self._lock:
+            self.hits += len(keys) - misses
+            self.misses += misses
+
+        missing_keys = list(missing)
+        for start in range(0, len(missing_keys), self.batch_size):
+            batch_keys = missing_keys[start:start + self.batch_size]
+            vectors = embed_batch([missing[key] for key in batch_keys])
+            with self._lock:
+                self.remote_calls += 1
+            fresh = dict(zip(batch_keys, vectors))
+            self._store(fresh)
+            cached.update(fresh)
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key("query", text)
+        cached = self._lookup([key])
+        with self._lock:
+            if key in cached:
+                self.hits += 1
+                return cached[key]
+            self.misses += 1
+        vector = self.underlying.embed_query(text)
+        with self._lock:
+            self.remote_calls += 1
+        self._store({key: vector})
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await asyncio.to_thread(self.embed_query, text)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "remote_calls": self.remote_calls,
+                "evictions": self.evictions,
+            }
+
+
+@dataclass
+class _CachedAnswer:
+    intent: str
+    vector: np.ndarray  # L2-normalized query embedding
+    index_version: str
+    response: Any
+    created_at: float
+
+
+class SemanticResponseCache:
+    """Answer cache keyed by intent plus query embedding.
+
+    A lookup hits when an earlier query with the same intent has cosine
+    similarity >= `similarity_threshold`, is younger than `ttl_seconds` and was
+    answered from the same index version. Entries are evicted LRU beyond
+    `max_entries`. Thread-safe; one instance is shared by the whole process.
+    """
+
+    def __init__(self, similarity_threshold: float = 0.95, ttl_seconds: float = 900, max_entries: int = 1000):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, _CachedAnswer]" = OrderedDict()
+        self._matrices: Dict[str, Any] = {}  # intent -> (entry ids, stacked vectors), rebuilt lazily
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.near_misses = 0  # Misses within 0.05 of the threshold, to help tuning it
+        self.expired = 0
+        self.invalidations = 0
+        self._lookup_seconds = 0.0
+        self._response_seconds = {True: 0.0, False: 0.0}
+        self._responses = {True: 0, False: 0}
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array_ = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array_)
+        return array_ / norm if norm else array_
+
+    def _matrix(self, intent: str):
+        if intent not in self._matrices:
+            ids = [entry_id for entry_id, entry in self._entries.items() if entry.intent == intent]
+            vectors = np.stack([self._entries[entry_id].vector for entry_id in ids]) if ids else None
+            self._matrices[intent] = (ids, vectors)
+        return self._matrices[intent]
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        self._matrices.pop(entry.intent, None)
+
+    def lookup(self, intent: str, query_embedding: List[float], index_version: str) -> Optional[Any]:
+        start = time.perf_counter()
+        query = self._normalize(query_embedding)
+        with self._lock:
+            try:
+                ids, vectors = self._matrix(intent)
+                if vectors is not None:
+                    similarities = vectors @ query
+                    for position in np.argsort(-similarities):
+                        similarity = float(similarities[position])
+                        if similarity < self.similarity_threshold:
+                            if similarity >= self.similarity_threshold - 0.05:
+                                self.near_misses += 1
+                            break
+                        entry = self._entries[ids[position]]
+                        if entry.index_version != index_version or time.time() - entry.created_at > self.ttl_seconds:
+                            self.expired += 1
+                            self._remove(ids[position])
+                            break
+                        self._entries.move_to_end(ids[position])
+                        self.hits += 1
+                        return entry.response
+                self.misses += 1
+                return None
+            finally:
+                self._lookup_seconds += time.perf_counter() - start
+
+    def store(self, intent: str, query_embedding: List[float], index_version: str, response: Any):
+        with self._lock:
+            self._entries[self._next_id] = _CachedAnswer(
+                intent, self._normalize(query_embedding), index_version, response, time.time()
+            )
+            self._next_id += 1
+            self._matrices.pop(intent, None)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self):
+        """Drops every entry, e.g. after the job/community collections were rebuilt."""
+        with self._lock:
+            self._entries.clear()
+            self._matrices.clear()
+            self.invalidations += 1
+
+    def record_response_time(self, hit: bool, seconds: float):
+        with self._lock:
+            self._response_seconds[hit] += seconds
+            self._responses[hit] += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "similarity_threshold": self.similarity_threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "near_misses": self.near_misses,
+                "expired": self.expired,
+                "invalidations": self.invalidations,
+                "avg_lookup_ms": self._lookup_seconds / lookups * 1000 if lookups else 0.0,
+                "avg_hit_response_ms": (self._response_seconds[True] / self._responses[True] * 1000
+                                        if self._responses[True] else 0.0),
+                "avg_miss_response_ms": (self._response_seconds[False] / self._responses[False] * 1000
+                                         if self._responses[False] else 0.0),
+            }
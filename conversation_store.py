@@ -0,0 +1,193 @@
+"""Server-side chat history, keyed by a conversation id kept in the session cookie."""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+SUMMARY_PREFIX = "Summary of earlier conversation:"
+
+
+@dataclass
+class Conversation:
+    """A bounded window of recent history lines plus a rolling summary of older ones."""
+    turns: List[str] = field(default_factory=list)
+    summary: str = ""
+
+    def history(self) -> List[str]:
+        """History lines in the form Chatbot.process_message expects, summary first."""
+        return ([f"{SUMMARY_PREFIX} {self.summary}"] if self.summary else []) + self.turns
+
+
+def recent_history(lines: List[str], count: int = 5) -> List[str]:
+    """The last `count` lines, keeping a leading rolling summary line if there is one."""
+    if lines and lines[0].startswith(SUMMARY_PREFIX) and len(lines) > count:
+        return [lines[0]] + lines[-count:]
+    return lines[-count:]
+
+
+def _compact_line(line: str, max_chars: int) -> str:
+    """Condenses one history line for the summary: user lines are kept, bot replies are clipped."""
+    line = " ".join(line.split())
+    if line.startswith("Bot:"):
+        max_chars = min(max_chars, 80)
+    return line if len(line) <= max_chars else line[:max_chars - 3].rstrip() + "..."
+
+
+class ConversationStore:
+    """Base store: bounded windows, rolling summaries and per-conversation locks.
+
+    Lines pushed out of the `window` most recent ones are compacted into the
+    summary (user messages kept, bot replies clipped), which is itself trimmed
+    from the front to `summary_chars`. Subclasses only load and save a
+    Conversation; `append` does the read-modify-write under the conversation's
+    lock so concurrent requests from one user don't drop each other's turns.
+    """
+
+    def __init__(self, window: int = 10, summary_chars: int = 600, ttl_seconds: float = 7 * 24 * 3600):
+        self.window = window
+        self.summary_chars = summary_chars
+        self.ttl_seconds = ttl_seconds
+        self._locks: Dict[str, list] = {}  # conversation_id -> [lock, callers holding or waiting for it]
+        self._locks_guard = threading.Lock()
+
+    @contextmanager
+    def _locked(self, conversation_id: str) -> Iterator[None]:
+        """Holds the conversation's lock; its entry is dropped once no caller holds or waits for it."""
+        with self._locks_guard:
+            entry = self._locks.get(conversation_id)
+            if entry is None:
+                entry = self._locks[conversation_id] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[conversation_id]
+
+    def _load(self, conversation_id: str) -> Optional[Conversation]:
+        raise NotImplementedError
+
+    def _save(self, conversation_id: str, conversation: Conversation):
+        raise NotImplementedError
+
+    def get(self, conversation_id: str) -> Conversation:
+        with self._locked(conversation_id):
+            return self._load(conversation_id) or Conversation()
+
+    def _append_locked(self, conversation_id: str, lines) -> Conversation:
+        conversation = self._load(conversation_id) or Conversation()
+        conversation.turns.extend(lines)
+        overflow = len(conversation.turns) - self.window
+        if overflow > 0:
+            compacted = [_compact_line(line, self.summary_chars) for line in conversation.turns[:overflow]]
+            summary = " | ".join(filter(None, [conversation.summary] + compacted))
+            if len(summary) > self.summary_chars:
+                summary = "..." + summary[-(self.summary_chars - 3):]
+            conversation.summary = summary
+            conversation.turns = conversation.turns[overflow:]
+        self._save(conversation_id, conversation)
+        return conversation
+
+    def append(self, conversation_id: str, *lines: str) -> Conversation:
+        """Adds lines to the conversation, compacting whatever falls out of the window."""
+        with self._locked(conversation_id):
+            return self._append_locked(conversation_id, lines)
+
+    def stats(self) -> Dict[str, float]:
+        raise NotImplementedError
+
+
+class MemoryConversationStore(ConversationStore):
+    """Per-process LRU store; idle conversations expire after `ttl_seconds`."""
+
+    def __init__(self, max_conversations: int = 10000, **kwargs):
+        super().__init__(**kwargs)
+        self.max_conversations = max_conversations
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._entries_lock = threading.Lock()
+
+    def _load(self, conversation_id: str) -> Optional[Conversation]:
+        with self._entries_lock:
+            entry = self._entries.get(conversation_id)
+            if entry is None:
+                return None
+            conversation, updated_at = entry
+            if time.time() - updated_at > self.ttl_seconds:
+                del self._entries[conversation_id]
+                return None
+            self._entries.move_to_end(conversation_id)
+            return Conversation(turns=list(conversation.turns), summary=conversation.summary)
+
+    def _save(self, conversation_id: str, conversation: Conversation):
+        with self._entries_lock:
+            self._entries[conversation_id] = (conversation, time.time())
+            self._entries.move_to_end(conversation_id)
+            while len(self._entries) > self.max_conversations:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        return {"backend": "memory", "conversations": len(self._entries)}
+
+
+class SQLiteConversationStore(ConversationStore):
+    """Store shared by every worker process through one SQLite file (WAL mode).
+
+    The per-conversation locks only cover threads in this process; across
+    processes each append runs in an IMMEDIATE transaction.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS conversations "
+            "(id TEXT PRIMARY KEY, turns TEXT NOT NULL, summary TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS conversations_updated_at ON conversations (updated_at)")
+        self._conn_lock = threading.RLock()
+        self._appends = 0
+
+    def _load(self, conversation_id: str) -> Optional[Conversation]:
+        with self._conn_lock:
+            row = self._conn.execute(
+                "SELECT turns, summary, updated_at FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+        if row is None or time.time() - row[2] > self.ttl_seconds:
+            return None
+        return Conversation(turns=json.loads(row[0]), summary=row[1])
+
+    def _save(self, conversation_id: str, conversation: Conversation):
+        with self._conn_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO conversations (id, turns, summary, updated_at) VALUES (?, ?, ?, ?)",
+                (conversation_id, json.dumps(conversation.turns), conversation.summary, time.time())
+            )
+
+    def append(self, conversation_id: str, *lines: str) -> Conversation:
+        with self._locked(conversation_id), self._conn_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                conversation = self._append_locked(conversation_id, lines)
+                self._appends += 1
+                if self._appends % 500 == 0:  # Expire idle conversations now and then
+                    self._conn.execute("DELETE FROM conversations WHERE updated_at < ?",
+                                       (time.time() - self.ttl_seconds,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return conversation
+
+    def stats(self) -> Dict[str, float]:
+        with self._conn_lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM conversations").fetchone()
+        return {"backend": "sqlite", "conversations": count}
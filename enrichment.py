@@ -0,0 +1,272 @@
+"""Offline enrichment: a compact, normalized card per job/event record, generated once with Gemini.
+
+Raw records are long (full job descriptions, recruitment pages in other
+languages with process steps and form fields), yet the agents only need a
+title, organization, location, a short English summary, key requirements and
+a URL. `CardEnricher` writes those cards to a SQLite `CardStore` ahead of
+time, a batch of records per Gemini call. Every batch is committed as it
+completes, so an interrupted run resumes where it stopped; a card is keyed on
+the record's content_hash, so changed records get a fresh card and untouched
+ones are never regenerated. At query time `apply_cards` swaps retrieved
+chunks for their record's card.
+
+    python -m enrichment --batch-size 8 --concurrency 4
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from pydantic import BaseModel, Field
+
+from retrieval import estimate_tokens
+from structured_output import parse_items, response_schema, schema_instructions
+
+CARD_VERSION = "1"  # Part of a card's key: bump when the prompt or card fields change to regenerate every card
+MAX_RECORD_CHARS = 4000  # Of each raw record sent for enrichment; summaries don't need the whole page
+
+
+class RecordCard(BaseModel):
+    record: int = Field(..., description="Number of the record this card describes")
+    title: str = Field(..., description="Job or event title, in English")
+    organization: Optional[str] = Field(None, description="Company or organizer")
+    location: Optional[str] = Field(None, description="City/country, or Remote/Online")
+    date: Optional[str] = Field(None, description="Event date or job posting date, if stated")
+    summary: str = Field(..., description="One or two sentences in English")
+    key_requirements: List[str] = Field(default_factory=list, description="At most 5 short requirements")
+    url: Optional[str] = Field(None, description="Link to the listing or registration page")
+
+    def to_text(self) -> str:
+        lines = [f"{label}: {value}" for label, value in (
+            ("Title", self.title), ("Organization", self.organization), ("Location", self.location),
+            ("Date", self.date), ("Summary", self.summary),
+            ("Requirements", "; ".join(self.key_requirements[:5])), ("URL", self.url),
+        ) if value]
+        return "\n".join(lines)
+
+
+def card_prompt(records: List[str]) -> str:
+    listing = "\n\n".join(f"Record {number}:\n{text}" for number, text in enumerate(records, start=1))
+    return (f"Write one compact card per record below (job postings or community events, possibly not in English). "
+            f"Translate to English, keep only what a job seeker needs, and set `record` to the record's number. "
+            f"{schema_instructions(RecordCard)}\n\n{listing}")
+
+
+class CardStore:
+    """Cards keyed by record_id, stored with the content_hash and CARD_VERSION they were made for.
+
+    SQLite in WAL mode: the enrichment job writes while app workers read.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cards (record_id TEXT PRIMARY KEY, content_hash TEXT NOT NULL, "
+            "version TEXT NOT NULL, card TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def load(self) -> Dict[str, Tuple[str, RecordCard]]:
+        """record_id -> (content_hash, card) for every card of the current CARD_VERSION."""
+        with self._lock:
+            rows = self._conn.execute("SELECT record_id, content_hash, card FROM cards WHERE version = ?",
+                                      (CARD_VERSION,)).fetchall()
+        return {record_id: (record_hash, RecordCard.model_validate_json(card)) for record_id, record_hash, card in rows}
+
+    def pending(self, documents: List[Document]) -> List[Document]:
+        """The records without an up-to-date card."""
+        with self._lock:
+            done = set(self._conn.execute("SELECT record_id, content_hash FROM cards WHERE version = ?",
+                                          (CARD_VERSION,)).fetchall())
+        return [document for document in documents
+                if (document.metadata.get("record_id"), document.metadata.get("content_hash")) not in done]
+
+    def put_many(self, cards: List[Tuple[str, str, RecordCard]]):
+        """Stores (record_id, content_hash, card) rows in one transaction: the checkpoint of a batch."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cards (record_id, content_hash, version, card, created) VALUES (?, ?, ?, ?, ?)",
+                [(record_id, record_hash, CARD_VERSION, card.model_dump_json(), now)
+                 for record_id, record_hash, card in cards]
+            )
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cards WHERE version = ?", (CARD_VERSION,)).fetchone()[0]
+
+
+@dataclass
+class EnrichmentReport:
+    records: int = 0
+    skipped: int = 0   # Already had an up-to-date card
+    enriched: int = 0
+    failed: int = 0    # Left without a card; picked up again by the next run
+    batches: int = 0
+    raw_tokens: int = 0
+    card_tokens: int = 0
+    seconds: float = 0.0
+
+    def __str__(self) -> str:
+        shrink = 1 - self.card_tokens / self.raw_tokens if self.raw_tokens else 0.0
+        return (f"{self.records} records: {self.enriched} enriched, {self.skipped} skipped, {self.failed} failed "
+                f"in {self.batches} batches, {self.raw_tokens:,} -> {self.card_tokens:,} tokens ({shrink:.0%} smaller) "
+                f"in {self.seconds:.1f}s")
+
+
+class CardEnricher:
+    """Generates the missing cards for a list of records (one Document per record, as DataLoader returns them)."""
+
+    def __init__(self, model: Any, store: CardStore, batch_size: int = 8, concurrency: int = 4,
+                 max_record_chars: int = MAX_RECORD_CHARS, **invoke_kwargs: Any):
+        self.model = model
+        self.store = store
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_record_chars = max_record_chars
+        self.invoke_kwargs = invoke_kwargs  # e.g. priority=Priority.ENRICHMENT for a gateway-wrapped model
+
+    @staticmethod
+    def _card_for(document: Document, card: RecordCard) -> RecordCard:
+        # Links extracted at ingestion are exact, the model's copy may not be; fill gaps from metadata
+        metadata = document.metadata
+        return card.model_copy(update={
+            "url": metadata.get("link") or card.url,
+            "title": card.title or metadata.get("title") or "",
+            "organization": card.organization or metadata.get("company") or None,
+        })
+
+    async def _enrich_batch(self, batch: List[Document], report: EnrichmentReport):
+        records = [" ".join(document.page_content.split())[:self.max_record_chars] for document in batch]
+        try:
+            response = await self.model.ainvoke(card_prompt(records), **self.invoke_kwargs)
+            result = parse_items(response.content, RecordCard)
+        except Exception as e:
+            print(f"Enrichment batch of {len(batch)} failed, will retry on the next run: {e}")
+            report.failed += len(batch)
+            return
+        cards: Dict[int, RecordCard] = {}
+        for card in result.items:
+            if 1 <= card.record <= len(batch):
+                cards.setdefault(card.record, card)
+        rows = []
+        for number, document in enumerate(batch, start=1):
+            card = cards.get(number)
+            if card is None:
+                report.failed += 1
+                continue
+            card = self._card_for(document, card)
+            rows.append((document.metadata["record_id"], document.metadata.get("content_hash", ""), card))
+            report.raw_tokens += estimate_tokens(document.page_content)
+            report.card_tokens += estimate_tokens(card.to_text())
+        self.store.put_many(rows)
+        report.enriched += len(rows)
+        report.batches += 1
+
+    async def enrich(self, documents: List[Document], limit: Optional[int] = None) -> EnrichmentReport:
+        start = time.perf_counter()
+        report = EnrichmentReport(records=len(documents))
+        pending = self.store.pending(documents)
+        report.skipped = len(documents) - len(pending)
+        if limit is not None:
+            pending = pending[:limit]
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(batch: List[Document]):
+            async with semaphore:
+                await self._enrich_batch(batch, report)
+
+        await asyncio.gather(*(run(pending[i:i + self.batch_size]) for i in range(0, len(pending), self.batch_size)))
+        report.seconds = time.perf_counter() - start
+        return report
+
+
+@dataclass
+class CardUsage:
+    """What swapping retrieved chunks for cards did to one query's context."""
+    records_carded: int = 0
+    records_raw: int = 0   # No up-to-date card yet; raw chunks kept
+    raw_tokens: int = 0    # Of the carded records' retrieved chunks
+    card_tokens: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.raw_tokens - self.card_tokens)
+
+
+def apply_cards(documents: List[Document], cards: Dict[str, Tuple[str, RecordCard]]) -> Tuple[List[Document], CardUsage]:
+    """Replaces the retrieved chunks of each carded record by one card Document, keeping rank order."""
+    usage = CardUsage()
+    raw_texts: Dict[str, List[str]] = {}
+    result: List[Document] = []
+    seen = set()
+    for document in documents:
+        record_id = document.metadata.get("record_id")
+        entry = cards.get(record_id) if record_id else None
+        if entry is None or entry[0] != document.metadata.get("content_hash"):
+            result.append(document)
+            if record_id not in seen:
+                seen.add(record_id)
+                usage.records_raw += 1
+            continue
+        raw_texts.setdefault(record_id, []).append(document.page_content)
+        if record_id in seen:
+            continue
+        seen.add(record_id)
+        metadata = {key: value for key, value in document.metadata.items() if key != "start_index"}
+        text = entry[1].to_text()
+        result.append(Document(page_content=text, metadata=metadata))
+        usage.records_carded += 1
+        usage.card_tokens += estimate_tokens(text)
+    usage.raw_tokens = sum(estimate_tokens("\n".join(texts)) for texts in raw_texts.values())
+    return result, usage
+
+
+def cards_fingerprint(cards: Dict[str, Tuple[str, RecordCard]]) -> str:
+    """Digest of every card's record id, record hash and text: changes whenever a card is added, rewritten or dropped."""
+    digest = hashlib.sha256()
+    for record_id in sorted(cards):
+        record_hash, card = cards[record_id]
+        digest.update(f"{record_id}\x00{record_hash}\x00{card.to_text()}\x00".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the missing record cards for the job and event files.")
+    parser.add_argument("--batch-size", type=int, default=8, help="Records per Gemini call")
+    parser.add_argument("--concurrency", type=int, default=4, help="Batches in flight")
+    parser.add_argument("--limit", type=int, default=None, help="Enrich at most this many records in this run")
+    args = parser.parse_args()
+
+    import app as app_module  # Loaded here: the app imports this module
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from llm_gateway import Priority
+
+    model = app_module.llm_gateway.wrap(
+        ChatGoogleGenerativeAI(model="gemini-2.0-flash", google_api_key=app_module.GOOGLE_API_KEY,
+                               response_mime_type="application/json", response_schema=response_schema(RecordCard)),
+        name="gemini-2.0-flash-json-RecordCard"
+    )
+    documents = app_module.DataLoader([], []).load_documents_from_json(
+        [app_module.JOB_FILES_PATH, app_module.COMMUNITY_FILES_PATH])
+    store = CardStore(app_module.RECORD_CARDS_PATH or os.path.join(app_module.VECTOR_DB_ROOT, "record_cards.sqlite3"))
+    enricher = CardEnricher(model, store, batch_size=args.batch_size,
+                            concurrency=args.concurrency, priority=Priority.ENRICHMENT)
+    report = asyncio.run(enricher.enrich(documents, limit=args.limit))
+    print(f"Record cards: {report}")
+    print(json.dumps(app_module.llm_gateway.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""Gunicorn settings for the Neuro Naari API (picked up automatically by `gunicorn app:app`)."""
+import os
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+# The app is deliberately NOT preloaded in the master: the Gemini clients hold
+# gRPC channels, which must not be shared across fork(). Each worker builds its
+# own Chatbot instead, right after it has imported the app: before it accepts
+# its first connection (STARTUP_MODE=eager) or in a background thread while it
+# already serves (background, the default); "lazy" leaves it to the first request.
+preload_app = False
+
+
+def post_worker_init(worker):
+    from app import STARTUP_MODE, start_background_warmup, warm_chatbot_instance
+
+    if STARTUP_MODE == "background":
+        # Answers /api/health at once; /api/health/ready turns 200 when the build is done
+        start_background_warmup()
+        worker.log.info("Chatbot warming in the background in worker %s", worker.pid)
+    elif STARTUP_MODE == "eager":
+        if warm_chatbot_instance():
+            worker.log.info("Chatbot warmed in worker %s", worker.pid)
+        else:
+            worker.log.warning("Chatbot warm-up failed in worker %s; it will be retried on first request", worker.pid)
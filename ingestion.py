@@ -0,0 +1,329 @@
+"""Ingestion-time preprocessing of the scraped community pages in scraped_data.json.
+
+The scraper stores each page's full markdown, including cookie banners, skip
+links, images, navigation, share buttons and footers. preprocess_scraped_pages()
+keeps the event-relevant text, pulls out title/date/venue/description/
+registration link, and drops lines that are shared boilerplate across pages,
+so fewer and denser chunks get embedded and sent to the LLM.
+
+It also holds the streaming side of ingestion for large job feeds:
+iter_json_records() reads JSON arrays and JSONL without loading the file, and
+Deduplicator drops re-posted jobs (exact copies and MinHash near-duplicates)
+before they are embedded.
+"""
+import hashlib
+import json
+import re
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PREPROCESSOR_VERSION = "1"  # Part of the record hash, so changing the rules re-embeds the pages
+
+_NESTED_IMAGE_LINK = re.compile(r"\[!\[[^\]]*\]\([^)]*\)\]\([^)]*\)")
+_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_LINK = re.compile(r"\[([^\]]*)\]\(([^)\s]*)(?:\s+\"[^\"]*\")?\)")
+_SHARE_URL = re.compile(r"(sharer|intent/tweet|shareArticle|^mailto:|^javascript:|^#|/login|/signin|/signup)", re.I)
+_TRACKING_PARAMS = re.compile(r"[?&](aff|utm_[a-z]+|ref|fbclid|gclid)=[^&#]*", re.I)
+_BOILERPLATE_LINE = re.compile(
+    r"^(skip to (main )?content|ok|filter|filters|×|promoted|see bio|load more|show more|view more|"
+    r"sign in|log in|sign up|menu|close( more)? menu|back to top|home|share|save|"
+    r"date|category|format|price|language|currency)$"
+    r"|cookies?\b.*\b(use|policy|consent|accept)|internet explorer|your browser|all rights reserved|^©|"
+    r"^\d[\d,.]*k? followers$|^_.*_$|^- \[[ x]\]",
+    re.I,
+)
+_REGISTRATION = re.compile(r"regist|ticket|rsvp|passes|sign ?up|book now|apply", re.I)
+_MONTH = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?"
+_DATE = re.compile(
+    rf"\b(?:\d{{1,2}}(?:[ \t]*(?:&|and|-|–)[ \t]*\d{{1,2}})?[ \t]+{_MONTH},?(?:[ \t]+\d{{4}})?"
+    rf"|{_MONTH}[ \t]+\d{{1,2}}(?:[ \t]*(?:&|and|-|–)[ \t]*\d{{1,2}})?(?:,?[ \t]+\d{{4}})?)\b"
+)
+_VENUE = re.compile(r"(?:📍[ \t]*|\b(?:venue|location)[ \t]*:[ \t]*)([^\n|]{4,80})", re.I)
+_MIN_SHARED_PAGES = 3   # A line on this many pages is site chrome, dropped everywhere
+_MIN_DEDUP_CHARS = 20   # Shorter lines ("Free", "AI") legitimately repeat per listed event
+_LISTING_MIN_LINKS = 15  # Pages linking to this many distinct titled items list several events
+
+
+@dataclass
+class ScrapedPage:
+    url: str
+    title: str = ""
+    date: str = ""
+    venue: str = ""
+    description: str = ""
+    registration_link: str = ""
+    body_lines: List[str] = field(default_factory=list)
+
+    def to_text(self) -> str:
+        header = [f"{label}: {value}" for label, value in (
+            ("Title", self.title), ("Date", self.date), ("Venue", self.venue),
+            ("Registration", self.registration_link), ("Source", self.url), ("Description", self.description),
+        ) if value]
+        return "\n".join(header) + "\n\n" + "\n".join(self.body_lines)
+
+
+@dataclass
+class PreprocessReport:
+    pages: int = 0
+    pages_dropped: int = 0
+    chars_before: int = 0
+    chars_after: int = 0
+    shared_lines_dropped: int = 0
+
+    def __str__(self) -> str:
+        shrink = 1 - self.chars_after / self.chars_before if self.chars_before else 0.0
+        return (f"{self.pages} pages ({self.pages_dropped} dropped), {self.chars_before:,} -> {self.chars_after:,} chars "
+                f"({shrink:.0%} smaller), {self.shared_lines_dropped} shared boilerplate lines dropped")
+
+
+def is_scraped_page(item: Any) -> bool:
+    return isinstance(item, dict) and "url" in item and isinstance(item.get("data"), dict)
+
+
+def _page_payload(item: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    payload = item.get("data") or {}
+    payload = payload.get("data", payload) if isinstance(payload.get("data"), dict) else payload
+    return payload.get("markdown") or "", payload.get("metadata") or {}
+
+
+def _clean_link(match: "re.Match", links: List[Tuple[str, str]]) -> str:
+    text, url = match.group(1).strip(), _TRACKING_PARAMS.sub("", match.group(2))
+    if not text or _SHARE_URL.search(url) or _BOILERPLATE_LINE.search(text) or text.lower().startswith(("share ", "view ")):
+        return ""
+    if "#" in url:  # In-page anchors carry no information
+        return text
+    links.append((text, url))
+    # Multi-word link texts are usually event titles on listing pages; keep where they point
+    return f"{text} ({url})" if len(text.split()) >= 3 and url.startswith("http") else text
+
+
+def _clean_lines(markdown: str, links: List[Tuple[str, str]]) -> List[str]:
+    markdown = _NESTED_IMAGE_LINK.sub("", markdown)
+    markdown = _IMAGE.sub("", markdown)
+    markdown = _LINK.sub(lambda match: _clean_link(match, links), markdown)
+    lines, seen = [], set()
+    for raw_line in markdown.splitlines():
+        line = raw_line.replace("**", "").replace("\\|", "|").strip()
+        line = re.sub(r"^#+\s*", "", line).strip(" -*_")
+        if not line or _BOILERPLATE_LINE.search(raw_line.strip()) or _BOILERPLATE_LINE.search(line):
+            continue
+        if len(line) >= _MIN_DEDUP_CHARS:
+            if line in seen:
+                continue
+            seen.add(line)
+        lines.append(line)
+    return lines
+
+
+def _first_heading(markdown: str) -> str:
+    match = re.search(r"^#\s+(.+)$", markdown, re.M)
+    return match.group(1).replace("*", "").strip() if match else ""
+
+
+def _extract_page(url: str, markdown: str, metadata: Dict[str, Any]) -> ScrapedPage:
+    links: List[Tuple[str, str]] = []
+    lines = _clean_lines(markdown, links)
+    text = "\n".join(lines)
+    page = ScrapedPage(url=url, body_lines=lines)
+    page.title = " ".join(str(metadata.get("og:title") or metadata.get("title") or "").split()) or _first_heading(markdown)
+    date_match = _DATE.search(text)
+    page.date = str(metadata.get("event:start_time") or (date_match.group(0) if date_match else ""))
+    venue_match = _VENUE.search(text)
+    page.venue = venue_match.group(1).strip() if venue_match else ""
+    description = str(metadata.get("og:description") or metadata.get("description") or "").strip()
+    if not description:
+        description = next((line for line in lines if len(line) >= 80), "")
+    page.description = " ".join(description.split())[:500]
+    page.registration_link = next((url for text_, url in links if _REGISTRATION.search(text_) or "/regist" in url), "")
+    titled_links = {url for text_, url in links if len(text_.split()) >= 4 and not _REGISTRATION.search(text_)}
+    if len(titled_links) >= _LISTING_MIN_LINKS:
+        # A listing page: its first date/ticket link belongs to one listed event, not the page
+        page.date = str(metadata.get("event:start_time") or "")
+        page.registration_link = ""
+    return page
+
+
+def preprocess_scraped_pages(items: List[Dict[str, Any]]) -> Tuple[List[Tuple[Dict[str, Any], ScrapedPage]], PreprocessReport]:
+    """Cleans scraped pages; returns (original item, cleaned page) pairs and a size report."""
+    report = PreprocessReport(pages=len(items))
+    pages: List[Tuple[Dict[str, Any], ScrapedPage]] = []
+    for item in items:
+        markdown, metadata = _page_payload(item)
+        report.chars_before += len(markdown)
+        status = metadata.get("statusCode")
+        if (isinstance(status, int) and status >= 400) or not markdown.strip():
+            report.pages_dropped += 1
+            continue
+        pages.append((item, _extract_page(item["url"], markdown, metadata)))
+
+    # Lines repeated across many pages are navigation/footer chrome; long lines repeated
+    # on a couple of pages (the same event on two listings) are kept on the first only.
+    line_pages = Counter(line for _, page in pages for line in set(page.body_lines))
+    emitted = set()
+    for _, page in pages:
+        kept = []
+        for line in page.body_lines:
+            if line_pages[line] >= _MIN_SHARED_PAGES or (line_pages[line] > 1 and len(line) >= _MIN_DEDUP_CHARS and line in emitted):
+                report.shared_lines_dropped += 1
+                continue
+            emitted.add(line)
+            kept.append(line)
+        page.body_lines = kept
+        report.chars_after += len(page.to_text())
+    return pages, report
+
+
+# --- Streaming job feeds ---
+def iter_json_records(path: str, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Yields the items of a top-level JSON array, or the values of a JSONL (or single-value) file, one at a time.
+
+    Memory stays at one read chunk plus the largest record, whatever the file size.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer, pos, eof = "", 0, False
+        in_array: Optional[bool] = None
+        while True:
+            while True:
+                while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    break
+                buffer, pos = f.read(chunk_size), 0
+                eof = not buffer
+            if pos >= len(buffer):
+                return
+            if in_array is None:
+                in_array = buffer[pos] == "["
+                if in_array:
+                    pos += 1
+                    continue
+            if in_array and buffer[pos] == "]":
+                return
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                complete = end < len(buffer) or eof  # A number at the very end may continue in the next chunk
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if not complete:
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+            yield value
+            pos = end
+
+
+def _normalize(value: Any) -> str:
+    return " ".join(str(value or "").lower().split())
+
+
+class Deduplicator:
+    """Drops job postings already seen in this ingestion run, as they stream past.
+
+    Exact duplicates share normalized title, company, location and description
+    (a re-post under a new link). Near duplicates have the same location and a
+    MinHash estimate of at least `threshold` Jaccard similarity between the
+    word shingles of title + company + description. LSH banding finds the
+    candidates, so each record is compared with a handful of earlier ones
+    rather than all of them. State grows with the distinct postings kept,
+    about 1 KB each.
+    """
+    MERSENNE = np.uint64((1 << 61) - 1)
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 64, bands: int = 8, shingle_size: int = 3, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        # (a * x + b) mod p per permutation; a * x wraps modulo 2**64, which only mixes the bits further
+        self._a = rng.randint(1, self.MERSENNE, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.randint(0, self.MERSENNE, size=(num_perm, 1), dtype=np.uint64)
+        self._exact: set = set()
+        self._buckets: Dict[int, int] = {}  # hash of (band, band values) -> first posting in that bucket
+        self._signatures: List[np.ndarray] = []
+        self._locations: List[str] = []
+
+    def _signature(self, text: str) -> Optional[np.ndarray]:
+        words = text.split()
+        if len(words) < self.shingle_size:
+            return None
+        shingles = {" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+        hashes = np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        return ((self._a * hashes + self._b) % self.MERSENNE).min(axis=1).astype(np.uint32)
+
+    def check(self, item: Dict[str, Any]) -> Optional[str]:
+        """"exact" or "near" for a duplicate of an earlier posting; None (and remembers it) otherwise."""
+        title, company, location, description = (_normalize(item.get(key))
+                                                 for key in ("title", "company", "location", "description"))
+        exact_key = hashlib.sha1("\x00".join((title, company, location, description)).encode("utf-8")).digest()
+        if exact_key in self._exact:
+            return "exact"
+        self._exact.add(exact_key)
+
+        signature = self._signature(f"{title} {company} {description}")
+        if signature is None:
+            return None
+        band_keys = [hash((band, signature[band * self.rows:(band + 1) * self.rows].tobytes()))
+                     for band in range(self.bands)]
+        for candidate in {self._buckets[key] for key in band_keys if key in self._buckets}:
+            if (self._locations[candidate] == location
+                    and np.mean(self._signatures[candidate] == signature) >= self.threshold):
+                return "near"
+        position = len(self._signatures)
+        self._signatures.append(signature)
+        self._locations.append(location)
+        for key in band_keys:
+            self._buckets.setdefault(key, position)
+        return None
+
+
+def peak_memory_mb() -> Optional[float]:
+    """High-water mark of this process's resident memory (None where the resource module is missing)."""
+    if resource is None:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)  # KB on Linux
+
+
+class IncompleteLoadError(Exception):
+    """Raised once a stream of records is exhausted if some of its files could not be read to the end."""
+
+    def __init__(self, failed: Dict[str, str]):
+        super().__init__("Incomplete load: " + "; ".join(f"{path}: {error}" for path, error in failed.items()))
+        self.failed = failed
+
+
+@dataclass
+class IngestionStats:
+    records: int = 0
+    documents: int = 0
+    exact_duplicates: int = 0
+    near_duplicates: int = 0
+    seconds: float = 0.0
+    peak_memory_mb: Optional[float] = None
+    error: Optional[str] = None  # Why the file stopped being read before its end
+
+    def finish(self, started: float):
+        self.seconds = time.perf_counter() - started
+        self.peak_memory_mb = peak_memory_mb()
+
+    def __str__(self) -> str:
+        return (f"{self.records} records -> {self.documents} documents ({self.exact_duplicates} exact and "
+                f"{self.near_duplicates} near duplicates dropped) in {self.seconds:.2f}s, "
+                f"peak memory {self.peak_memory_mb} MB" + (f", stopped early: {self.error}" if self.error else ""))
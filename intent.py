@@ -0,0 +1,91 @@
+"""Local intent classification for chat messages.
+
+A small multinomial Naive Bayes model over word unigrams and bigrams, trained
+at startup from the labeled examples in data/intent_examples.jsonl. It answers
+in microseconds; IntentClassifierAgent only asks Gemini when the model's
+confidence is below a threshold.
+"""
+import json
+import math
+import re
+from collections import Counter
+from enum import Enum
+from typing import Dict, Iterable, List, Tuple
+
+
+class Intent(str, Enum):
+    JOB_OPPORTUNITIES = "Job Opportunities"
+    MENTORSHIP_PROGRAMS = "Mentorship Programs"
+    COMMUNITY_EVENTS = "Community Events"
+    UNKNOWN = "Unknown"
+
+    @classmethod
+    def from_label(cls, text: str) -> "Intent":
+        """Maps free-form model output (e.g. "2. Mentorship Programs") onto an Intent."""
+        lowered = text.lower()
+        for intent in (cls.JOB_OPPORTUNITIES, cls.MENTORSHIP_PROGRAMS, cls.COMMUNITY_EVENTS):
+            if intent.value.lower() in lowered:
+                return intent
+        if "job" in lowered:
+            return cls.JOB_OPPORTUNITIES
+        if "community" in lowered or "event" in lowered:
+            return cls.COMMUNITY_EVENTS
+        if "mentor" in lowered:
+            return cls.MENTORSHIP_PROGRAMS
+        return cls.UNKNOWN
+
+
+_STOPWORDS = frozenset(
+    "a an the i me my we you your is are am be to of for in on at and or any some can could would "
+    "please there which who do does this that with about it".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    words = [word for word in re.findall(r"[a-z0-9]+", text.lower()) if word not in _STOPWORDS]
+    words = [word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word for word in words]
+    return words + [f"{first}_{second}" for first, second in zip(words, words[1:])]
+
+
+class LocalIntentClassifier:
+    """Naive Bayes intent model; predict() returns (intent, posterior probability)."""
+
+    def __init__(self, examples: Iterable[Tuple[str, Intent]], smoothing: float = 0.5):
+        self.smoothing = smoothing
+        self.class_counts: Counter = Counter()
+        self.token_counts: Dict[Intent, Counter] = {}
+        for text, intent in examples:
+            self.class_counts[intent] += 1
+            self.token_counts.setdefault(intent, Counter()).update(tokenize(text))
+        if not self.class_counts:
+            raise ValueError("No labeled examples provided for the intent classifier")
+        self.vocabulary = set().union(*self.token_counts.values())
+        total_examples = sum(self.class_counts.values())
+        self._log_priors = {intent: math.log(count / total_examples) for intent, count in self.class_counts.items()}
+        self._log_likelihoods: Dict[Intent, Dict[str, float]] = {}
+        self._log_unseen: Dict[Intent, float] = {}
+        for intent, counts in self.token_counts.items():
+            denominator = sum(counts.values()) + smoothing * (len(self.vocabulary) + 1)
+            self._log_likelihoods[intent] = {
+                token: math.log((count + smoothing) / denominator) for token, count in counts.items()
+            }
+            self._log_unseen[intent] = math.log(smoothing / denominator)
+
+    @classmethod
+    def from_jsonl(cls, path: str) -> "LocalIntentClassifier":
+        with open(path, "r", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        return cls((row["text"], Intent(row["intent"])) for row in rows)
+
+    def predict(self, text: str) -> Tuple[Intent, float]:
+        tokens = [token for token in tokenize(text) if token in self.vocabulary]
+        if not tokens:
+            return Intent.UNKNOWN, 0.0
+        scores = {}
+        for intent, log_prior in self._log_priors.items():
+            likelihoods = self._log_likelihoods[intent]
+            unseen = self._log_unseen[intent]
+            scores[intent] = log_prior + sum(likelihoods.get(token, unseen) for token in tokens)
+        best = max(scores, key=scores.get)
+        normalizer = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1.0 / normalizer
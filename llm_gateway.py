@@ -0,0 +1,395 @@
+"""Process-wide gateway in front of the Gemini chat model.
+
+Flask runs every async view on its own event loop (in its own thread), so an
+asyncio.Semaphore can't bound calls across requests. The gateway keeps its
+admission state under a threading lock instead and wakes queued callers on
+their own loops with call_soon_threadsafe. It provides:
+
+- at most `max_concurrency` Gemini calls in flight, the rest queued by priority
+  (chat before resume work), FIFO within a priority;
+- fast load shedding: once `max_queue` callers wait, new ones get
+  LLMOverloadedError (or evict a queued lower-priority caller) instead of
+  piling up until Gemini answers with 429s;
+- single-flight coalescing: identical prompts already in flight share the one
+  upstream call instead of sending another (if the leading caller gives up on
+  its own deadline, is shed or is cancelled, a waiting caller takes over);
+- deadlines: inside `with deadline(seconds)` every call (queue wait included)
+  gives up with DeadlineExceeded once the budget is spent;
+- hedged requests: a call still running after the `hedge_percentile` of the
+  model's recent latencies gets a duplicate sent, if a slot is free and at most
+  `hedge_max_rate` of calls have been hedged, and the first answer wins.
+"""
+import asyncio
+import concurrent.futures
+import contextlib
+import contextvars
+import hashlib
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional
+
+
+class Priority(IntEnum):
+    """Lower values are admitted first."""
+    CHAT = 0
+    RESUME = 1
+    BATCH = 2       # /api/chat/batch: bulk queries wait behind interactive users
+    ENRICHMENT = 3  # Offline record cards (enrichment.py)
+
+
+class LLMOverloadedError(Exception):
+    """Raised instead of queueing when the gateway is saturated; maps to HTTP 503."""
+
+    def __init__(self, retry_after: int, message: str = "The assistant is busy right now. Please retry shortly."):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Exception):
+    """The request's latency budget ran out before the model answered; callers fall back to a degraded answer."""
+
+
+_deadline: contextvars.ContextVar = contextvars.ContextVar("llm_deadline", default=None)  # time.monotonic() value
+
+
+@contextlib.contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Bounds the gateway calls made in this context (and the tasks it starts) to `seconds` from now.
+
+    None or 0 leaves the calls unbounded; nested budgets keep the earlier expiry.
+    """
+    if not seconds:
+        yield
+        return
+    expires = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(expires if current is None else min(current, expires))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left of the current deadline, or None without one."""
+    expires = _deadline.get()
+    return None if expires is None else expires - time.monotonic()
+
+
+class _LeaderGone(Exception):
+    """Set on a coalesced call's shared future when its leader gave up for reasons of its own."""
+
+
+class _Waiter:
+    __slots__ = ("priority", "loop", "future", "granted", "cancelled")
+
+    def __init__(self, priority: Priority, loop: asyncio.AbstractEventLoop):
+        self.priority = priority
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+        self.cancelled = False
+
+
+def _resolve(future: asyncio.Future, error: Optional[BaseException]):
+    if future.done():
+        return
+    if error is None:
+        future.set_result(None)
+    else:
+        future.set_exception(error)
+
+
+class LLMGateway:
+    """Concurrency limit, priority queue and in-flight coalescing shared by all Chatbot instances."""
+
+    HEDGE_MIN_SAMPLES = 20     # Latencies seen before a model's percentile is trusted
+    LATENCY_WINDOW = 200       # Recent latencies kept per model
+
+    def __init__(self, max_concurrency: int = 8, max_queue: int = 64, queue_timeout: float = 30.0,
+                 hedge_percentile: float = 95.0, hedge_max_rate: float = 0.05):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.hedge_percentile = hedge_percentile
+        self.hedge_max_rate = hedge_max_rate
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._queue: List[tuple] = []  # (priority, seq, waiter) heap; cancelled waiters are skipped lazily
+        self._queued = 0
+        self._seq = itertools.count()
+        self._pending: Dict[str, concurrent.futures.Future] = {}
+        self._avg_call_seconds = 1.0
+        self.calls = 0
+        self.coalesced = 0
+        self.shed = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+        self.max_in_flight_seen = 0
+        self.queue_wait_seconds = {priority: 0.0 for priority in Priority}
+        self.queue_waits = {priority: 0 for priority in Priority}
+
+    def wrap(self, model: Any, name: str = "") -> "GatedModel":
+        """A drop-in for `model` (ainvoke/astream) whose calls go through this gateway."""
+        return GatedModel(model, self, name or getattr(model, "model", type(model).__name__))
+
+    def _retry_after(self) -> int:
+        backlog = (self._queued + self._in_flight) / max(1, self.max_concurrency)
+        return max(1, math.ceil(backlog * self._avg_call_seconds))
+
+    def _grant_next(self):
+        """Hands the freed slot to the best queued waiter; call with the lock held."""
+        while self._queue:
+            _, _, waiter = heapq.heappop(self._queue)
+            if waiter.cancelled:
+                continue
+            self._queued -= 1
+            waiter.granted = True
+            self._in_flight += 1
+            waiter.loop.call_soon_threadsafe(_resolve, waiter.future, None)
+            return
+
+    def _release(self, seconds: Optional[float] = None):
+        with self._lock:
+            self._in_flight -= 1
+            if seconds is not None:
+                self.calls += 1
+                self._avg_call_seconds = 0.9 * self._avg_call_seconds + 0.1 * seconds
+            self._grant_next()
+
+    async def _acquire(self, priority: Priority):
+        budget = remaining_budget()
+        if budget is not None and budget <= 0:
+            self._deadline_hit()
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._in_flight < self.max_concurrency and not self._queued:
+                self._in_flight += 1
+                self.max_in_flight_seen = max(self.max_in_flight_seen, self._in_flight)
+                return
+            if self._queued >= self.max_queue:
+                victim = self._lowest_priority_waiter()
+                if victim is None or victim.priority <= priority:
+                    self.shed += 1
+                    raise LLMOverloadedError(self._retry_after())
+                # A queued lower-priority caller gives up its place to this one
+                victim.cancelled = True
+                self._queued -= 1
+                self.shed += 1
+                victim.loop.call_soon_threadsafe(_resolve, victim.future, LLMOverloadedError(self._retry_after()))
+            waiter = _Waiter(priority, loop)
+            heapq.heappush(self._queue, (priority, next(self._seq), waiter))
+            self._queued += 1
+
+        start = time.perf_counter()
+        wait = self.queue_timeout if budget is None else min(self.queue_timeout, budget)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), wait)
+        except BaseException as e:
+            with self._lock:
+                if waiter.granted:
+                    self._in_flight -= 1
+                    self._grant_next()
+                elif not waiter.cancelled:
+                    waiter.cancelled = True
+                    self._queued -= 1
+                if isinstance(e, asyncio.TimeoutError) and wait == self.queue_timeout:
+                    self.shed += 1
+                    raise LLMOverloadedError(self._retry_after()) from None
+            if isinstance(e, asyncio.TimeoutError):
+                self._deadline_hit()
+            raise
+        finally:
+            with self._lock:
+                self.queue_wait_seconds[priority] += time.perf_counter() - start
+                self.queue_waits[priority] += 1
+        with self._lock:
+            self.max_in_flight_seen = max(self.max_in_flight_seen, self._in_flight)
+
+    def _deadline_hit(self):
+        with self._lock:
+            self.deadline_exceeded += 1
+        raise DeadlineExceeded("The request's latency budget ran out waiting for the model")
+
+    def hedge_delay(self, model_name: str) -> Optional[float]:
+        """The `hedge_percentile` of the model's recent latencies, or None while hedging is off or unwarmed."""
+        with self._lock:
+            latencies = sorted(self._latencies.get(model_name, ()))
+        if self.hedge_max_rate <= 0 or len(latencies) < self.HEDGE_MIN_SAMPLES:
+            return None
+        return latencies[min(len(latencies) - 1, math.ceil(self.hedge_percentile / 100 * len(latencies)) - 1)]
+
+    def _record_latency(self, model_name: str, seconds: float):
+        with self._lock:
+            self._latencies.setdefault(model_name, deque(maxlen=self.LATENCY_WINDOW)).append(seconds)
+
+    def _try_hedge(self) -> bool:
+        """Takes a free slot for a hedge if the hedge rate allows; never queues (hedges must not add to overload)."""
+        with self._lock:
+            if self.hedged + 1 > self.hedge_max_rate * (self.calls + 1):
+                return False
+            if self._in_flight >= self.max_concurrency or self._queued:
+                return False
+            self._in_flight += 1
+            self.hedged += 1
+            self.max_in_flight_seen = max(self.max_in_flight_seen, self._in_flight)
+            return True
+
+    async def _invoke(self, model: Any, model_name: str, prompt: str, **kwargs):
+        """model.ainvoke(prompt) within the deadline, hedged once if it runs past the latency percentile."""
+        started: Dict[asyncio.Future, float] = {}
+
+        def launch() -> asyncio.Future:
+            task = asyncio.ensure_future(model.ainvoke(prompt, **kwargs))
+            started[task] = time.perf_counter()
+            return task
+
+        primary = launch()
+        hedge = None
+        try:
+            hedge_after = self.hedge_delay(model_name)
+            budget = remaining_budget()
+            if hedge_after is not None and (budget is None or hedge_after < budget):
+                done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+                if not done and self._try_hedge():
+                    hedge = launch()
+            pending = {task for task in (primary, hedge) if task is not None}
+            while pending:
+                budget = remaining_budget()
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED,
+                                                   timeout=None if budget is None else max(0.0, budget))
+                if not done:
+                    self._deadline_hit()
+                succeeded = [task for task in done if task.exception() is None]
+                if succeeded or not pending:
+                    # Prefer a success; if every copy failed, raise the primary's error
+                    winner = succeeded[0] if succeeded else (primary if primary in done else done.pop())
+                    result = winner.result()
+                    self._record_latency(model_name, time.perf_counter() - started[winner])
+                    if winner is hedge:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return result
+        finally:
+            # Wait out the cancelled copies: Flask closes each request's event loop when the view returns
+            losers = [task for task in (primary, hedge) if task is not None and not task.done()]
+            for task in losers:
+                task.cancel()
+            await asyncio.gather(*losers, return_exceptions=True)
+            if hedge is not None:
+                self._release()  # The hedge's slot; the primary's is released by call()
+
+    def _lowest_priority_waiter(self) -> Optional[_Waiter]:
+        candidates = [entry for entry in self._queue if not entry[2].cancelled]
+        if not candidates:
+            return None
+        # Latest arrival among the lowest priority loses its place first
+        return max(candidates, key=lambda entry: (entry[0], entry[1]))[2]
+
+    async def call(self, model: Any, model_name: str, prompt: str, priority: Priority = Priority.CHAT, **kwargs):
+        """model.ainvoke(prompt) under the limit; identical prompts in flight share one call."""
+        key = hashlib.sha256(f"{model_name}\x00{prompt}".encode("utf-8")).hexdigest()
+        while True:
+            with self._lock:
+                shared = self._pending.get(key)
+                if shared is None:
+                    shared = self._pending[key] = concurrent.futures.Future()
+                    break
+                self.coalesced += 1
+            budget = remaining_budget()
+            try:
+                return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(shared)), budget)
+            except asyncio.TimeoutError:
+                self._deadline_hit()
+            except _LeaderGone:
+                continue  # Its deadline, load shedding or cancellation isn't ours: lead a call of our own
+
+        try:
+            await self._acquire(priority)
+            start = time.perf_counter()
+            try:
+                result = await self._invoke(model, model_name, prompt, **kwargs)
+            finally:
+                self._release(time.perf_counter() - start)
+        except BaseException as e:
+            with self._lock:
+                self._pending.pop(key, None)
+            # Model errors are shared with the followers; the leader's own reasons for giving up are not
+            gave_up = isinstance(e, (DeadlineExceeded, LLMOverloadedError)) or not isinstance(e, Exception)
+            shared.set_exception(_LeaderGone() if gave_up else e)
+            raise
+        with self._lock:
+            self._pending.pop(key, None)
+        shared.set_result(result)
+        return result
+
+    async def stream(self, model: Any, prompt: str, priority: Priority = Priority.CHAT, **kwargs) -> AsyncIterator[Any]:
+        """model.astream(prompt), holding a slot for the whole stream (streams are not coalesced).
+
+        Each chunk is awaited within the remaining deadline, so a stalled stream raises DeadlineExceeded.
+        """
+        await self._acquire(priority)
+        start = time.perf_counter()
+        chunks = model.astream(prompt, **kwargs).__aiter__()
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), remaining_budget())
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    self._deadline_hit()
+                yield chunk
+        finally:
+            if hasattr(chunks, "aclose"):
+                await chunks.aclose()
+            self._release(time.perf_counter() - start)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self._in_flight,
+                "queued": self._queued,
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "shed": self.shed,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "hedge_rate": self.hedged / self.calls if self.calls else 0.0,
+                "deadline_exceeded": self.deadline_exceeded,
+                "max_in_flight_seen": self.max_in_flight_seen,
+                "avg_call_seconds": round(self._avg_call_seconds, 4),
+                **{f"avg_queue_wait_ms_{priority.name.lower()}":
+                   (self.queue_wait_seconds[priority] / self.queue_waits[priority] * 1000
+                    if self.queue_waits[priority] else 0.0) for priority in Priority},
+            }
+
+
+class GatedModel:
+    """Chat model facade used by the agents and endpoints; pass `priority=` to ainvoke/astream."""
+
+    def __init__(self, model: Any, gateway: LLMGateway, name: str, priority: Priority = Priority.CHAT):
+        self.model = model
+        self.gateway = gateway
+        self.name = name
+        self.priority = priority  # Used when a call doesn't pass one
+
+    def with_priority(self, priority: Priority) -> "GatedModel":
+        """The same model and gateway, with calls defaulting to `priority` (for agents that don't pass one)."""
+        return GatedModel(self.model, self.gateway, self.name, priority)
+
+    async def ainvoke(self, prompt, priority: Optional[Priority] = None, **kwargs):
+        priority = self.priority if priority is None else priority
+        return await self.gateway.call(self.model, self.name, str(prompt), priority, **kwargs)
+
+    def astream(self, prompt, priority: Optional[Priority] = None, **kwargs) -> AsyncIterator[Any]:
+        priority = self.priority if priority is None else priority
+        return self.gateway.stream(self.model, prompt, priority, **kwargs)
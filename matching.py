@@ -0,0 +1,192 @@
+"""Resume-to-job matching on the job index's own vectors, with no generation call.
+
+JobMatcher reads every chunk vector of the job store once, mean-pools them into
+one unit vector per job record and keeps that matrix in memory, together with a
+job x skill incidence matrix of the skills each posting mentions. A match is
+then one matrix-vector product for the cosine similarity of the (chunked and
+pooled) resume, one for the share of each posting's skills the resume names,
+and a top-k selection:
+
+    score = (1 - skill_weight) * similarity + skill_weight * skill_overlap
+"""
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from retrieval import RecordFilter
+
+SKILLS_PATH = "data/skills.txt"
+
+
+def load_skills(path: str = SKILLS_PATH) -> List[Tuple[str, List[str]]]:
+    """(skill, spellings) per line of the vocabulary file; "|" separates synonyms, "#" starts a comment."""
+    skills = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                spellings = [spelling.strip().lower() for spelling in line.split("|") if spelling.strip()]
+                skills.append((spellings[0], spellings))
+    return skills
+
+
+class SkillExtractor:
+    """Finds vocabulary skills in free text as whole words ("c++" and ".net" included, "java" not in "javascript")."""
+
+    def __init__(self, skills: Sequence[Tuple[str, List[str]]]):
+        self.names = [name for name, _ in skills]
+        self._canonical = {spelling: name for name, spellings in skills for spelling in spellings}
+        # Longest spelling first, so "machine learning" wins over a shorter overlapping one
+        alternatives = "|".join(re.escape(spelling) for spelling in sorted(self._canonical, key=len, reverse=True))
+        self._pattern = re.compile(rf"(?<![\w+#.])(?:{alternatives})(?![\w+#]|\.\w)") if alternatives else None
+
+    @classmethod
+    def from_file(cls, path: str = SKILLS_PATH) -> "SkillExtractor":
+        return cls(load_skills(path))
+
+    def extract(self, text: str) -> Set[str]:
+        if self._pattern is None:
+            return set()
+        return {self._canonical[match.group(0)] for match in self._pattern.finditer(text.lower())}
+
+
+@dataclass
+class JobMatch:
+    record_id: str
+    title: str
+    company: str
+    location: str
+    link: str
+    score: float
+    similarity: float
+    skill_overlap: float
+    matched_skills: List[str] = field(default_factory=list)
+    missing_skills: List[str] = field(default_factory=list)
+
+    def explanation(self) -> str:
+        reason = f"{self.similarity:.0%} similar to your resume"
+        if self.matched_skills or self.missing_skills:
+            listed = len(self.matched_skills) + len(self.missing_skills)
+            reason += f"; you mention {len(self.matched_skills)} of the {listed} skills it lists"
+            if self.matched_skills:
+                reason += f" ({', '.join(self.matched_skills)})"
+        return reason
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "record_id": self.record_id, "title": self.title, "company": self.company,
+            "location": self.location, "link": self.link,
+            "score": round(self.score, 4), "similarity": round(self.similarity, 4),
+            "skill_overlap": round(self.skill_overlap, 4),
+            "matched_skills": self.matched_skills, "missing_skills": self.missing_skills,
+            "explanation": self.explanation(),
+        }
+
+
+class JobMatcher:
+    """In-memory pooled job vectors and skills of one job store; built once per Chatbot, read-only afterwards."""
+    PAGE_SIZE = 5000
+
+    def __init__(self, db, skills: SkillExtractor, skill_weight: float = 0.3):
+        self.skills = skills
+        self.skill_weight = skill_weight
+        vectors: Dict[str, np.ndarray] = {}
+        chunk_counts: Dict[str, int] = {}
+        texts: Dict[str, List[str]] = {}
+        metadatas: Dict[str, Dict[str, Any]] = {}
+        offset = 0
+        while True:
+            page = db.get(include=["documents", "metadatas", "embeddings"], limit=self.PAGE_SIZE, offset=offset)
+            ids = page.get("ids") or []
+            embeddings = page.get("embeddings")
+            if embeddings is None:
+                embeddings = []
+            for chunk_id, text, metadata, vector in zip(ids, page.get("documents") or [], page.get("metadatas") or [],
+                                                        embeddings):
+                metadata = metadata or {}
+                record_id = str(metadata.get("record_id") or chunk_id)
+                vector = np.asarray(vector, dtype=np.float32)
+                if record_id in vectors:
+                    vectors[record_id] += vector
+                    chunk_counts[record_id] += 1
+                    texts[record_id].append(text or "")
+                else:
+                    vectors[record_id] = vector.copy()
+                    chunk_counts[record_id] = 1
+                    texts[record_id] = [text or ""]
+                    metadatas[record_id] = metadata
+            if len(ids) < self.PAGE_SIZE:
+                break
+            offset += len(ids)
+
+        self.record_ids = list(vectors)
+        self.metadatas = [metadatas[record_id] for record_id in self.record_ids]
+        self.chunks = sum(chunk_counts.values())
+        if self.record_ids:
+            # Mean of the chunk vectors, re-normalized: the pooled vector's cosine stays comparable across jobs
+            self.matrix = self._normalize(np.stack([vectors[record_id] for record_id in self.record_ids]))
+        else:
+            self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.job_skills = [self.skills.extract("\n".join(texts[record_id])) for record_id in self.record_ids]
+        self._skill_columns = {name: column for column, name in enumerate(self.skills.names)}
+        self.skill_matrix = np.zeros((len(self.record_ids), len(self.skills.names)), dtype=np.float32)
+        for row, job_skills in enumerate(self.job_skills):
+            self.skill_matrix[row, [self._skill_columns[name] for name in job_skills]] = 1.0
+        self._skill_counts = self.skill_matrix.sum(axis=1)
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (matrix / norms).astype(np.float32, copy=False)
+
+    def __len__(self) -> int:
+        return len(self.record_ids)
+
+    def match(self, resume_vectors: Sequence[Sequence[float]], resume_skills: Iterable[str], k: int = 10,
+              record_filter: Optional[RecordFilter] = None) -> List[JobMatch]:
+        """The k best-scoring jobs for a resume given as its chunk embeddings and the skills found in it."""
+        if not self.record_ids or not len(resume_vectors):
+            return []
+        query = self._normalize(np.mean(np.asarray(resume_vectors, dtype=np.float32), axis=0))
+        similarity = self.matrix @ query
+
+        resume_skills = set(resume_skills)
+        resume_row = np.zeros(len(self.skills.names), dtype=np.float32)
+        resume_row[[self._skill_columns[name] for name in resume_skills if name in self._skill_columns]] = 1.0
+        # Share of the posting's skills the resume names; postings that list none score on similarity alone
+        overlap = np.divide(self.skill_matrix @ resume_row, self._skill_counts,
+                            out=np.zeros(len(self.record_ids), dtype=np.float32), where=self._skill_counts > 0)
+        weight = np.where(self._skill_counts > 0, self.skill_weight, 0.0)
+        scores = (1 - weight) * similarity + weight * overlap
+
+        if record_filter is not None:
+            today = date.today()
+            allowed = np.array([record_filter.matches(metadata, today) for metadata in self.metadatas])
+            scores = np.where(allowed, scores, -np.inf)
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        matches = []
+        for row in top:
+            metadata = self.metadatas[row]
+            job_skills = self.job_skills[row]
+            matches.append(JobMatch(
+                record_id=self.record_ids[row],
+                title=str(metadata.get("title") or ""),
+                company=str(metadata.get("company") or ""),
+                location=str(metadata.get("location") or ""),
+                link=str(metadata.get("link") or ""),
+                score=float(scores[row]),
+                similarity=float(similarity[row]),
+                skill_overlap=float(overlap[row]),
+                matched_skills=sorted(job_skills & resume_skills),
+                missing_skills=sorted(job_skills - resume_skills),
+            ))
+        return matches
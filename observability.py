@@ -0,0 +1,180 @@
+"""Lightweight per-stage tracing and Prometheus metrics for the chatbot backend.
+
+`Metrics.span(stage, **labels)` times a block into the `stage_seconds`
+histogram and, when a request trace is active, into that request's
+Server-Timing breakdown. With metrics disabled every call returns
+immediately (a shared no-op context manager), so the instrumentation can
+stay in the hot paths.
+"""
+import contextlib
+import contextvars
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+PREFIX = "neuronaari_"
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (100, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+Gauge = Tuple[str, Dict[str, str], float]
+
+_NOOP_SPAN = contextlib.nullcontext()
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("request_trace", default=None)
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    parts = []
+    for key, value in labels:
+        escaped = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+class RequestTrace:
+    """Stage timings of one request, rendered as a Server-Timing header value."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.entries: List[Tuple[str, float]] = []
+
+    def add(self, name: str, seconds: float):
+        self.entries.append((name, seconds))
+
+    def server_timing(self) -> str:
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.entries]
+        entries.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+class _Span:
+    __slots__ = ("metrics", "stage", "labels", "start")
+
+    def __init__(self, metrics: "Metrics", stage: str, labels: Dict[str, object]):
+        self.metrics = metrics
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        self.metrics.observe("stage_seconds", elapsed, stage=self.stage, **self.labels)
+        if exc_type is not None and not issubclass(exc_type, GeneratorExit):
+            self.metrics.inc("stage_errors_total", stage=self.stage, **self.labels)
+        trace = _current_trace.get()
+        if trace is not None:
+            name = "_".join([self.stage] + [str(value) for value in self.labels.values()])
+            trace.add(name, elapsed)
+        return False
+
+
+class Metrics:
+    """Thread-safe registry of counters and histograms with Prometheus text output."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._collectors: List[Callable[[], Iterable[Gauge]]] = []
+        self._lock = threading.Lock()
+
+    def span(self, stage: str, **labels):
+        """Context manager timing one stage; errors raised inside it are counted per stage."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, stage, labels)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = SECONDS_BUCKETS, **labels):
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def observe_size(self, name: str, chars: int, **labels):
+        """Histogram of a prompt/response size in characters."""
+        self.observe(name, chars, SIZE_BUCKETS, **labels)
+
+    def add_collector(self, collector: Callable[[], Iterable[Gauge]]):
+        """Registers a callback returning (name, labels, value) gauges, read at scrape time."""
+        self._collectors.append(collector)
+
+    def start_trace(self) -> Optional[RequestTrace]:
+        """Starts collecting stage timings for the current request (context-local)."""
+        if not self.enabled:
+            return None
+        trace = RequestTrace()
+        _current_trace.set(trace)
+        return trace
+
+    @staticmethod
+    def current_trace() -> Optional[RequestTrace]:
+        return _current_trace.get()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                lines.append(f"# TYPE {PREFIX}{name} counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{PREFIX}{name}{_format_labels(key)} {value:g}")
+            for name in sorted(self._histograms):
+                lines.append(f"# TYPE {PREFIX}{name} histogram")
+                for key, histogram in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{PREFIX}{name}_bucket{_format_labels(key + (('le', f'{bound:g}'),))} {cumulative}")
+                    lines.append(f"{PREFIX}{name}_bucket{_format_labels(key + (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{PREFIX}{name}_sum{_format_labels(key)} {histogram.total:g}")
+                    lines.append(f"{PREFIX}{name}_count{_format_labels(key)} {histogram.count}")
+        gauges: Dict[str, List[Tuple[Dict[str, str], float]]] = {}
+        for collector in self._collectors:
+            try:
+                for name, labels, value in collector():
+                    gauges.setdefault(name, []).append((labels, value))
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+        for name in sorted(gauges):
+            lines.append(f"# TYPE {PREFIX}{name} gauge")
+            for labels, value in gauges[name]:
+                lines.append(f"{PREFIX}{name}{_format_labels(_label_key(labels))} {value:g}")
+        return "\n".join(lines) + "\n"
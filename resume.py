@@ -0,0 +1,185 @@
+"""Resume text extraction for the resume endpoints.
+
+Uploads are parsed straight from memory (no temp files), each PDF once, and
+results are cached by content hash so an identical upload is neither parsed
+nor, optionally, reviewed twice.
+"""
+import hashlib
+import io
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+SUPPORTED_EXTENSIONS = ("pdf", "docx")
+
+ATS_PROMPT = """You are an expert Resume ATS (Applicant Tracking System) analyst.
+Analyze the following resume and give a score out of 100 for each of the following aspects:
+
+Resume Text:
+{resume_text}
+
+1. ATS Compatibility Score: This score reflects how well the resume is likely to be parsed and understood by an Applicant Tracking System. Consider factors like formatting, use of standard headings, and avoidance of complex elements.
+2. Content Score: This score reflects the quality and relevance of the information presented in the resume. Consider clarity, conciseness, impact of achievements, and alignment with typical resume expectations.
+3. Keyword Score: This score reflects the presence and effective use of relevant keywords that are likely to be searched for by recruiters and ATS. Consider the inclusion of industry-specific terms, skills, and job titles.
+4. Formatting Score: This score reflects the overall visual presentation and organization of the resume. Consider readability, consistency, professional appearance, and logical flow.
+
+Write each score as "<Aspect> Score: <number>/100"."""
+
+ANALYSIS_PROMPT = """You are an expert Resume ATS (Applicant Tracking System) analyst.
+Analyze the following resume and give a detailed analysis including an overall ATS score, strengths, weaknesses, and improvement suggestions and tips.:
+
+Resume Text:
+{resume_text}
+
+1. Overall ATS Compatibility Score (out of 100): This score reflects the overall likelihood of the resume being parsed and favored by an Applicant Tracking System. Consider all aspects of the resume in this overall assessment.
+2. Strengths: Highlight the strengths of the resume, such as relevant skills, experiences, and achievements that stand out.
+3. Weaknesses: Identify any weaknesses or areas for improvement in the resume, such as lack of relevant experience, poor formatting, or missing key information.
+4. Improvement Suggestions: Provide specific suggestions for improving the resume, such as rephrasing certain sections, adding relevant keywords, or changing the format.
+5. Tips: Offer general tips for creating a strong resume that is ATS-friendly and appealing to recruiters."""
+
+_SCORE_LABELS = {
+    "ats_compatibility": r"ATS Compatibility(?: Score)?",
+    "content": r"Content(?: Score)?",
+    "keyword": r"Keywords?(?: Score)?",
+    "formatting": r"Formatting(?: Score)?",
+}
+_OVERALL_LABEL = r"Overall(?: ATS)?(?: Compatibility)?(?: Score)?"
+
+
+def _find_score(label: str, text: str) -> Optional[int]:
+    text = re.sub(r"\(\s*out of 100\s*\)", "", text, flags=re.I)
+    match = re.search(rf"{label}[^\d\n]{{0,40}}?(\d{{1,3}})(?:\s*(?:/|out of)\s*100)?", text, re.I)
+    if match and 0 <= int(match.group(1)) <= 100:
+        return int(match.group(1))
+    return None
+
+
+def parse_ats_scores(ats_report: str, analysis_report: str = "") -> Dict[str, Optional[int]]:
+    """Pulls the numeric 0-100 scores out of the two reports; missing ones are None."""
+    scores = {name: _find_score(label, ats_report) for name, label in _SCORE_LABELS.items()}
+    scores["overall"] = _find_score(_OVERALL_LABEL, analysis_report)
+    return scores
+
+
+class ResumeExtractionError(ValueError):
+    """The upload can't be turned into resume text (too large, too many pages, unreadable)."""
+
+
+def _pdf_reader(data: bytes):
+    import PyPDF2  # Imported on first use: most workers never parse a resume
+
+    return PyPDF2.PdfReader(io.BytesIO(data))
+
+
+def _docx_document(data: bytes):
+    try:
+        import docx  # Imported on first use, like PyPDF2
+    except ImportError:
+        raise ResumeExtractionError("DOCX support is not installed on this server "
+                                    "(pip install python-docx)") from None
+    return docx.Document(io.BytesIO(data))
+
+
+@dataclass
+class ExtractedResume:
+    text: str
+    pages: int
+    digest: str       # sha256 of the uploaded bytes
+    cached: bool = False
+
+
+class _LRU:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: str, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class ResumeTextExtractor:
+    """Extracts resume text with size/page caps and a hash cache.
+
+    A PDF is parsed once and its pages extracted serially: splitting them across a
+    process pool measured slower at every size up to the page cap, since each worker
+    re-parses the file (benchmarks/bench_resume_extraction.py).
+    """
+
+    def __init__(self, max_bytes: int = 5 * 1024 * 1024, max_pages: int = 20, cache_size: int = 256):
+        self.max_bytes = max_bytes
+        self.max_pages = max_pages
+        self._texts = _LRU(cache_size)
+        self._reviews = _LRU(cache_size)
+
+    def read_upload(self, stream) -> bytes:
+        """Reads an upload stream into memory, refusing anything over max_bytes."""
+        data = stream.read(self.max_bytes + 1)
+        if len(data) > self.max_bytes:
+            raise ResumeExtractionError(f"Resume files must be smaller than {self.max_bytes // (1024 * 1024)} MB")
+        return data
+
+    def extract_pdf(self, data: bytes) -> ExtractedResume:
+        digest = hashlib.sha256(data).hexdigest()
+        cached = self._texts.get(digest)
+        if cached is not None:
+            return ExtractedResume(text=cached[0], pages=cached[1], digest=digest, cached=True)
+
+        try:
+            reader = _pdf_reader(data)
+            page_count = len(reader.pages)
+        except Exception as e:
+            raise ResumeExtractionError(f"Could not read the PDF: {e}") from e
+        if page_count > self.max_pages:
+            raise ResumeExtractionError(f"Resumes can have at most {self.max_pages} pages")
+
+        try:
+            text = "\n".join(page.extract_text() or "" for page in reader.pages)
+        except Exception as e:  # A malformed page only fails once its content stream is parsed
+            raise ResumeExtractionError(f"Could not read the PDF: {e}") from e
+        self._texts.put(digest, (text, page_count))
+        return ExtractedResume(text=text, pages=page_count, digest=digest)
+
+    def extract_docx(self, data: bytes) -> ExtractedResume:
+        digest = hashlib.sha256(data).hexdigest()
+        cached = self._texts.get(digest)
+        if cached is not None:
+            return ExtractedResume(text=cached[0], pages=cached[1], digest=digest, cached=True)
+        try:
+            document = _docx_document(data)
+        except ResumeExtractionError:
+            raise
+        except Exception as e:
+            raise ResumeExtractionError(f"Could not read the DOCX file: {e}") from e
+        text = "\n".join(paragraph.text for paragraph in document.paragraphs)
+        self._texts.put(digest, (text, 1))
+        return ExtractedResume(text=text, pages=1, digest=digest)
+
+    def extract(self, data: bytes, extension: str) -> ExtractedResume:
+        """Dispatches on the upload's file extension ("pdf" or "docx")."""
+        if extension == "pdf":
+            return self.extract_pdf(data)
+        if extension == "docx":
+            return self.extract_docx(data)
+        raise ResumeExtractionError("Unsupported file format. Please upload a PDF or DOCX file.")
+
+    def cached_review(self, digest: str) -> Optional[str]:
+        return self._reviews.get(digest)
+
+    def store_review(self, digest: str, review: str):
+        self._reviews.put(digest, review)
@@ -0,0 +1,302 @@
+"""Hybrid retrieval over a vector store: local BM25 + vector search, fused by rank."""
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from langchain_core.documents import Document
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or the to with any me my i show find jobs job".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def days_since_epoch(value: date) -> int:
+    return (value - date(1970, 1, 1)).days
+
+
+class BM25Index:
+    """Okapi BM25 over an in-memory inverted index."""
+
+    def __init__(self, texts: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.lengths: List[int] = []
+        for position, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            self.lengths.append(sum(counts.values()))
+            for token, count in counts.items():
+                self.postings[token].append((position, count))
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+    def search(self, query: str, k: int, allowed: Optional[Set[int]] = None) -> List[Tuple[int, float]]:
+        scores: Dict[int, float] = defaultdict(float)
+        total = len(self.lengths)
+        for token in set(tokenize(query)):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, count in postings:
+                if allowed is not None and position not in allowed:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[position] / (self.average_length or 1))
+                scores[position] += idf * count * (self.k1 + 1) / (count + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+@dataclass
+class RecordFilter:
+    """Hard pre-filters on record metadata, applied before ranking."""
+    location: Optional[str] = None            # Case-insensitive substring, e.g. "Remote"
+    company: Optional[str] = None             # Case-insensitive substring
+    posted_within_days: Optional[int] = None  # Needs the posted_day metadata of structured ingestion
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["RecordFilter"]:
+        """Builds a filter from a request's "filters" object; raises ValueError on bad input."""
+        if not data:
+            return None
+        if not isinstance(data, dict):
+            raise ValueError("'filters' must be an object")
+        unknown = set(data) - {"location", "company", "posted_within_days"}
+        if unknown:
+            raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))}")
+        for name in ("location", "company"):
+            if data.get(name) is not None and not isinstance(data[name], str):
+                raise ValueError(f"'{name}' must be a string")
+        days = data.get("posted_within_days")
+        if days is not None and (isinstance(days, bool) or not isinstance(days, int) or days < 0):
+            raise ValueError("'posted_within_days' must be a non-negative integer")
+        return cls(location=data.get("location") or None, company=data.get("company") or None, posted_within_days=days)
+
+    def matches(self, metadata: Dict[str, Any], today: Optional[date] = None) -> bool:
+        if self.location and self.location.lower() not in str(metadata.get("location", "")).lower():
+            return False
+        if self.company and self.company.lower() not in str(metadata.get("company", "")).lower():
+            return False
+        if self.posted_within_days is not None:
+            posted_day = metadata.get("posted_day")
+            if not isinstance(posted_day, int):
+                return False
+            if posted_day < days_since_epoch(today or date.today()) - self.posted_within_days:
+                return False
+        return True
+
+    def __str__(self) -> str:
+        return f"location={self.location}|company={self.company}|days={self.posted_within_days}"
+
+
+class HybridRetriever:
+    """Ranks a store's chunks with BM25 and vector similarity, fused with reciprocal rank fusion.
+
+    The BM25 side keeps a copy of every chunk and its metadata, which is also what
+    RecordFilter is evaluated against; the matching record ids are pushed down to
+    the vector search as a `record_id $in` filter.
+    """
+    PAGE_SIZE = 5000
+
+    def __init__(self, db, k: int = 3, candidate_k: int = 20, rrf_k: int = 60):
+        self.db = db
+        self.k = k
+        self.candidate_k = candidate_k
+        self.rrf_k = rrf_k
+        self.chunks: List[Document] = self._load_chunks()
+        self._positions = {self._key(chunk): position for position, chunk in enumerate(self.chunks)}
+        self.bm25 = BM25Index([chunk.page_content for chunk in self.chunks])
+
+    def _load_chunks(self) -> List[Document]:
+        chunks, offset = [], 0
+        while True:
+            page = self.db.get(include=["documents", "metadatas"], limit=self.PAGE_SIZE, offset=offset)
+            ids = page.get("ids") or []
+            for text, metadata in zip(page.get("documents") or [], page.get("metadatas") or []):
+                chunks.append(Document(page_content=text or "", metadata=metadata or {}))
+            if len(ids) < self.PAGE_SIZE:
+                return chunks
+            offset += len(ids)
+
+    @staticmethod
+    def _key(document: Document) -> Tuple[Optional[str], str]:
+        return document.metadata.get("record_id"), document.page_content
+
+    def _allowed(self, record_filter: Optional[RecordFilter]) -> Tuple[Optional[Set[int]], Optional[Dict[str, Any]]]:
+        """Chunk positions matching `record_filter` and the equivalent vector store filter (None, None: no filter)."""
+        if record_filter is None:
+            return None, None
+        today = date.today()
+        allowed = {position for position, chunk in enumerate(self.chunks) if record_filter.matches(chunk.metadata, today)}
+        record_ids = sorted({self.chunks[position].metadata.get("record_id") for position in allowed} - {None})
+        return allowed, {"record_id": {"$in": record_ids}}
+
+    async def aretrieve(self, query: str, record_filter: Optional[RecordFilter] = None) -> List[Document]:
+        allowed, vector_filter = self._allowed(record_filter)
+        if allowed is not None and not allowed:
+            return []
+        vector_hits = await self.db.asimilarity_search(query, k=self.candidate_k, filter=vector_filter)
+        return self._fuse(query, vector_hits, allowed)
+
+    def retrieve_batch(self, queries: List[str], vectors: List[List[float]],
+                       record_filter: Optional[RecordFilter] = None) -> List[List[Document]]:
+        """aretrieve for several queries whose embeddings are already known: one vector search for all of them."""
+        allowed, vector_filter = self._allowed(record_filter)
+        if allowed is not None and not allowed:
+            return [[] for _ in queries]
+        hits = search_by_vectors(self.db, vectors, self.candidate_k, vector_filter)
+        return [self._fuse(query, vector_hits, allowed) for query, vector_hits in zip(queries, hits)]
+
+    def _fuse(self, query: str, vector_hits: List[Document], allowed: Optional[Set[int]]) -> List[Document]:
+        rankings: List[List[int]] = [[position for position, _ in self.bm25.search(query, self.candidate_k, allowed)]]
+        rankings.append([self._positions[self._key(hit)] for hit in vector_hits if self._key(hit) in self._positions])
+
+        fused: Dict[int, float] = defaultdict(float)
+        for ranking in rankings:
+            for rank, position in enumerate(ranking):
+                fused[position] += 1.0 / (self.rrf_k + rank + 1)
+        best = sorted(fused, key=fused.get, reverse=True)[:self.k]
+        return [self.chunks[position] for position in best]
+
+
+def search_by_vectors(db, vectors: List[List[float]], k: int,
+                      filter: Optional[Dict[str, Any]] = None) -> List[List[Document]]:
+    """Top-k chunks for each query vector, in one pass over the store where it supports that."""
+    if not vectors:
+        return []
+    if hasattr(db, "search_vectors"):  # NumpyVectorStore: one matrix product for every query
+        return [[document for document, _ in hits] for hits in db.search_vectors(vectors, k, filter)]
+    if hasattr(db, "_collection"):  # Chroma: one collection query with every embedding
+        result = db._collection.query(query_embeddings=vectors, n_results=k, where=filter,
+                                      include=["documents", "metadatas"])
+        return [[Document(page_content=text or "", metadata=metadata or {}) for text, metadata in zip(texts, metadatas)]
+                for texts, metadatas in zip(result["documents"], result["metadatas"])]
+    return [db.similarity_search_by_vector(vector, k=k, filter=filter) for vector in vectors]
+
+
+def estimate_tokens(text: str) -> int:
+    """Local token estimate (~4 characters per token for Gemini on mixed text); no tokenizer call."""
+    return (len(text) + 3) // 4
+
+
+@dataclass
+class PackedContext:
+    text: str
+    tokens: int
+    naive_tokens: int  # What plain "\n".join of every chunk would have cost
+    chunks_in: int
+    records_used: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.naive_tokens - self.tokens)
+
+
+class ContextPacker:
+    """Builds prompt context under a token budget.
+
+    Retrieved chunks are grouped by record (in order of their best rank),
+    overlapping neighbours from the splitter are stitched back together,
+    identical or contained passages are dropped, and whole records are packed
+    until the budget runs out; the last one is truncated at a word boundary.
+    """
+    MIN_OVERLAP = 20
+    MIN_TAIL_TOKENS = 50  # Don't bother appending a truncated record shorter than this
+
+    def __init__(self, token_budget: int = 1500, history_token_budget: int = 300):
+        self.token_budget = token_budget
+        self.history_token_budget = history_token_budget
+        self.requests = 0
+        self.tokens_saved_total = 0
+        self.stats_lock = threading.Lock()  # pack() runs on request threads and the worker loop at once
+
+    @classmethod
+    def _stitch(cls, left: str, right: str) -> str:
+        if right in left:
+            return left
+        if left in right:
+            return right
+        for size in range(min(len(left), len(right), 400), cls.MIN_OVERLAP - 1, -1):
+            if left.endswith(right[:size]):
+                return left + right[size:]
+        return f"{left}\n...\n{right}"
+
+    @staticmethod
+    def _truncate(text: str, tokens: int) -> str:
+        limit = tokens * 4
+        if len(text) <= limit:
+            return text
+        cut = text.rfind(" ", 0, limit)
+        return text[:cut if cut > 0 else limit] + " ..."
+
+    def _records(self, documents: List[Document]) -> List[str]:
+        groups: Dict[Any, List[Document]] = {}
+        for rank, document in enumerate(documents):
+            key = document.metadata.get("record_id") or ("chunk", rank)
+            groups.setdefault(key, []).append(document)
+        records: List[str] = []
+        for chunks in groups.values():
+            chunks.sort(key=lambda chunk: chunk.metadata.get("start_index", 0))
+            text = chunks[0].page_content
+            end = chunks[0].metadata.get("start_index")
+            end = None if end is None else end + len(text)
+            for chunk in chunks[1:]:
+                start = chunk.metadata.get("start_index")
+                if end is not None and start is not None:
+                    # Offsets from the splitter say exactly how much the chunks overlap
+                    overlap = end - start
+                    if overlap >= len(chunk.page_content):
+                        continue
+                    text = text + chunk.page_content[overlap:] if overlap >= 0 else f"{text}\n...\n{chunk.page_content}"
+                    end = start + len(chunk.page_content)
+                else:
+                    text = self._stitch(text, chunk.page_content)
+            if any(text in kept for kept in records):
+                continue
+            records = [kept for kept in records if kept not in text]  # A longer copy supersedes
+            records.append(text)
+        return records
+
+    def pack(self, documents: List[Document], token_budget: Optional[int] = None) -> PackedContext:
+        budget = self.token_budget if token_budget is None else token_budget
+        naive_tokens = estimate_tokens("\n".join(document.page_content for document in documents))
+        parts: List[str] = []
+        used = 0
+        for record in self._records(documents):
+            cost = estimate_tokens(record) + 1
+            if used + cost <= budget:
+                parts.append(record)
+                used += cost
+                continue
+            remaining = budget - used
+            if remaining >= self.MIN_TAIL_TOKENS:
+                parts.append(self._truncate(record, remaining - 2))
+            break
+        text = "\n\n".join(parts)
+        packed = PackedContext(text, estimate_tokens(text), naive_tokens, len(documents), len(parts))
+        with self.stats_lock:
+            self.requests += 1
+            self.tokens_saved_total += packed.tokens_saved
+        return packed
+
+    def pack_history(self, lines: List[str]) -> str:
+        """Most recent history lines that fit the history budget, oldest first."""
+        kept: List[str] = []
+        used = 0
+        for line in reversed(lines):
+            cost = estimate_tokens(line) + 1
+            if used + cost > self.history_token_budget:
+                remaining = self.history_token_budget - used
+                if remaining >= 20:
+                    kept.append(self._truncate(line, remaining - 2))
+                break
+            kept.append(line)
+            used += cost
+        return "\n".join(reversed(kept))
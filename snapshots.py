@@ -0,0 +1,160 @@
+"""Immutable, versioned vector index snapshots published with an atomic pointer swap.
+
+Layout of a snapshot root (one per store and backend, e.g. db/job_chatbot_gemini_snapshots):
+
+    CURRENT                                    name of the published snapshot, replaced atomically
+    20250301T120000.123456-3f2a9c1d0e4b5a67/   a published snapshot (never modified again)
+    .build-<id>/                               a snapshot being built; invisible to readers
+
+A new index is built into a .build directory (seeded with a copy of the current
+snapshot, so only changed records are embedded), renamed to its final name and
+then published by replacing CURRENT. Workers compare CURRENT with the snapshot
+they serve between requests and reload when it changes; requests already running
+keep the snapshot they started with, which stays on disk because the last
+`keep` snapshots are never pruned. Rolling back is repointing CURRENT.
+
+    python -m snapshots publish            # build from the data files and publish
+    python -m snapshots list
+    python -m snapshots rollback --store jobs [--to NAME]
+"""
+import argparse
+import contextlib
+import os
+import shutil
+import time
+import uuid
+from typing import Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent first builds are merely wasteful
+    fcntl = None
+
+POINTER_FILE = "CURRENT"
+BUILD_PREFIX = ".build-"
+STALE_BUILD_SECONDS = 24 * 3600  # Build directories older than this were abandoned by a crashed builder
+
+
+class SnapshotManager:
+    """Publishes, lists, rolls back and prunes the snapshots under `root`."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def current(self) -> Optional[str]:
+        """Name of the published snapshot, or None before the first publish. Cheap enough to poll."""
+        try:
+            with open(self.path(POINTER_FILE), "r", encoding="utf-8") as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return name if name and os.path.isdir(self.path(name)) else None
+
+    def list(self) -> List[str]:
+        """Published snapshots, oldest first (names start with their publish time)."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if not name.startswith(".") and name != POINTER_FILE and os.path.isdir(self.path(name)))
+
+    def begin(self, copy_from: Optional[str] = None) -> str:
+        """Creates a private build directory, optionally seeded with a published snapshot; returns its name."""
+        name = f"{BUILD_PREFIX}{uuid.uuid4().hex[:12]}"
+        if copy_from:
+            shutil.copytree(self.path(copy_from), self.path(name))
+        else:
+            os.makedirs(self.path(name))
+        return name
+
+    def publish(self, build_name: str, version: str) -> str:
+        """Freezes a build under its final name and points CURRENT at it."""
+        now = time.time()  # Microseconds keep snapshots published within a second in order
+        name = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(now))}.{int(now % 1 * 1e6):06d}-{version}"
+        if os.path.exists(self.path(name)):
+            name = f"{name}-{uuid.uuid4().hex[:6]}"
+        os.rename(self.path(build_name), self.path(name))
+        self._point(name)
+        return name
+
+    def _point(self, name: str):
+        tmp_path = self.path(f".{POINTER_FILE}.{uuid.uuid4().hex[:8]}")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(name)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path(POINTER_FILE))
+
+    def rollback(self, to: Optional[str] = None) -> str:
+        """Points CURRENT at `to`, or at the snapshot published before the current one."""
+        names = self.list()
+        if to is None:
+            current = self.current()
+            older = [name for name in names if current is None or name < current]
+            if not older:
+                raise ValueError(f"No snapshot older than {current} in {self.root}")
+            to = older[-1]
+        elif to not in names:
+            raise ValueError(f"Unknown snapshot {to} in {self.root}")
+        self._point(to)
+        return to
+
+    def prune(self, keep: int) -> List[str]:
+        """Deletes all but the newest `keep` snapshots (never the current one) and abandoned builds."""
+        current = self.current()
+        names = self.list()
+        removed = [name for name in names[:max(0, len(names) - keep)] if name != current]
+        for name in removed:
+            shutil.rmtree(self.path(name), ignore_errors=True)
+        now = time.time()
+        for name in os.listdir(self.root):
+            if name.startswith(BUILD_PREFIX) and now - os.path.getmtime(self.path(name)) > STALE_BUILD_SECONDS:
+                shutil.rmtree(self.path(name), ignore_errors=True)
+        return removed
+
+    @contextlib.contextmanager
+    def build_lock(self) -> Iterator[None]:
+        """Exclusive across processes, so workers starting together build the first snapshot once."""
+        os.makedirs(self.root, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(self.path(".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish, list and roll back vector index snapshots.")
+    parser.add_argument("command", choices=("publish", "list", "rollback"))
+    parser.add_argument("--store", choices=("jobs", "events", "all"), default="all")
+    parser.add_argument("--to", help="Snapshot to roll back to (default: the one before the current)")
+    args = parser.parse_args()
+
+    import app as app_module  # Loaded here: the app imports this module
+
+    for store, (directory, files) in app_module.VECTOR_STORES.items():
+        if args.store not in (store, "all"):
+            continue
+        persist_directory = os.path.join(app_module.VECTOR_DB_ROOT, directory)
+        manager = app_module.VectorDatabase.snapshot_manager(persist_directory)
+        if args.command == "publish":
+            embeddings = app_module.build_embeddings(app_module.GOOGLE_API_KEY, app_module.VECTOR_DB_ROOT)
+            documents = app_module.DataLoader([], []).iter_documents([f.strip() for f in files.split(",") if f.strip()])
+            name, report = app_module.VectorDatabase.publish_snapshot(embeddings, persist_directory, documents)
+            print(f"{store}: published {name} ({report})")
+        elif args.command == "rollback":
+            print(f"{store}: rolled back to {manager.rollback(args.to)}")
+        else:
+            current = manager.current()
+            for name in manager.list():
+                print(f"{store}: {name}{'  <- current' if name == current else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""Schema-constrained JSON answers from the LLM: prompts, tolerant (streaming) parsing and stats."""
+import json
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Type
+
+from pydantic import BaseModel, ValidationError
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_MAX_REPAIR_CHARS = 6000
+
+
+class JsonArrayStreamParser:
+    """Incrementally extracts the objects of a top-level JSON array from streamed text.
+
+    Text around the JSON (prose, a ```json fence) is ignored, and so is a
+    missing array bracket when the model emits bare objects. Each object is
+    yielded by feed() as soon as its closing brace arrives, so callers can act
+    on it before the rest of the array has been generated. close() salvages
+    an object cut off by the end of the text (e.g. a truncated generation).
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._stack: List[str] = []  # Open brackets inside the current object
+        self._in_string = False
+        self._escaped = False
+        self.started = False         # Seen the array's opening bracket
+        self.finished = False        # Seen the array's closing bracket
+        self.objects = 0
+
+    def feed(self, text: str) -> Iterator[Dict[str, Any]]:
+        for char in text:
+            if self.finished:
+                return
+            if not self._stack:
+                if char == "{":
+                    self._buffer = [char]
+                    self._stack.append(char)
+                elif char == "[" and not self.started:
+                    self.started = True
+                elif char == "]" and self.started:
+                    self.finished = True
+                continue
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._stack.append(char)
+            elif char in "}]":
+                self._stack.pop()
+                if not self._stack:
+                    item = self._decode("".join(self._buffer))
+                    self._buffer = []
+                    if isinstance(item, dict):
+                        self.objects += 1
+                        yield item
+
+    def close(self) -> Iterator[Dict[str, Any]]:
+        """Yields the unfinished trailing object, closed off, if enough of it survived to decode."""
+        if not self._stack:
+            return
+        partial = "".join(self._buffer)
+        self._buffer, self._stack = [], []
+        for candidate in self._truncations(partial):
+            item = self._decode(_close_json(candidate))
+            if isinstance(item, dict) and item:
+                self.objects += 1
+                yield item
+                return
+
+    @property
+    def truncated(self) -> bool:
+        """An array was opened but never closed."""
+        return self.started and not self.finished
+
+    @staticmethod
+    def _truncations(partial: str) -> Iterator[str]:
+        # The text as-is first, then cut back to the last few commas (drops a half-written field)
+        yield partial
+        cut = len(partial)
+        for _ in range(3):
+            cut = partial.rfind(",", 0, cut)
+            if cut <= 0:
+                return
+            yield partial[:cut]
+
+    @staticmethod
+    def _decode(text: str) -> Any:
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            pass
+        try:
+            return json.loads(_TRAILING_COMMA.sub(r"\1", text))
+        except json.JSONDecodeError:
+            return None
+
+
+def _close_json(text: str) -> str:
+    """Appends the quote and brackets needed to close a truncated JSON value."""
+    stack: List[str] = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+    text = text + '"' if in_string else text.rstrip().rstrip(",:")
+    return text + "".join(reversed(stack))
+
+
+_NAMED_SCHEMAS = ("properties", "$defs", "definitions")  # Keywords whose keys are names, not schema keywords
+
+
+def response_schema(item_cls: Type[BaseModel]) -> Dict[str, Any]:
+    """JSON Schema of an array of `item_cls`, without the titles Pydantic adds (they only cost tokens).
+
+    Only the "title" annotations go: a field called title (a key of "properties") stays.
+    """
+    def strip_titles(node: Any) -> Any:
+        if isinstance(node, dict):
+            return {key: ({name: strip_titles(schema) for name, schema in value.items()}
+                          if key in _NAMED_SCHEMAS and isinstance(value, dict) else strip_titles(value))
+                    for key, value in node.items() if key != "title"}
+        if isinstance(node, list):
+            return [strip_titles(value) for value in node]
+        return node
+    return {"type": "array", "items": strip_titles(item_cls.model_json_schema())}
+
+
+def schema_instructions(item_cls: Type[BaseModel]) -> str:
+    schema = json.dumps(response_schema(item_cls), separators=(",", ":"))
+    return (f"Respond with only a JSON array of {item_cls.__name__} objects (no prose, no code fences) "
+            f"matching this JSON Schema: {schema}. Respond with [] if nothing matches.")
+
+
+def repair_prompt(text: str, item_cls: Type[BaseModel]) -> str:
+    """Asks the model to reformat an unparseable answer; much cheaper than regenerating from the context."""
+    return (f"The answer below was meant to be a JSON array of {item_cls.__name__} objects but could not be "
+            f"parsed. Rewrite the same content as valid JSON. {schema_instructions(item_cls)}\n\n"
+            f"Answer:\n{text[:_MAX_REPAIR_CHARS]}")
+
+
+def validate_item(item_cls: Type[BaseModel], item: Dict[str, Any]) -> Optional[BaseModel]:
+    try:
+        return item_cls.model_validate(item)
+    except ValidationError as e:
+        print(f"Skipping malformed {item_cls.__name__}: {e.error_count()} error(s), Content: {item}")
+        return None
+
+
+@dataclass
+class ParseResult:
+    items: List[BaseModel]
+    outcome: str  # "parsed", "salvaged" (partial/truncated output), "empty" (a real []) or "failed"
+    invalid_items: int = 0
+
+
+def parse_items(text: str, item_cls: Type[BaseModel]) -> ParseResult:
+    """Every valid `item_cls` object in a complete answer, salvaging what it can from broken JSON."""
+    parser = JsonArrayStreamParser()
+    raw = list(parser.feed(text))
+    complete = len(raw)
+    raw.extend(parser.close())
+    items = [item for item in (validate_item(item_cls, obj) for obj in raw) if item is not None]
+    invalid = len(raw) - len(items)
+    if items:
+        outcome = "salvaged" if parser.truncated or len(raw) > complete or invalid else "parsed"
+    elif parser.finished and not raw:
+        outcome = "empty"
+    else:
+        outcome = "failed"
+    return ParseResult(items=items, outcome=outcome, invalid_items=invalid)
+
+
+class StructuredOutputStats:
+    """Per-schema counts of parse outcomes, so wasted generations show up as a failure rate."""
+    OUTCOMES = ("parsed", "salvaged", "empty", "repaired", "failed")
+
+    def __init__(self):
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, schema: str, outcome: str, invalid_items: int = 0):
+        with self._lock:
+            counts = self._counts.setdefault(schema, dict.fromkeys(self.OUTCOMES + ("invalid_items",), 0))
+            counts[outcome] += 1
+            counts["invalid_items"] += invalid_items
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            result = {}
+            for schema, counts in self._counts.items():
+                responses = sum(counts[outcome] for outcome in self.OUTCOMES)
+                result[schema] = dict(counts, responses=responses,
+                                      failure_rate=counts["failed"] / responses if responses else 0.0)
+            return result
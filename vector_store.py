@@ -0,0 +1,322 @@
+"""Exact-search vector store on a memory-mapped float32 matrix, for corpora of a few thousand chunks.
+
+Layout of a store directory:
+
+    index.json          ids, texts, metadatas, dimension and the current matrix file
+    vectors-<gen>.f32   row-major float32 matrix of L2-normalized embeddings
+
+Search is a single matrix-vector (or matrix-matrix, for batches) product, so
+cosine top-k is exact. The matrix is opened with np.memmap in read-only mode:
+every gunicorn worker maps the same file and the OS page cache keeps a single
+copy of it. Writes build a new generation file and swap index.json in with
+os.replace, so a reader never sees a half-written matrix.
+
+Writes go through write_session(): the changes made inside one are buffered in
+memory and saved as a single generation when it ends, under an exclusive lock
+on the directory, so a sync of N batches writes the matrix once rather than N
+times and workers syncing the same directory take turns. Superseded generation
+files are deleted only GENERATION_GRACE_SECONDS after they stopped being
+current, since another worker may have just read an index.json naming one.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers in several processes aren't serialized
+    fcntl = None
+
+INDEX_FILE = "index.json"
+LOCK_FILE = ".write.lock"
+GENERATION_GRACE_SECONDS = 600  # How long a superseded matrix file stays on disk
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+class NumpyVectorStore(VectorStore):
+    """A VectorStore with the parts of Chroma's API VectorDatabase and HybridRetriever use (get/delete/filter)."""
+
+    def __init__(self, persist_directory: str, embedding_function: Embeddings):
+        self.persist_directory = persist_directory
+        self.embedding_function = embedding_function
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._matrix: np.ndarray = np.zeros((0, 0), dtype=np.float32)
+        self._matrix_file: Optional[str] = None
+        self._index_signature: Optional[Tuple[int, int, int]] = None  # index.json as of the last load or save
+        self._rows_by_record: Dict[Any, List[int]] = {}
+        self._pending: List[np.ndarray] = []  # Vectors added in the open write session, not stacked yet
+        self._session_depth = 0
+        self._dirty = False
+        self._load()
+
+    # --- Persistence ---
+    def _current_signature(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(os.path.join(self.persist_directory, INDEX_FILE))
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        index_path = os.path.join(self.persist_directory, INDEX_FILE)
+        if not os.path.exists(index_path):
+            return
+        self._index_signature = self._current_signature()
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        self._ids, self._texts, self._metadatas = index["ids"], index["texts"], index["metadatas"]
+        self._matrix_file = index["matrix_file"]
+        self._matrix = (np.memmap(os.path.join(self.persist_directory, self._matrix_file), dtype=np.float32,
+                                  mode="r", shape=(len(self._ids), index["dim"]))
+                        if self._ids else np.zeros((0, 0), dtype=np.float32))
+        self._pending = []
+        self._reindex()
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        os.makedirs(self.persist_directory, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.persist_directory, LOCK_FILE), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def write_session(self) -> Iterator[None]:
+        """Saves the writes made inside it once, at the end, holding the directory's write lock throughout.
+
+        On entry the store reloads if another process saved since it was loaded, so its
+        changes apply on top of theirs. Sessions nest; only the outermost one saves.
+        Vectors added inside a session are searchable once it ends.
+        """
+        with self._lock:
+            self._session_depth += 1
+            try:
+                if self._session_depth > 1:
+                    yield
+                    return
+                with self._file_lock():
+                    if self._current_signature() != self._index_signature:
+                        self._load()
+                    try:
+                        yield
+                    finally:
+                        if self._dirty:
+                            self._save(self._stacked_matrix())
+            finally:
+                self._session_depth -= 1
+
+    def _stacked_matrix(self) -> np.ndarray:
+        """The matrix with the session's pending vectors appended, stacked in memory once."""
+        if self._pending:
+            blocks = ([np.asarray(self._matrix)] if self._matrix.size else []) + self._pending
+            self._matrix = np.vstack(blocks)
+            self._pending = []
+        return self._matrix
+
+    def _save(self, matrix: np.ndarray):
+        os.makedirs(self.persist_directory, exist_ok=True)
+        matrix_file = f"vectors-{uuid.uuid4().hex[:12]}.f32"
+        matrix_path = os.path.join(self.persist_directory, matrix_file)
+        matrix.astype(np.float32, copy=False).tofile(matrix_path)
+        index = {"dim": int(matrix.shape[1]) if matrix.size else 0, "matrix_file": matrix_file,
+                 "ids": self._ids, "texts": self._texts, "metadatas": self._metadatas}
+        tmp_path = os.path.join(self.persist_directory, f"{INDEX_FILE}.{uuid.uuid4().hex[:8]}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(self.persist_directory, INDEX_FILE))
+        self._index_signature = self._current_signature()
+        self._dirty = False
+
+        previous = self._matrix_file
+        self._matrix_file = matrix_file
+        self._matrix = (np.memmap(matrix_path, dtype=np.float32, mode="r", shape=matrix.shape)
+                        if matrix.size else np.zeros((0, 0), dtype=np.float32))
+        if previous and previous != matrix_file:
+            try:
+                os.utime(os.path.join(self.persist_directory, previous))  # Records when it was superseded
+            except OSError:
+                pass
+        self._collect_generations()
+        self._reindex()
+
+    def _collect_generations(self):
+        """Deletes matrix files superseded more than GENERATION_GRACE_SECONDS ago.
+
+        Workers that already map one keep reading it after the delete; the grace period
+        covers a worker that read the old index.json but hasn't opened its matrix yet.
+        """
+        cutoff = time.time() - GENERATION_GRACE_SECONDS
+        for name in os.listdir(self.persist_directory):
+            if name.startswith("vectors-") and name.endswith(".f32") and name != self._matrix_file:
+                path = os.path.join(self.persist_directory, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except OSError:
+                    pass
+
+    def _reindex(self):
+        rows: Dict[Any, List[int]] = {}
+        for row, metadata in enumerate(self._metadatas):
+            rows.setdefault(metadata.get("record_id"), []).append(row)
+        self._rows_by_record = rows
+
+    # --- Chroma-compatible surface used by VectorDatabase / HybridRetriever ---
+    def count(self) -> int:
+        return len(self._ids)
+
+    def get(self, ids: Optional[Sequence[str]] = None, include: Sequence[str] = ("documents", "metadatas"),
+            limit: Optional[int] = None, offset: int = 0) -> Dict[str, Any]:
+        if ids is not None:
+            wanted = set(ids)
+            rows = [row for row, chunk_id in enumerate(self._ids) if chunk_id in wanted]
+        else:
+            end = None if limit is None else offset + limit
+            rows = list(range(len(self._ids)))[offset:end]
+        page: Dict[str, Any] = {"ids": [self._ids[row] for row in rows]}
+        if "documents" in include:
+            page["documents"] = [self._texts[row] for row in rows]
+        if "metadatas" in include:
+            page["metadatas"] = [self._metadatas[row] for row in rows]
+        if "embeddings" in include:
+            page["embeddings"] = np.asarray(self._matrix[rows]) if rows else np.zeros((0, self._matrix.shape[-1]), np.float32)
+        return page
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [uuid.uuid4().hex for _ in texts]
+        vectors = _normalize(np.asarray(self.embedding_function.embed_documents(texts), dtype=np.float32))
+        with self.write_session():
+            replaced = set(ids) & set(self._ids)
+            if replaced:
+                self._delete_rows([row for row, chunk_id in enumerate(self._ids) if chunk_id in replaced])
+            self._pending.append(vectors)
+            self._ids = self._ids + list(ids)
+            self._texts = self._texts + texts
+            self._metadatas = self._metadatas + [dict(metadata or {}) for metadata in metadatas]
+            self._dirty = True
+        return list(ids)
+
+    def add_documents(self, documents: List[Document], ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        return self.add_texts([document.page_content for document in documents],
+                              [document.metadata for document in documents], ids=ids)
+
+    def _delete_rows(self, rows: List[int]):
+        keep = np.setdiff1d(np.arange(len(self._ids)), np.asarray(rows, dtype=np.int64))
+        matrix = self._stacked_matrix()
+        self._matrix = np.asarray(matrix)[keep] if len(self._ids) else matrix
+        self._ids = [self._ids[row] for row in keep]
+        self._texts = [self._texts[row] for row in keep]
+        self._metadatas = [self._metadatas[row] for row in keep]
+        self._dirty = True
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return None
+        wanted = set(ids)
+        with self.write_session():
+            rows = [row for row, chunk_id in enumerate(self._ids) if chunk_id in wanted]
+            if rows:
+                self._delete_rows(rows)
+        return True
+
+    # --- Search ---
+    def _candidate_rows(self, filter: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Row indices allowed by a Chroma-style filter ({"record_id": {"$in": [...]}} or {field: value})."""
+        if not filter:
+            return None
+        (field, condition), = filter.items()
+        if field == "record_id" and isinstance(condition, dict) and set(condition) == {"$in"}:
+            rows = [row for record_id in condition["$in"] for row in self._rows_by_record.get(record_id, [])]
+            return np.asarray(sorted(rows), dtype=np.int64)
+        if isinstance(condition, dict):
+            if set(condition) != {"$in"}:
+                raise ValueError(f"Unsupported filter operator in {filter}")
+            allowed = set(condition["$in"])
+            return np.asarray([row for row, metadata in enumerate(self._metadatas) if metadata.get(field) in allowed],
+                              dtype=np.int64)
+        return np.asarray([row for row, metadata in enumerate(self._metadatas) if metadata.get(field) == condition],
+                          dtype=np.int64)
+
+    def search_vectors(self, query_vectors: np.ndarray, k: int = 4,
+                       filter: Optional[Dict[str, Any]] = None) -> List[List[Tuple[Document, float]]]:
+        """Exact cosine top-k for each row of `query_vectors`, in one matrix product."""
+        queries = _normalize(np.atleast_2d(np.asarray(query_vectors, dtype=np.float32)))
+        matrix = self._matrix
+        if not len(self._ids) or k <= 0:
+            return [[] for _ in range(len(queries))]
+        rows = self._candidate_rows(filter)
+        if rows is not None:
+            if not len(rows):
+                return [[] for _ in range(len(queries))]
+            matrix = matrix[rows]
+        scores = queries @ matrix.T  # (queries, candidates)
+        k = min(k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for query_scores, query_top in zip(scores, top):
+            ordered = query_top[np.argsort(-query_scores[query_top])]
+            hits = []
+            for position in ordered:
+                row = int(rows[position]) if rows is not None else int(position)
+                hits.append((Document(page_content=self._texts[row], metadata=dict(self._metadatas[row])),
+                             float(query_scores[position])))
+            results.append(hits)
+        return results
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None,
+                                     **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.search_vectors(np.asarray(self.embedding_function.embed_query(query)), k, filter)[0]
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None,
+                          **kwargs: Any) -> List[Document]:
+        return [document for document, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def similarity_search_batch(self, queries: List[str], k: int = 4,
+                                filter: Optional[Dict[str, Any]] = None) -> List[List[Document]]:
+        """Top-k for several queries: one embedding per query, one matrix product for all of them."""
+        if not queries:
+            return []
+        vectors = np.asarray([self.embedding_function.embed_query(query) for query in queries], dtype=np.float32)
+        return [[document for document, _ in hits] for hits in self.search_vectors(vectors, k, filter)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: (score + 1.0) / 2.0
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   ids: Optional[List[str]] = None, persist_directory: str = "db/numpy_store",
+                   **kwargs: Any) -> "NumpyVectorStore":
+        store = cls(persist_directory=persist_directory, embedding_function=embedding)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding_function